@@ -0,0 +1,71 @@
+"""
+Benchmark: throughput of the batch command line (svg_to_gcode.main) with one
+worker process against one worker per core, on a directory of synthetic
+SVG files of similar size.
+
+The files are independent, so the speedup should stay close to the number of
+cores; what is lost goes to starting the workers and to the largest file
+finishing last.
+
+Run from the repository root:
+    python benchmarks/bench_batch.py [file count]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from svg_to_gcode import main
+
+FILE_COUNT = 32
+PATHS_PER_FILE = 300
+
+
+def write_svg(path, seed):
+    rng = random.Random(seed)
+    with open(path, "w") as file:
+        file.write('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000">\n')
+        for _ in range(PATHS_PER_FILE):
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+            d = f"M{x:.2f} {y:.2f}" + "".join(
+                f"c{rng.uniform(-30, 30):.2f} {rng.uniform(-30, 30):.2f} "
+                f"{rng.uniform(-30, 30):.2f} {rng.uniform(-30, 30):.2f} "
+                f"{rng.uniform(-30, 30):.2f} {rng.uniform(-30, 30):.2f}" for _ in range(6)) + "z"
+            file.write(f'<path d="{d}"/>\n')
+        file.write('</svg>\n')
+
+
+def run(input_dir, output_dir, jobs):
+    argv = [input_dir, "-o", output_dir, "-j", str(jobs), "-q"]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        status = main(argv)
+    elapsed = time.perf_counter() - start
+    assert status == 0
+    return elapsed
+
+
+def bench(file_count):
+    cores = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = os.path.join(tmp, "in")
+        os.makedirs(input_dir)
+        for i in range(file_count):
+            write_svg(os.path.join(input_dir, f"drawing{i:03d}.svg"), seed=i)
+        print(f"{file_count} files, {PATHS_PER_FILE} paths each, {cores} cores")
+        serial = run(input_dir, os.path.join(tmp, "serial"), 1)
+        print(f"  1 worker : {serial:7.2f} s  {file_count / serial:6.2f} files/s")
+        if cores > 1:
+            parallel = run(input_dir, os.path.join(tmp, "parallel"), cores)
+            print(f"  {cores} workers: {parallel:7.2f} s  {file_count / parallel:6.2f} files/s  "
+                  f"speedup {serial / parallel:.2f}x ({serial / parallel / cores:.0%} of linear)")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else FILE_COUNT)
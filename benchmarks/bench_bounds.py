@@ -0,0 +1,94 @@
+"""
+Benchmark: the bed bounds check and clipping (geometry.bounds) on jobs of
+many points, against checking every point in pure Python, and against
+formatting the first layer of G-code, which a job that doesn't fit would
+otherwise get to before anything noticed.
+
+Every job is a grid of small arc-fitted circles; the jobs that don't fit
+are the same grid moved 5 mm past X_MAX. The clipped job must fit.
+
+Run from the repository root:
+    python benchmarks/bench_bounds.py
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry.bounds import check_bed, check_placement, clip_to_bed
+from geometry.pathset import PathSet, MOVE, LINE, ARC_CCW
+from writer.gcodewriter import GcodeWriter
+
+POINT_COUNTS = [10_000, 100_000, 1_000_000]
+BED = (0.0, 0.0, 100.0, 100.0)
+SEGMENTS = 16  # per circle: 15 lines and one closing arc
+
+
+def job(points):
+    """
+    Returns circles of 1 mm with SEGMENTS moves each, on a grid filling the
+    bed, points moves in all.
+    """
+    count = points // (SEGMENTS + 1)
+    side = math.ceil(math.sqrt(count))
+    pitch = 98.0 / side
+    centers = np.column_stack([1 + pitch * (np.arange(count) % side),
+                               1 + pitch * (np.arange(count) // side)])
+    angles = np.linspace(0, 2 * math.pi, SEGMENTS + 1)
+    ring = 0.4 * np.column_stack([np.cos(angles), np.sin(angles)])
+    coords = (centers[:, None, :] + ring[None, :, :]).reshape(-1, 2)
+    codes = np.tile(np.r_[MOVE, np.full(SEGMENTS - 1, LINE), ARC_CCW].astype(np.uint8), count)
+    arc_centers = np.full((len(coords), 2), np.nan)
+    arc_centers[SEGMENTS::SEGMENTS + 1] = centers
+    return PathSet(coords, codes, np.arange(count + 1) * (SEGMENTS + 1), arc_centers)
+
+
+def python_outside(paths, bed, origin):
+    """
+    The same check, one point at a time (without the arcs' bulges).
+    """
+    dx, dy = origin
+    outside = 0
+    for x, y in paths.coords.tolist():
+        if not (bed[0] <= x + dx <= bed[2] and bed[1] <= y + dy <= bed[3]):
+            outside += 1
+    return outside
+
+
+def main():
+    writer = GcodeWriter()
+    start = time.perf_counter()
+    for _ in range(1000):
+        check_placement(BED, (40, 40), 80)
+    print(f"placement reject: {(time.perf_counter() - start) * 1e3:.1f} us per job\n")
+    print(f"{'points':>9} {'fits s':>8} {'reject s':>9} {'python s':>9} {'format s':>9} "
+          f"{'clip s':>8} {'clipped ok':>10}")
+    for points in POINT_COUNTS:
+        paths = job(points)
+        start = time.perf_counter()
+        assert check_bed(paths, BED) is None
+        t_fits = time.perf_counter() - start
+        start = time.perf_counter()
+        report = check_bed(paths, BED, (5.0, 0.0))
+        t_reject = time.perf_counter() - start
+        start = time.perf_counter()
+        python_outside(paths, BED, (5.0, 0.0))
+        t_python = time.perf_counter() - start
+        start = time.perf_counter()
+        coords = paths.coords + (5.0, 0.0)
+        writer.moves_gcode(coords, np.zeros(len(coords)), paths.codes != MOVE)
+        t_format = time.perf_counter() - start
+        start = time.perf_counter()
+        clipped = clip_to_bed(paths, BED, (5.0, 0.0))
+        t_clip = time.perf_counter() - start
+        ok = check_bed(clipped, BED, (5.0, 0.0)) is None and report is not None
+        print(f"{points:>9} {t_fits:>8.4f} {t_reject:>9.4f} {t_python:>9.3f} {t_format:>9.3f} "
+              f"{t_clip:>8.4f} {str(ok):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: preparing the geometry of a large SVG (parse, flatten, normalize,
+simplify, arc fit) against loading it from the geometry cache, which is what
+re-slicing a design with other layer, offset or speed settings costs.
+
+Run from the repository root:
+    python benchmarks/bench_cache.py [path count]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from geometry.cache import GeometryCache, cache_key
+from svg_to_gcode import prepare_geometry
+
+PATH_COUNT = 20000
+
+
+def write_svg(path, count, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w") as file:
+        file.write('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000">\n')
+        for _ in range(count):
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+            d = f"M{x:.2f} {y:.2f}" + "".join(
+                f"c{rng.uniform(-20, 20):.2f} {rng.uniform(-20, 20):.2f} "
+                f"{rng.uniform(-20, 20):.2f} {rng.uniform(-20, 20):.2f} "
+                f"{rng.uniform(-20, 20):.2f} {rng.uniform(-20, 20):.2f}" for _ in range(4)) + "z"
+            file.write(f'<path d="{d}"/>\n')
+        file.write('</svg>\n')
+
+
+def bench(count):
+    settings = {"size": 60.0, "tolerance": 0.05, "simplify_tolerance": 0.02, "arc_tolerance": 0.02}
+    with tempfile.TemporaryDirectory() as tmp:
+        svg_file = os.path.join(tmp, "drawing.svg")
+        write_svg(svg_file, count)
+        cache = GeometryCache(os.path.join(tmp, "cache"))
+
+        start = time.perf_counter()
+        paths, points = prepare_geometry(svg_file, **settings)
+        prepare = time.perf_counter() - start
+
+        key = cache_key(svg_file, settings)
+        start = time.perf_counter()
+        cache.put(key, paths, {"points": points})
+        store = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached, _ = cache.get(cache_key(svg_file, settings))
+        load = time.perf_counter() - start
+        assert (cached.coords == paths.coords).all()
+
+        entry = os.path.getsize(os.path.join(cache.directory, key + ".npz"))
+        print(f"{count} paths, {os.path.getsize(svg_file) / 1e6:.1f} MB SVG, "
+              f"{paths.point_count} points, {entry / 1e6:.1f} MB cache entry")
+        print(f"  prepare : {prepare:7.3f} s")
+        print(f"  store   : {store:7.3f} s")
+        print(f"  load    : {load:7.3f} s (hash included)  {prepare / load:.0f}x faster")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else PATH_COUNT)
@@ -0,0 +1,84 @@
+"""
+Benchmark: print time estimate of a large job. Times writer.estimate.path_times
+on a wandering outline of 1M moves (every 50th a travel move), best of a
+few runs, and checks the planner against a plain per-move loop on a smaller
+outline.
+
+Run from the repository root:
+    python benchmarks/bench_estimate.py
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from writer.estimate import corner_speeds2, junction_deviation, move_directions, path_times
+from writer.gcodewriter import default_writer
+
+MOVES = 1_000_000
+CHECK_MOVES = 20_000
+RUNS = 5
+
+
+def outline(count, seed=0):
+    rng = np.random.default_rng(seed)
+    angle = np.cumsum(rng.normal(0, 0.3, count))
+    steps = np.column_stack([np.cos(angle), np.sin(angle)]) * rng.uniform(0.05, 2.0, (count, 1))
+    coords = 100 + np.cumsum(steps, axis=0)
+    extrude = np.ones(count, dtype=bool)
+    extrude[::50] = False
+    return coords, extrude
+
+
+def loop_times(lengths, speeds, accel, corners2):
+    """
+    The same planner as move_times(), one move at a time.
+    """
+    count = len(lengths)
+    limits = [0.0] + [min(speeds[i]**2, speeds[i + 1]**2, corners2[i]) for i in range(count - 1)] + [0.0]
+    for i in range(1, count + 1):
+        limits[i] = min(limits[i], limits[i - 1] + 2 * accel * lengths[i - 1])
+    for i in range(count - 1, -1, -1):
+        limits[i] = min(limits[i], limits[i + 1] + 2 * accel * lengths[i])
+    times = []
+    for i in range(count):
+        entry2, exit2, speed = limits[i], limits[i + 1], speeds[i]
+        peak2 = min(speed**2, (2 * accel * lengths[i] + entry2 + exit2) / 2)
+        cruise = max(lengths[i] - (2 * peak2 - entry2 - exit2) / (2 * accel), 0.0)
+        times.append((2 * math.sqrt(peak2) - math.sqrt(entry2) - math.sqrt(exit2)) / accel
+                     + cruise / speed)
+    return times
+
+
+def main():
+    writer = default_writer()
+    accel, jerk = writer.acceleration, writer.jerk
+
+    coords, extrude = outline(CHECK_MOVES)
+    lengths, _ = writer.segment_extrusion(coords, extrude)
+    speeds = np.where(extrude, writer.g1_speed / 60, writer.g0_speed / 60)
+    entry, exit = move_directions(coords)
+    corners2 = corner_speeds2(exit[:-1], entry[1:], accel, junction_deviation(accel, jerk))
+    expected = loop_times(lengths.tolist(), speeds.tolist(), accel, corners2.tolist())
+    error = np.abs(path_times(coords, lengths, speeds, accel, jerk) - expected).max()
+    print(f"{CHECK_MOVES} moves, largest difference from a per-move loop: {error:.2e} s")
+
+    coords, extrude = outline(MOVES)
+    lengths, _ = writer.segment_extrusion(coords, extrude)
+    speeds = np.where(extrude, writer.g1_speed / 60, writer.g0_speed / 60)
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        total = path_times(coords, lengths, speeds, accel, jerk).sum()
+        best = min(best, time.perf_counter() - start)
+    print(f"{MOVES} moves: {best:.3f} s, best of {RUNS} ({MOVES / best / 1e6:.1f}M moves/s)")
+    print(f"  estimate {total:.1f} s, at feed rate without acceleration {np.sum(lengths / speeds):.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: adaptive curve flattening, batched over all curves of a
+document, against flattening the same curves one at a time in Python.
+
+For each chord tolerance (mm at a 60 mm print) it reports how many points the
+curves are flattened into, the largest measured chord error and the time of
+both approaches. The corpus is the synthetic path data of bench_parser.py.
+
+Run from the repository root:
+    python benchmarks/bench_flatten.py
+"""
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry.flatten import (SEGMENT_CUBIC, SEGMENT_ARC, END, flatten_segments,
+                              segment_point_counts, tolerance_for_size)
+from reader.pathdata import curve_segments
+from bench_parser import inkscape, icons, best_of
+
+SEGMENTS = 50000
+TARGET_SIZE = 60
+TOLERANCES = [0.2, 0.05, 0.01]
+
+
+def flatten_one_by_one(kinds, segments, tolerance):
+    """Flattens every segment with its own Python loop."""
+    counts = segment_point_counts(kinds, segments, tolerance).tolist()
+    points = []
+    for kind, row, n in zip(kinds.tolist(), segments.tolist(), counts):
+        for k in range(1, n):
+            t = k / n
+            if kind == SEGMENT_CUBIC:
+                mt = 1 - t
+                points.append((mt**3 * row[0] + 3 * mt**2 * t * row[2] + 3 * mt * t**2 * row[4] + t**3 * row[8],
+                               mt**3 * row[1] + 3 * mt**2 * t * row[3] + 3 * mt * t**2 * row[5] + t**3 * row[9]))
+            elif kind == SEGMENT_ARC:
+                angle = row[6] + row[7] * t
+                points.append((row[0] + row[2] * math.cos(angle) + row[3] * math.sin(angle),
+                               row[1] + row[4] * math.cos(angle) + row[5] * math.sin(angle)))
+        points.append((row[8], row[9]))
+    return points
+
+
+def max_chord_error(kinds, segments, tolerance, samples=16):
+    """Largest distance from the curve to its chords, in segment units."""
+    coords, _, counts = flatten_segments(kinds, segments, tolerance)
+    # Re-flatten with a much finer budget and measure the distance from the
+    # fine points to the coarse polyline of the same segment
+    fine, _, fine_counts = flatten_segments(kinds, segments, tolerance / samples)
+    curved = np.flatnonzero((kinds == SEGMENT_CUBIC) | (kinds == SEGMENT_ARC))[:2000]
+    ends = np.cumsum(counts)
+    fine_ends = np.cumsum(fine_counts)
+    worst = 0.0
+    for i in curved.tolist():
+        start = segments[i - 1, END] if i else segments[i, END]
+        chord = np.vstack([start, coords[ends[i] - counts[i]:ends[i]]])
+        curve = fine[fine_ends[i] - fine_counts[i]:fine_ends[i]]
+        a = chord[:-1, None]
+        d = chord[1:, None] - a
+        length = np.maximum((d**2).sum(-1), 1e-300)
+        t = np.clip(((curve[None] - a) * d).sum(-1) / length, 0, 1)
+        distance = np.hypot(*(a + t[..., None] * d - curve[None]).transpose(2, 0, 1)).min(axis=0)
+        worst = max(worst, float(distance.max()))
+    return worst
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'corpus':>9} {'tol mm':>7} {'curves':>7} {'points':>8} {'max err mm':>10} "
+          f"{'loop s':>7} {'batch s':>8} {'speedup':>8}")
+    for name, make in [("inkscape", inkscape), ("icons", icons)]:
+        kinds, segments = curve_segments(make(rng, SEGMENTS))
+        curves = int(np.count_nonzero((kinds == SEGMENT_CUBIC) | (kinds == SEGMENT_ARC)))
+        for tolerance_mm in TOLERANCES:
+            tolerance = tolerance_for_size(kinds, segments, TARGET_SIZE, tolerance_mm)
+            points = len(flatten_segments(kinds, segments, tolerance)[0])
+            error = max_chord_error(kinds, segments, tolerance) * tolerance_mm / tolerance
+            t_loop = best_of(lambda _: flatten_one_by_one(kinds, segments, tolerance), None, repeat=1)
+            t_batch = best_of(lambda _: flatten_segments(kinds, segments, tolerance), None)
+            print(f"{name:>9} {tolerance_mm:>7} {curves:>7} {points:>8} {error:>10.4f} "
+                  f"{t_loop:>7.3f} {t_batch:>8.3f} {t_loop / t_batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
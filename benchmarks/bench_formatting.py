@@ -0,0 +1,74 @@
+"""
+Benchmark: size and emit time of the G-code for a 1M-move job written with
+str(float) against fixed precision with modal word elision
+(writer.gcodewriter.moves_gcode).
+
+The job is a plotted outline: mostly short extruding moves along curves,
+with axis-aligned stretches and a travel move every 50 moves.
+
+Run from the repository root:
+    python benchmarks/bench_formatting.py [move count]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from writer.gcodewriter import G0_speed, G1_speed, moves_gcode, segment_extrusion
+
+MOVE_COUNT = 1_000_000
+
+
+def str_moves_gcode(coords, e, extrude):
+    """
+    The str(float) formatting used before, every word on every move.
+    """
+    g0_tail = " F" + str(G0_speed) + "\n"
+    g1_tail = " F" + str(G1_speed) + "\n"
+    return "".join(
+        "G1 X" + str(x) + " Y" + str(y) + " E" + str(ev) + g1_tail if ext
+        else "G0 X" + str(x) + " Y" + str(y) + g0_tail
+        for x, y, ev, ext in zip(coords[:, 0].tolist(), coords[:, 1].tolist(),
+                                 e.tolist(), extrude.tolist()))
+
+
+def make_job(count, seed=0):
+    rng = np.random.default_rng(seed)
+    angle = np.cumsum(rng.normal(0, 0.2, count))
+    step = np.column_stack([np.cos(angle), np.sin(angle)]) * 0.3
+    # Every fourth stretch of 20 moves runs along an axis
+    straight = (np.arange(count) // 20) % 4 == 0
+    step[straight, 1] = 0.0
+    coords = 100 + np.cumsum(step, axis=0) % 80
+    extrude = np.ones(count, dtype=bool)
+    extrude[::50] = False
+    _, e = segment_extrusion(coords, extrude, coords[0, 0], coords[0, 1])
+    return coords, e, extrude
+
+
+def best_of(function, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench(count):
+    coords, e, extrude = make_job(count)
+    old_time, old = best_of(str_moves_gcode, coords, e, extrude)
+    new_time, new = best_of(moves_gcode, coords, e, extrude)
+    print(f"{count} moves")
+    print(f"  str(float)         : {len(old) / 1e6:7.1f} MB  {old_time:6.2f} s")
+    print(f"  precision + modal  : {len(new) / 1e6:7.1f} MB  {new_time:6.2f} s")
+    print(f"  {len(old) / len(new):.2f}x smaller, {old_time / new_time:.2f}x faster")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else MOVE_COUNT)
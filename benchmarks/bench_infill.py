@@ -0,0 +1,97 @@
+"""
+Benchmark: solid infill of a layer of many small glyphs, the batched
+scanline engine (geometry.infill) against intersecting every scanline with
+every edge of a glyph in pure Python. Both fill the same lines; the check
+compares their total length.
+
+Every glyph is a ring, an outline with a hole running the other way, as in
+the letters of a font.
+
+Run from the repository root:
+    python benchmarks/bench_infill.py
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry.infill import rectilinear_infill
+from geometry.pathset import PathSet, MOVE, LINE
+
+GLYPH_COUNTS = [10, 100, 1000]
+LINE_WIDTH = 0.4
+ANGLE = 45.0
+
+
+def glyphs(count, seed=0):
+    """
+    Returns count rings of 5 mm with 48 and 24 point outlines on a grid.
+    """
+    rng = np.random.default_rng(seed)
+    side = math.ceil(math.sqrt(count))
+    coords = []
+    codes = []
+    for i in range(count):
+        cx, cy = 6.0 * (i % side), 6.0 * (i // side)
+        for radius, points, turn in ((2.5, 48, 1), (1.2 + rng.uniform(0, 0.3), 24, -1)):
+            angles = turn * np.linspace(0, 2 * math.pi, points + 1)
+            coords.append(np.column_stack([cx + radius * np.cos(angles), cy + radius * np.sin(angles)]))
+            codes.append(np.r_[MOVE, np.full(points, LINE)].astype(np.uint8))
+    offsets = np.arange(count + 1) * (48 + 1 + 24 + 1)
+    return PathSet(np.concatenate(coords), np.concatenate(codes), offsets)
+
+
+def python_infill_length(paths, spacing, angle, inset):
+    """
+    The same fill, one glyph, scanline and edge at a time.
+    """
+    cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    total = 0.0
+    for path in paths:
+        points = [(x * cos + y * sin, y * cos - x * sin) for x, y in path.coords.tolist()]
+        codes = path.codes.tolist()
+        edges = [(points[i - 1], points[i]) for i in range(1, len(points)) if codes[i] != MOVE]
+        low = min(y for _, y in points)
+        high = max(y for _, y in points)
+        line = math.ceil(low / spacing - 0.5)
+        while (line + 0.5) * spacing < high:
+            y = (line + 0.5) * spacing
+            crossings = []
+            for (x0, y0), (x1, y1) in edges:
+                if min(y0, y1) <= y < max(y0, y1):
+                    crossings.append((x0 + (y - y0) * (x1 - x0) / (y1 - y0), 1 if y1 > y0 else -1))
+            crossings.sort()
+            winding = 0
+            for x, direction in crossings:
+                if winding == 0:
+                    enter = x
+                winding += direction
+                if winding == 0 and x - enter > 2 * inset:
+                    total += x - enter - 2 * inset
+            line += 1
+    return total
+
+
+def main():
+    rectilinear_infill(glyphs(1), 1.0, LINE_WIDTH, ANGLE)  # warm up
+    print(f"{'glyphs':>7} {'lines':>7} {'python s':>9} {'batched s':>10} {'speedup':>8} {'length diff':>12}")
+    for count in GLYPH_COUNTS:
+        paths = glyphs(count)
+        start = time.perf_counter()
+        expected = python_infill_length(paths, LINE_WIDTH, ANGLE, LINE_WIDTH)
+        t_python = time.perf_counter() - start
+        start = time.perf_counter()
+        infill = rectilinear_infill(paths, 1.0, LINE_WIDTH, ANGLE)
+        t_batched = time.perf_counter() - start
+        delta = np.diff(infill.coords.reshape(-1, 2, 2), axis=1)[:, 0]
+        length = float(np.hypot(delta[:, 0], delta[:, 1]).sum())
+        print(f"{count:>7} {infill.point_count // 2:>7} {t_python:>9.3f} {t_batched:>10.4f} "
+              f"{t_python / t_batched:>7.1f}x {abs(length - expected):>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
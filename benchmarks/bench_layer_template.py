@@ -0,0 +1,45 @@
+"""
+Benchmark: time to emit a many-layer job with the layer template (path body
+formatted once, replayed per layer) against formatting every layer again.
+
+Run from the repository root:
+    python benchmarks/bench_layer_template.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_to_gcode import iter_gcode
+from writer.gcodestream import GcodeStream
+from bench_stream import synthetic_paths
+
+LAYER_COUNTS = [1, 100, 500]
+PATH_COUNT = 50
+POINTS_PER_PATH = 100
+
+
+def emit(paths, layer_num, output, layer_template):
+    start = time.perf_counter()
+    with GcodeStream(output) as sink:
+        sink.write_all(iter_gcode(paths, layer_num, 0.2, layer_template=layer_template))
+    return time.perf_counter() - start
+
+
+def main():
+    paths = synthetic_paths(PATH_COUNT, POINTS_PER_PATH)
+    output = os.path.join(tempfile.mkdtemp(), "bench.gcode")
+    print(f"{PATH_COUNT} paths x {POINTS_PER_PATH} points")
+    print(f"{'layers':>7} {'per-layer s':>12} {'template s':>11} {'speedup':>8} {'file MB':>8}")
+    for layer_num in LAYER_COUNTS:
+        t_old = emit(paths, layer_num, output, layer_template=False)
+        t_new = emit(paths, layer_num, output, layer_template=True)
+        size = os.path.getsize(output)
+        print(f"{layer_num:>7} {t_old:>12.3f} {t_new:>11.3f} {t_old / t_new:>7.1f}x {size / 1e6:>8.1f}")
+    os.remove(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: travel distance per layer in document order, after the
+nearest-neighbour pass alone and after 2-opt improvement, for designs with a
+growing number of scattered loops and open strokes.
+
+Run from the repository root:
+    python benchmarks/bench_ordering.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry.pathset import PathSet, MOVE, LINE
+from geometry.ordering import order_paths, travel_distance
+
+PIECE_COUNTS = [200, 1000, 5000]
+BED_SIZE = 180
+START = (0.0, 0.0)
+
+
+def scattered_pieces(count, seed=0):
+    """Half small closed loops, half short open strokes, placed at random."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, 24)
+    circle = np.column_stack([np.cos(t), np.sin(t)])
+    coords = []
+    codes = []
+    for i in range(count):
+        center = rng.uniform(0, BED_SIZE, 2)
+        if i % 2:
+            piece = center + circle * rng.uniform(0.5, 3)
+        else:
+            piece = center + np.cumsum(rng.normal(0, 1, (6, 2)), axis=0)
+        piece_codes = np.full(len(piece), LINE, dtype=np.uint8)
+        piece_codes[0] = MOVE
+        coords.append(piece)
+        codes.append(piece_codes)
+    return PathSet.from_arrays(coords, codes)
+
+
+def main():
+    print(f"{'pieces':>7} {'document mm':>12} {'nn mm':>9} {'nn s':>6} {'2-opt mm':>9} {'2-opt s':>8} {'saved':>6}")
+    for count in PIECE_COUNTS:
+        paths = scattered_pieces(count)
+        before = travel_distance(paths, START)
+        start = time.perf_counter()
+        nearest = order_paths(paths, START, time_budget=0)
+        t_nearest = time.perf_counter() - start
+        start = time.perf_counter()
+        improved = order_paths(paths, START, time_budget=2.0)
+        t_improved = time.perf_counter() - start
+        after = travel_distance(improved, START)
+        print(f"{count:>7} {before:>12.0f} {travel_distance(nearest, START):>9.0f} {t_nearest:>6.2f} "
+              f"{after:>9.0f} {t_improved:>8.2f} {1 - after / before:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: writing a large job as plain G-code, gzip (.gcode.gz) and a
+.gcode.3mf package at several deflate levels (writer.package), against
+generating the whole text first and compressing it in one go.
+
+Every output is compressed as the G-code streams into it; the table gives
+the time of the conversion, the extra time over plain G-code, the stored
+size and its ratio to the G-code, and the G-code throughput of the
+compression. The last column is the peak memory traced while converting,
+which for the streamed outputs stays near that of plain G-code however
+large the job; the check unpacks every output and compares it with the
+plain G-code.
+
+Run from the repository root:
+    python benchmarks/bench_output.py
+"""
+import gzip
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_generators import curve_heavy
+from svg_to_gcode import convert_svg, iter_gcode, plan_paths
+from writer.package import GCODE_ENTRY, OUTPUT_FORMATS
+
+CASES = [("gcode", None), ("gz", 1), ("gz", 3), ("gz", 6), ("gz", 9), ("3mf", 3)]
+LAYERS = 50
+SIZE = 60
+
+
+def unpack(path, kind):
+    if kind == "gz":
+        with gzip.open(path, "rb") as file:
+            return file.read()
+    if kind == "3mf":
+        with zipfile.ZipFile(path) as package:
+            return package.read(GCODE_ENTRY)
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def convert(document, output, level):
+    start = time.perf_counter()
+    stats = convert_svg(io.BytesIO(document), output, LAYERS, SIZE, compress_level=level or 1)
+    return stats, time.perf_counter() - start
+
+
+def traced_peak(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    logging.disable(logging.WARNING)
+    document = curve_heavy(200)
+    directory = tempfile.mkdtemp()
+    convert(document, os.path.join(directory, "warm.gcode"), None)
+    plain = None
+    t_plain = None
+    print(f"{'format':>7} {'level':>5} {'seconds':>8} {'extra s':>8} {'MB':>8} {'ratio':>6} "
+          f"{'MB/s':>7} {'peak MB':>8} {'same':>5}")
+    for kind, level in CASES:
+        output = os.path.join(directory, "job" + OUTPUT_FORMATS[kind])
+        stats, seconds = convert(document, output, level)
+        if plain is None:
+            plain, t_plain = unpack(output, kind), seconds
+        extra = max(seconds - t_plain, 1e-9)
+        peak = traced_peak(lambda: convert(document, output, level))
+        print(f"{kind:>7} {level or '-':>5} {seconds:>8.3f} {seconds - t_plain:>8.3f} "
+              f"{stats['stored_bytes'] / 1e6:>8.2f} {stats['stored_bytes'] / stats['bytes']:>6.3f} "
+              f"{stats['bytes'] / 1e6 / extra if kind != 'gcode' else 0:>7.1f} "
+              f"{peak / 1e6:>8.1f} {str(unpack(output, kind) == plain):>5}")
+
+    # The whole text first, then compressed
+    def materialized():
+        svg_paths, infill, _, _ = plan_paths(io.BytesIO(document), SIZE, 40, 40, 0.2)
+        text = "".join(chunk if isinstance(chunk, str) else chunk.decode("utf-8")
+                       for chunk in iter_gcode(svg_paths, LAYERS, 0.2, 40, 40, infill=infill))
+        with open(os.path.join(directory, "whole.gcode.gz"), "wb") as file:
+            file.write(gzip.compress(text.encode("utf-8"), 3, mtime=0))
+
+    start = time.perf_counter()
+    materialized()
+    seconds = time.perf_counter() - start
+    print(f"\nwhole text then gzip 3: {seconds:.3f} s, peak {traced_peak(materialized) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark: SVG path data parsing, the single-pass tokenizer against the
+original two-regex-pass parser. Both sides produce the segment end points;
+curve flattening is measured separately in bench_flatten.py.
+
+The corpus imitates the path data written by common tools (no artwork is
+shipped with the repository): potrace-style traced outlines with long
+relative curve runs, minified Illustrator-style data with compact numbers
+(-.5.5), Inkscape-style absolute data with commas and icon data with arcs.
+
+Run from the repository root:
+    python benchmarks/bench_parser.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reader.pathdata import path_segments
+from legacy_parser import legacy_parse_svg_path
+
+SEGMENTS = 100000
+
+
+def _n(rng, scale=50.0, digits=2):
+    return round(rng.uniform(-scale, scale), digits)
+
+
+def traced(rng, segments=SEGMENTS):
+    parts = ["M%d %d c" % (rng.randint(0, 5000), rng.randint(0, 5000))]
+    for i in range(segments):
+        parts.append(" ".join(str(rng.randint(-60, 60)) for _ in range(6)))
+        if i % 500 == 499:
+            parts.append("z m%d %d c" % (rng.randint(-900, 900), rng.randint(-900, 900)))
+    return " ".join(parts) + "z"
+
+
+def minified(rng, segments=SEGMENTS):
+    def num():
+        v = _n(rng, 3.0, 1)
+        text = str(v)
+        # Drop leading zeros the way minifiers do: 0.5 -> .5, -0.5 -> -.5
+        return text.replace("0.", ".", 1) if abs(v) < 1 else text
+    parts = ["M12.5 3.25"]
+    for i in range(segments):
+        cmd = "clsh"[i % 4]
+        arity = {"c": 6, "l": 2, "s": 4, "h": 1}[cmd]
+        values = [num() for _ in range(arity)]
+        text = values[0]
+        for v in values[1:]:
+            # Only separate numbers when the next one doesn't start with - or .
+            text += v if v[0] in "-." and "." in text.rsplit(" ", 1)[-1] else " " + v
+        parts.append(cmd + text)
+    return "".join(parts) + "z"
+
+
+def inkscape(rng, segments=SEGMENTS):
+    parts = ["M %s,%s" % (_n(rng, 500, 4), _n(rng, 500, 4))]
+    for i in range(segments):
+        if i % 3:
+            parts.append("L %s,%s" % (_n(rng, 500, 4), _n(rng, 500, 4)))
+        else:
+            parts.append("C %s,%s %s,%s %s,%s" % tuple(_n(rng, 500, 4) for _ in range(6)))
+    return " ".join(parts) + " Z"
+
+
+def icons(rng, segments=SEGMENTS):
+    parts = []
+    for i in range(segments // 5):
+        parts.append("M%s %s" % (_n(rng, 24), _n(rng, 24)))
+        parts.append("a%s %s 0 1 0 %s %s" % (abs(_n(rng, 5)) + 1, abs(_n(rng, 5)) + 1, _n(rng, 4), _n(rng, 4)))
+        parts.append("h%s v%s q%s %s %s %sz" % tuple(_n(rng, 4) for _ in range(6)))
+    return "".join(parts)
+
+
+CORPUS = [("traced", traced), ("minified", minified), ("inkscape", inkscape), ("icons", icons)]
+
+
+def best_of(func, data, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'corpus':>9} {'MB':>6} {'segments':>8} {'legacy s':>9} {'new s':>7} {'speedup':>8}")
+    for name, make in CORPUS:
+        data = make(rng)
+        points = len(path_segments(data)[0])
+        t_old = best_of(legacy_parse_svg_path, data)
+        t_new = best_of(path_segments, data)
+        print(f"{name:>9} {len(data) / 1e6:>6.1f} {points:>8} {t_old:>9.3f} {t_new:>7.3f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
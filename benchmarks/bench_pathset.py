@@ -0,0 +1,70 @@
+"""
+Benchmark: memory of 1M points held as lists of ('move' | 'line', x, y)
+tuples against a PathSet, and the cost of normalizing each of them.
+
+Memory is the traced allocation of building each representation from the
+same arrays (tracemalloc), so it includes the tuples, the boxed floats and
+the list slots but not the interpreter's shared strings.
+
+Run from the repository root:
+    python benchmarks/bench_pathset.py [point count]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from geometry.pathset import PathSet, MOVE, LINE
+from svg_to_gcode import normalize_svg_coordinates
+
+POINT_COUNT = 1_000_000
+POINTS_PER_PATH = 100
+
+
+def make_arrays(count, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(0, 1000, (count, 2))
+    codes = np.full(count, LINE, dtype=np.uint8)
+    codes[::POINTS_PER_PATH] = MOVE
+    offsets = np.append(np.arange(0, count, POINTS_PER_PATH), count)
+    return coords, codes, offsets
+
+
+def traced(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def bench(count):
+    coords, codes, offsets = make_arrays(count)
+    tuples, tuple_bytes = traced(lambda: PathSet(coords, codes, offsets).to_points())
+    paths, array_bytes = traced(lambda: PathSet(coords.copy(), codes.copy(), offsets.copy()))
+
+    start = time.perf_counter()
+    normalize_svg_coordinates(tuples)
+    tuple_time = time.perf_counter() - start
+    start = time.perf_counter()
+    normalize_svg_coordinates(paths)
+    array_time = time.perf_counter() - start
+
+    view = paths[len(paths) // 2]
+    assert np.shares_memory(view.coords, paths.coords)
+
+    print(f"{count} points in {len(paths)} paths")
+    print(f"  tuples : {tuple_bytes / 1e6:8.1f} MB  {tuple_bytes / count:6.1f} B/point  "
+          f"normalize {tuple_time:.3f} s")
+    print(f"  PathSet: {array_bytes / 1e6:8.1f} MB  {array_bytes / count:6.1f} B/point  "
+          f"normalize {array_time:.3f} s")
+    print(f"  {tuple_bytes / array_bytes:.1f}x less memory, per-path views share the arrays")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else POINT_COUNT)
@@ -0,0 +1,55 @@
+"""
+Benchmark: cost of the stage profiler. Converts a synthetic SVG with the
+default NULL_PROFILER and with a Profiler, best of a few runs each, and
+prints the profile of the last run.
+
+With many layers the per-layer stage is entered once per layer, so this is
+the case where a disabled profiler would show if it cost anything.
+
+Run from the repository root:
+    python benchmarks/bench_profiling.py
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_batch import write_svg
+from profiling import NULL_PROFILER, Profiler
+from svg_to_gcode import convert_svg
+
+LAYERS = 500
+RUNS = 5
+
+
+def best_time(svg_file, output_file, make_profiler):
+    best = float("inf")
+    for _ in range(RUNS):
+        profiler = make_profiler()
+        start = time.perf_counter()
+        convert_svg(svg_file, output_file, layer_num=LAYERS, profiler=profiler)
+        best = min(best, time.perf_counter() - start)
+    return best, profiler
+
+
+def main():
+    logging.getLogger("svg_to_gcode").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        svg_file = os.path.join(tmp, "drawing.svg")
+        output_file = os.path.join(tmp, "drawing.gcode")
+        write_svg(svg_file, seed=0)
+        disabled, _ = best_time(svg_file, output_file, lambda: NULL_PROFILER)
+        enabled, profiler = best_time(svg_file, output_file, Profiler)
+    print(f"{LAYERS} layers, best of {RUNS}")
+    print(f"  profiler off: {disabled:.3f} s")
+    print(f"  profiler on : {enabled:.3f} s  ({enabled / disabled - 1:+.1%})")
+    print()
+    print(profiler.format_table())
+
+
+if __name__ == "__main__":
+    main()
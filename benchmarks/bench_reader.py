@@ -0,0 +1,96 @@
+"""
+Benchmark: peak RSS and wall time of reading the path data of every path of
+a large SVG file with the streaming reader (reader.svgreader) against
+minidom.parse. Parsing the path data costs the same after either reader and
+is left out.
+
+Each reader runs in a fresh interpreter so its peak RSS isn't mixed with the
+other one's. The synthetic files imitate illustration-tool exports: nested
+groups and many small paths with attributes.
+
+Run from the repository root:
+    python benchmarks/bench_reader.py [size in MB ...]
+"""
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES_MB = [10, 50, 200]
+
+
+def write_svg(path, size_mb, seed=0):
+    rng = random.Random(seed)
+    target = size_mb * 1_000_000
+    with open(path, "w") as file:
+        file.write('<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000">\n')
+        written = 0
+        group = 0
+        while written < target:
+            lines = [f'<g id="layer{group}" fill="none" stroke="#000">\n']
+            for i in range(200):
+                x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+                d = f"M{x:.2f} {y:.2f}" + "".join(
+                    f"c{rng.uniform(-9, 9):.2f} {rng.uniform(-9, 9):.2f} {rng.uniform(-9, 9):.2f} "
+                    f"{rng.uniform(-9, 9):.2f} {rng.uniform(-9, 9):.2f} {rng.uniform(-9, 9):.2f}"
+                    for _ in range(rng.randint(2, 12))) + "z"
+                lines.append(f'<path id="p{group}_{i}" style="stroke-width:0.5" d="{d}"/>\n')
+            lines.append("</g>\n")
+            text = "".join(lines)
+            file.write(text)
+            written += len(text)
+            group += 1
+        file.write("</svg>\n")
+
+
+def read_minidom(svg_file):
+    from xml.dom import minidom
+    doc = minidom.parse(svg_file)
+    return sum(1 for path in doc.getElementsByTagName("path") if path.getAttribute("d"))
+
+
+def read_streaming(svg_file):
+    from reader.svgreader import iter_path_data
+    return sum(1 for _ in iter_path_data(svg_file))
+
+
+def child(reader, svg_file):
+    import numpy  # noqa: F401, loaded before the baseline RSS is taken
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    paths = {"minidom": read_minidom, "streaming": read_streaming}[reader](svg_file)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(paths, elapsed, (peak - baseline) / 1024)
+
+
+def run(reader, svg_file):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", reader, svg_file],
+                            capture_output=True, text=True, check=True, cwd=ROOT).stdout
+    paths, elapsed, peak_mb = output.split()
+    return int(paths), float(elapsed), float(peak_mb)
+
+
+def main(sizes):
+    directory = tempfile.mkdtemp()
+    print(f"{'MB':>5} {'reader':>10} {'paths':>9} {'wall s':>7} {'peak RSS MB':>12}")
+    for size in sizes:
+        svg_file = os.path.join(directory, f"bench_{size}.svg")
+        write_svg(svg_file, size)
+        for reader in ("minidom", "streaming"):
+            paths, elapsed, peak_mb = run(reader, svg_file)
+            print(f"{size:>5} {reader:>10} {paths:>9} {elapsed:>7.2f} {peak_mb:>12.1f}")
+        os.remove(svg_file)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main([int(size) for size in sys.argv[1:]] or SIZES_MB)
@@ -0,0 +1,111 @@
+"""
+Benchmark: latency of small conversions through the conversion service
+(gcode_service.py) against one `python svg_to_gcode.py` process per file.
+
+A fresh process pays for the interpreter, the NumPy import and the config and
+start/end G-code reads on every file; the service pays for them once, so for
+small drawings its latency should be a fraction of the per-process one.
+
+Run from the repository root:
+    python benchmarks/bench_service.py [request count]
+"""
+import http.client
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REQUEST_COUNT = 20
+PATHS_PER_FILE = 20
+LAYERS = 5
+
+
+def svg_data(seed):
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(PATHS_PER_FILE):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+        d = f"M{x:.2f} {y:.2f}" + "".join(
+            f"c{rng.uniform(-30, 30):.2f} {rng.uniform(-30, 30):.2f} "
+            f"{rng.uniform(-30, 30):.2f} {rng.uniform(-30, 30):.2f} "
+            f"{rng.uniform(-30, 30):.2f} {rng.uniform(-30, 30):.2f}" for _ in range(4)) + "z"
+        paths.append(f'<path d="{d}"/>')
+    return ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000">\n'
+            + "\n".join(paths) + "\n</svg>\n").encode("utf-8")
+
+
+def start_service():
+    service = subprocess.Popen([sys.executable, os.path.join(ROOT, "gcode_service.py"),
+                                "--port", "0", "-j", "1", "--no-cache"],
+                               stdout=subprocess.PIPE, text=True)
+    line = service.stdout.readline()
+    match = re.search(r":(\d+) ", line)
+    if match is None:
+        service.kill()
+        raise RuntimeError(f"service did not start: {line!r}")
+    return service, int(match.group(1))
+
+
+def request(port, data):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("POST", f"/convert?layers={LAYERS}", body=data)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    assert response.status == 200, body
+    return body
+
+
+def bench_service(files):
+    service, port = start_service()
+    try:
+        times = []
+        for data in files:
+            start = time.perf_counter()
+            request(port, data)
+            times.append(time.perf_counter() - start)
+    finally:
+        service.terminate()
+        service.wait()
+    return times
+
+
+def bench_processes(files):
+    times = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, data in enumerate(files):
+            svg_file = os.path.join(tmp, f"drawing{i:03d}.svg")
+            with open(svg_file, "wb") as file:
+                file.write(data)
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(ROOT, "svg_to_gcode.py"), svg_file,
+                            "-o", tmp, "--layers", str(LAYERS), "--no-cache"],
+                           check=True, stdout=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def summary(times):
+    ordered = sorted(times)
+    return (f"p50 {ordered[len(ordered) // 2] * 1000:7.1f} ms  "
+            f"max {ordered[-1] * 1000:7.1f} ms  total {sum(times):6.2f} s")
+
+
+def bench(request_count):
+    files = [svg_data(seed) for seed in range(request_count)]
+    print(f"{request_count} files, {PATHS_PER_FILE} paths, {LAYERS} layers each")
+    processes = bench_processes(files)
+    print(f"  process per file: {summary(processes)}")
+    service = bench_service(files)
+    print(f"  service         : {summary(service)}  "
+          f"speedup {sum(processes) / sum(service):.1f}x")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else REQUEST_COUNT)
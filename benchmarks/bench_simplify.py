@@ -0,0 +1,62 @@
+"""
+Benchmark: polyline simplification on traced-looking outlines (dense, nearly
+collinear points with sub-0.05 mm steps), reporting the point count, the time
+of the simplification pass and the time to format one layer before and after.
+
+Run from the repository root:
+    python benchmarks/bench_simplify.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_to_gcode import render_layer_body
+from geometry.pathset import PathSet, MOVE, LINE
+from geometry.simplify import simplify_paths
+
+PATH_COUNT = 200
+POINTS_PER_PATH = 2000
+TOLERANCES = [0.005, 0.02, 0.05]
+
+
+def traced_paths(path_count, points_per_path, seed=0):
+    """Closed blobs sampled every ~0.02 mm with a little tracing jitter."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, points_per_path)
+    coords = []
+    for _ in range(path_count):
+        radius = 5 + np.abs(rng.normal(0, 1)) + 0.5 * np.sin(rng.integers(2, 6) * t)
+        # Traced outlines are mostly straight stretches joined at corners
+        radius = np.round(radius, 1)
+        blob = np.column_stack([radius * np.cos(t), radius * np.sin(t)])
+        blob += rng.normal(0, 0.002, blob.shape) + rng.uniform(0, 150, 2)
+        coords.append(blob)
+    codes = np.full(path_count * points_per_path, LINE, dtype=np.uint8)
+    codes[::points_per_path] = MOVE
+    return PathSet.from_arrays(coords, np.split(codes, path_count))
+
+
+def main():
+    paths = traced_paths(PATH_COUNT, POINTS_PER_PATH)
+    start = time.perf_counter()
+    render_layer_body(paths)
+    t_base = time.perf_counter() - start
+    print(f"{PATH_COUNT} paths, {paths.point_count} points, one layer formatted in {t_base:.3f} s")
+    print(f"{'tol mm':>7} {'points':>8} {'kept':>6} {'simplify s':>11} {'layer s':>8} {'speedup':>8}")
+    for tolerance in TOLERANCES:
+        start = time.perf_counter()
+        simplified = simplify_paths(paths, tolerance)
+        t_simplify = time.perf_counter() - start
+        start = time.perf_counter()
+        render_layer_body(simplified)
+        t_layer = time.perf_counter() - start
+        print(f"{tolerance:>7} {simplified.point_count:>8} {simplified.point_count / paths.point_count:>6.1%} "
+              f"{t_simplify:>11.3f} {t_layer:>8.3f} {t_base / t_layer:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
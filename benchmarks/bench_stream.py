@@ -0,0 +1,100 @@
+"""
+Benchmark: peak memory and time of the streaming G-code writer against the
+old build-one-big-string approach, for an increasing number of layers.
+
+Run from the repository root:
+    python benchmarks/bench_stream.py
+"""
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_to_gcode import iter_gcode, layer_change_block_full
+from writer.gcodestream import GcodeStream
+from writer.gcodewriter import G0, G1
+
+LAYER_COUNTS = [10, 50, 100]
+PATH_COUNT = 20
+POINTS_PER_PATH = 100
+
+
+def synthetic_paths(path_count=PATH_COUNT, points_per_path=POINTS_PER_PATH):
+    """
+    Closed circular paths spread over a 60 mm square.
+    """
+    paths = []
+    for p in range(path_count):
+        cx = 5 + (p % 10) * 5.5
+        cy = 5 + (p // 10) * 5.5
+        path = []
+        for i in range(points_per_path):
+            a = 2 * math.pi * i / (points_per_path - 1)
+            path.append(('move' if i == 0 else 'line', cx + 2 * math.cos(a), cy + 2 * math.sin(a)))
+        paths.append(path)
+    return paths
+
+
+def build_string(paths, layer_num, layer_height, output):
+    """
+    The previous approach: concatenate the whole program, then write it.
+    """
+    gcode = ""
+    with open("config/a1m_start.gcode", "r") as file:
+        gcode += file.read()
+    prev_x = prev_y = 0
+    gcode += G0(0, 0)
+    for layer in range(layer_num):
+        gcode += layer_change_block_full(layer, layer * layer_height + layer_height, layer_num, layer_height)
+        for path in paths:
+            for cmd_type, x, y in path:
+                if cmd_type == 'move':
+                    gcode += G0(x, y)
+                else:
+                    gcode += G1(x, y, prev_x=prev_x, prev_y=prev_y)
+                prev_x, prev_y = x, y
+        gcode += "\n"
+    with open("config/a1m_end.gcode", "r") as file:
+        gcode += file.read()
+    with open(output, "w") as file:
+        file.write(gcode)
+
+
+def stream(paths, layer_num, layer_height, output):
+    with GcodeStream(output) as sink:
+        sink.write_all(iter_gcode(paths, layer_num, layer_height))
+
+
+def measure(func, *args):
+    """
+    Wall time of an untraced run, then peak Python heap of a traced run.
+    """
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    paths = synthetic_paths()
+    output = os.path.join(tempfile.mkdtemp(), "bench.gcode")
+    print(f"{PATH_COUNT} paths x {POINTS_PER_PATH} points")
+    print(f"{'layers':>7} {'string s':>9} {'string MB':>10} {'stream s':>9} {'stream MB':>10} {'file MB':>8}")
+    for layer_num in LAYER_COUNTS:
+        t_old, m_old = measure(build_string, paths, layer_num, 0.2, output)
+        t_new, m_new = measure(stream, paths, layer_num, 0.2, output)
+        size = os.path.getsize(output)
+        print(f"{layer_num:>7} {t_old:>9.3f} {m_old / 1e6:>10.1f} {t_new:>9.3f} {m_new / 1e6:>10.1f} {size / 1e6:>8.1f}")
+    os.remove(output)
+
+
+if __name__ == "__main__":
+    main()
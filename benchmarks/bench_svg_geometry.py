@@ -0,0 +1,57 @@
+"""
+Benchmark: reading a document with deeply nested transformed groups and
+thousands of small shapes, with paths parsed one at a time against parsed
+in batches (reader.svgreader.PARSE_BATCH_SIZE). Transforms are applied to
+all segments in one batch either way.
+
+Run from the repository root:
+    python benchmarks/bench_svg_geometry.py
+"""
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_to_gcode import flatten_svg_paths
+from reader.svgreader import iter_svg_paths
+
+DEPTH = 30
+SHAPE_COUNTS = [2000, 20000]
+
+
+def nested_svg(shape_count, depth=DEPTH, seed=0):
+    rng = random.Random(seed)
+    parts = ['<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="200mm" viewBox="0 0 1000 1000">']
+    parts += ['<g transform="rotate(1) translate(1 2) scale(1.01)">'] * depth
+    for i in range(shape_count):
+        x, y = rng.uniform(0, 900), rng.uniform(0, 900)
+        if i % 3 == 0:
+            parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3"/>')
+        elif i % 3 == 1:
+            parts.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="8" height="4" rx="1" transform="skewX(10)"/>')
+        else:
+            parts.append(f'<path d="M{x:.1f} {y:.1f}c1 2 3 4 5 6s3 4 5 6q2 2 4 0t4 0z"/>')
+    parts += ['</g>'] * depth + ['</svg>']
+    return "".join(parts).encode()
+
+
+def read(data, batch_size):
+    start = time.perf_counter()
+    paths = flatten_svg_paths(iter_svg_paths(io.BytesIO(data), batch_size))
+    return time.perf_counter() - start, paths.point_count
+
+
+def main():
+    print(f"{'shapes':>7} {'points':>8} {'one by one s':>13} {'batched s':>10} {'speedup':>8}")
+    for count in SHAPE_COUNTS:
+        data = nested_svg(count)
+        t_single, points = read(data, 1)
+        t_batch, _ = read(data, 1000)
+        print(f"{count:>7} {points:>8} {t_single:>13.2f} {t_batch:>10.2f} {t_single / t_batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: a plate of copies of one drawing, convert_svg(copies=N), against
+converting the drawing N times, once per copy at its own start offset, as
+was done by hand before (parse, plan and estimate every copy again).
+
+The plate prepares the drawing once; every copy only moves the coordinates
+of the shared arrays before they are formatted. Both write the same number
+of moves; the check compares the filament of the plate with N times that
+of one copy.
+
+Run from the repository root:
+    python benchmarks/bench_tiling.py
+"""
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_generators import curve_heavy
+from svg_to_gcode import convert_svg
+
+COPY_COUNTS = [4, 16, 64]
+SIZE = 10
+SPACING = 2
+LAYERS = 5
+
+
+def main():
+    logging.disable(logging.WARNING)
+    document = curve_heavy(20)
+    output = os.path.join(tempfile.mkdtemp(), "plate.gcode")
+    convert_svg(io.BytesIO(document), output, LAYERS, SIZE)  # warm up
+    print(f"{'copies':>7} {'one by one s':>13} {'plate s':>8} {'speedup':>8} {'filament diff':>14}")
+    for copies in COPY_COUNTS:
+        start = time.perf_counter()
+        single = None
+        for copy in range(copies):
+            single = convert_svg(io.BytesIO(document), output, LAYERS, SIZE,
+                                 start_x=(SIZE + SPACING) * (copy % 8),
+                                 start_y=(SIZE + SPACING) * (copy // 8))
+        t_single = time.perf_counter() - start
+        start = time.perf_counter()
+        plate = convert_svg(io.BytesIO(document), output, LAYERS, SIZE, copies=copies,
+                            spacing=SPACING)
+        t_plate = time.perf_counter() - start
+        difference = abs(plate["filament_mm"] - copies * single["filament_mm"]) / plate["filament_mm"]
+        print(f"{copies:>7} {t_single:>13.3f} {t_plate:>8.3f} {t_single / t_plate:>7.1f}x "
+              f"{difference:>13.2e}")
+
+
+if __name__ == "__main__":
+    main()
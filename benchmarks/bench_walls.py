@@ -0,0 +1,103 @@
+"""
+Benchmark: extra walls of a layer of many small glyphs. Times
+geometry.walls.perimeters, and its self-crossing check (a uniform grid)
+against comparing every pair of segments of each offset loop, which must
+find the same crossings.
+
+Every glyph is a gear, an outline with a hole running the other way, so the
+offsets have inner corners between the teeth, and at the tips of the teeth
+the inner walls fold over and are cut off.
+
+Run from the repository root:
+    python benchmarks/bench_walls.py
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry.infill import closed_loops
+from geometry.pathset import PathSet, MOVE, LINE
+from geometry.walls import _polygons, crossing_segments, offset_polygons, perimeters
+
+GLYPH_COUNTS = [10, 100, 1000]
+WALLS = 3
+LINE_WIDTH = 0.4
+OUTLINE_POINTS = 240
+HOLE_POINTS = 60
+
+
+def glyphs(count, seed=0):
+    """
+    Returns count gears of 6 mm with 8 teeth, a 240 point outline and a
+    60 point hole, on a grid.
+    """
+    rng = np.random.default_rng(seed)
+    side = math.ceil(math.sqrt(count))
+    coords = []
+    codes = []
+    for i in range(count):
+        cx, cy = 7.0 * (i % side), 7.0 * (i // side)
+        for points, turn in ((OUTLINE_POINTS, 1), (HOLE_POINTS, -1)):
+            angles = turn * np.linspace(0, 2 * math.pi, points + 1) + rng.uniform(0, 1)
+            if turn > 0:
+                radii = 2.6 + 0.4 * np.tanh(4 * np.sin(8 * angles))
+            else:
+                radii = np.full(points + 1, 1.0 + rng.uniform(0, 0.3))
+            coords.append(np.column_stack([cx + radii * np.cos(angles), cy + radii * np.sin(angles)]))
+            coords[-1][-1] = coords[-1][0]
+            codes.append(np.r_[MOVE, np.full(points, LINE)].astype(np.uint8))
+    offsets = np.arange(count + 1) * (OUTLINE_POINTS + 1 + HOLE_POINTS + 1)
+    return PathSet(np.concatenate(coords), np.concatenate(codes), offsets)
+
+
+def all_pairs_crossings(coords, offsets):
+    """
+    The same check, every pair of segments of a loop, one loop at a time.
+    """
+    found = 0
+    for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+        p0, p1 = coords[start:stop - 1], coords[start + 1:stop]
+        i, j = np.triu_indices(len(p0), 2)
+        keep = ~((i == 0) & (j == len(p0) - 1))
+        i, j = i[keep], j[keep]
+        r, s = p1[i] - p0[i], p1[j] - p0[j]
+        side = lambda origin, edge, point: (edge[:, 0] * (point[:, 1] - origin[:, 1])
+                                            - edge[:, 1] * (point[:, 0] - origin[:, 0]))
+        crossing = ((side(p0[i], r, p0[j]) * side(p0[i], r, p1[j]) < 0)
+                    & (side(p0[j], s, p0[i]) * side(p0[j], s, p1[i]) < 0))
+        found += int(crossing.sum())
+    return found
+
+
+def main():
+    perimeters(glyphs(1), WALLS, LINE_WIDTH)  # warm up
+    print(f"{'glyphs':>7} {'loops':>7} {'walls s':>8} {'pairs s':>8} {'grid s':>8} {'speedup':>8} "
+          f"{'crossings':>10}")
+    for count in GLYPH_COUNTS:
+        paths = glyphs(count)
+        start = time.perf_counter()
+        walls = perimeters(paths, WALLS, LINE_WIDTH)
+        t_walls = time.perf_counter() - start
+
+        # The raw offsets of the first added wall, before they are cleaned up
+        coords, offsets, _ = closed_loops(paths)
+        vertices, polygon_offsets, _ = _polygons(coords, offsets)
+        rings, ring_offsets = offset_polygons(vertices, polygon_offsets,
+                                              np.full(len(polygon_offsets) - 1, LINE_WIDTH))
+        start = time.perf_counter()
+        expected = all_pairs_crossings(rings, ring_offsets)
+        t_pairs = time.perf_counter() - start
+        start = time.perf_counter()
+        first, _ = crossing_segments(rings, ring_offsets)
+        t_grid = time.perf_counter() - start
+        print(f"{count:>7} {len(walls):>7} {t_walls:>8.3f} {t_pairs:>8.3f} {t_grid:>8.4f} "
+              f"{t_pairs / t_grid:>7.1f}x {len(first):>5}/{expected}")
+
+
+if __name__ == "__main__":
+    main()
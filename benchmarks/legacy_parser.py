@@ -0,0 +1,158 @@
+"""
+The original two-regex-pass parse_svg_path, kept as the baseline for
+bench_parser.py.
+"""
+import re
+
+
+def legacy_parse_svg_path(path_data):
+    """
+    Parse SVG path data and return a list of (x, y) coordinates.
+    Supports M (moveto), L (lineto), H (horizontal), V (vertical), C (cubic bezier), 
+    Q (quadratic bezier), A (arc), and Z (closepath) commands.
+    """
+    # print(f"\n=== Parsing path data ===")
+    # print(f"Raw path data: {path_data[:200]}...")  # Print first 200 chars
+    
+    points = []
+    # Better regex to handle commands with optional whitespace and commas
+    commands = re.findall(r'[MLHVZCSQTAmlhvzcsqta][^MLHVZCSQTAmlhvzcsqta]*', path_data)
+    
+    # print(f"Found {len(commands)} commands: {[c[0] for c in commands]}")
+    
+    current_x = 0
+    current_y = 0
+    path_start_x = 0
+    path_start_y = 0
+    
+    for cmd_idx, cmd in enumerate(commands):
+        cmd_type = cmd[0]
+        # Better number extraction - handles scientific notation and negative numbers
+        params_str = cmd[1:].strip()
+        params = re.findall(r'-?\d*\.?\d+(?:[eE][+-]?\d+)?', params_str)
+        params = [float(p) for p in params if p]
+        
+        # print(f"Command {cmd_idx}: '{cmd_type}' with params: {params}")
+        
+        if cmd_type == 'M':  # Absolute moveto
+            if len(params) >= 2:
+                current_x = params[0]
+                current_y = params[1]
+                path_start_x = current_x
+                path_start_y = current_y
+                points.append(('move', current_x, current_y))
+                # Subsequent coordinate pairs are treated as lineto
+                for i in range(2, len(params), 2):
+                    if i + 1 < len(params):
+                        current_x = params[i]
+                        current_y = params[i + 1]
+                        points.append(('line', current_x, current_y))
+            
+        elif cmd_type == 'm':  # Relative moveto
+            if len(params) >= 2:
+                current_x += params[0]
+                current_y += params[1]
+                path_start_x = current_x
+                path_start_y = current_y
+                points.append(('move', current_x, current_y))
+                # Subsequent coordinate pairs are treated as relative lineto
+                for i in range(2, len(params), 2):
+                    if i + 1 < len(params):
+                        current_x += params[i]
+                        current_y += params[i + 1]
+                        points.append(('line', current_x, current_y))
+            
+        elif cmd_type == 'L':  # Absolute lineto
+            for i in range(0, len(params), 2):
+                if i + 1 < len(params):
+                    current_x = params[i]
+                    current_y = params[i + 1]
+                    points.append(('line', current_x, current_y))
+                
+        elif cmd_type == 'l':  # Relative lineto
+            for i in range(0, len(params), 2):
+                if i + 1 < len(params):
+                    current_x += params[i]
+                    current_y += params[i + 1]
+                    points.append(('line', current_x, current_y))
+                
+        elif cmd_type == 'H':  # Absolute horizontal lineto
+            for param in params:
+                current_x = param
+                points.append(('line', current_x, current_y))
+                
+        elif cmd_type == 'h':  # Relative horizontal lineto
+            for param in params:
+                current_x += param
+                points.append(('line', current_x, current_y))
+                
+        elif cmd_type == 'V':  # Absolute vertical lineto
+            for param in params:
+                current_y = param
+                points.append(('line', current_x, current_y))
+                
+        elif cmd_type == 'v':  # Relative vertical lineto
+            for param in params:
+                current_y += param
+                points.append(('line', current_x, current_y))
+        
+        elif cmd_type == 'C':  # Absolute cubic Bezier curve
+            # C x1 y1, x2 y2, x y - we'll just use the endpoint for now
+            for i in range(0, len(params), 6):
+                if i + 5 < len(params):
+                    current_x = params[i + 4]
+                    current_y = params[i + 5]
+                    points.append(('line', current_x, current_y))
+        
+        elif cmd_type == 'c':  # Relative cubic Bezier curve
+            for i in range(0, len(params), 6):
+                if i + 5 < len(params):
+                    current_x += params[i + 4]
+                    current_y += params[i + 5]
+                    points.append(('line', current_x, current_y))
+        
+        elif cmd_type == 'S':  # Absolute smooth cubic Bezier
+            for i in range(0, len(params), 4):
+                if i + 3 < len(params):
+                    current_x = params[i + 2]
+                    current_y = params[i + 3]
+                    points.append(('line', current_x, current_y))
+        
+        elif cmd_type == 's':  # Relative smooth cubic Bezier
+            for i in range(0, len(params), 4):
+                if i + 3 < len(params):
+                    current_x += params[i + 2]
+                    current_y += params[i + 3]
+                    points.append(('line', current_x, current_y))
+        
+        elif cmd_type == 'Q':  # Absolute quadratic Bezier
+            for i in range(0, len(params), 4):
+                if i + 3 < len(params):
+                    current_x = params[i + 2]
+                    current_y = params[i + 3]
+                    points.append(('line', current_x, current_y))
+        
+        elif cmd_type == 'q':  # Relative quadratic Bezier
+            for i in range(0, len(params), 4):
+                if i + 3 < len(params):
+                    current_x += params[i + 2]
+                    current_y += params[i + 3]
+                    points.append(('line', current_x, current_y))
+        
+        elif cmd_type == 'A' or cmd_type == 'a':  # Arc (simplified to just use endpoint)
+            # A rx ry x-axis-rotation large-arc-flag sweep-flag x y
+            for i in range(0, len(params), 7):
+                if i + 6 < len(params):
+                    if cmd_type == 'A':
+                        current_x = params[i + 5]
+                        current_y = params[i + 6]
+                    else:
+                        current_x += params[i + 5]
+                        current_y += params[i + 6]
+                    points.append(('line', current_x, current_y))
+                
+        elif cmd_type in ['Z', 'z']:  # Close path
+            if (current_x, current_y) != (path_start_x, path_start_y):
+                points.append(('line', path_start_x, path_start_y))
+    
+    return points
@@ -0,0 +1,309 @@
+"""
+Benchmark suite: times the main entry points of the pipeline on synthetic
+inputs (see svg_generators.py), stores the results as JSON and compares
+them with an earlier run.
+
+Cases, each on every document where it makes sense:
+
+    parse_svg_path/*            one path's d attribute to points
+    extract_paths_from_svg/*    a whole document to a PathSet (XML, tokenizer,
+                                transforms, flattening)
+    normalize_svg_coordinates/* scaling a PathSet to the print size
+    emit/G0_G1                  per-move G0/G1 calls of the writer
+    emit/moves_gcode            the same moves formatted in one batch
+    estimate/path_times         the print time of the same moves
+    convert/*                   convert_svg() end to end, as the command
+                                line runs it, into a temporary file
+
+Every case runs once to warm up, then --repeat times; a case faster than
+MIN_SAMPLE_TIME is looped within each of these runs to average out the
+clock and scheduler noise. The best time is used for comparisons as it is
+the least disturbed by other load. A case is flagged as a regression when
+its best time grew by more than --threshold over the baseline, and the exit
+status is then 1, so a CI job can fail on it. Compare runs of the same
+machine only. Only the standard library and NumPy are needed, nothing is
+downloaded.
+
+Run from the repository root:
+    python benchmarks/run_suite.py                          # writes benchmarks/results/<time>.json
+    python benchmarks/run_suite.py --baseline benchmarks/results/<earlier>.json
+    python benchmarks/run_suite.py --scale 0.1 --filter convert
+"""
+import argparse
+import datetime
+import io
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from svg_generators import curve_path_data, huge_path_data, scaled_documents
+from svg_to_gcode import convert_svg, extract_paths_from_svg, normalize_svg_coordinates, parse_svg_path
+from writer.estimate import path_times
+from writer.gcodewriter import default_writer
+
+SUITE_VERSION = 1  # bump when cases change so old results are not compared
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_REPEAT = 5
+MIN_SAMPLE_TIME = 0.2  # seconds; faster cases are looped to fill one sample
+DEFAULT_THRESHOLD = 0.2
+CONVERT_LAYERS = 20
+
+
+class Case:
+    """
+    One benchmark: a function that does the work once and returns the number
+    of items (points, moves) it handled.
+    """
+
+    def __init__(self, name, run, unit):
+        self.name = name
+        self.run = run
+        self.unit = unit
+
+    def measure(self, repeat):
+        # The warm-up run also tells how many runs fill one sample
+        start = time.perf_counter()
+        items = self.run()
+        loops = max(1, math.ceil(MIN_SAMPLE_TIME / max(time.perf_counter() - start, 1e-9)))
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                self.run()
+            times.append((time.perf_counter() - start) / loops)
+        best = min(times)
+        return {
+            "best": best,
+            "median": statistics.median(times),
+            "runs": times,
+            "loops": loops,
+            "items": items,
+            "unit": self.unit,
+            "throughput": items / best if best > 0 else None,
+        }
+
+
+def _emit_moves(count, seed=0):
+    """
+    A plotted outline of count moves with a travel move every 50.
+    """
+    rng = np.random.default_rng(seed)
+    angle = np.cumsum(rng.normal(0, 0.2, count))
+    coords = 100 + np.cumsum(np.column_stack([np.cos(angle), np.sin(angle)]) * 0.3, axis=0) % 80
+    extrude = np.ones(count, dtype=bool)
+    extrude[::50] = False
+    return coords, extrude
+
+
+def build_cases(scale, workdir):
+    """
+    Returns every Case of the suite at a given input scale.
+
+    Args:
+        scale (float): See svg_generators.scaled_documents.
+        workdir (str): Directory for the input and output files.
+
+    Returns:
+        list: The cases, in the order they run.
+    """
+    size = lambda count: max(1, int(count * scale))
+    documents = scaled_documents(scale)
+    writer = default_writer()
+    cases = []
+
+    huge_data = huge_path_data(size(20000))
+    curve_data = [curve_path_data(24, seed) for seed in range(size(300))]
+    cases.append(Case("parse_svg_path/huge_path",
+                      lambda: parse_svg_path(huge_data).point_count, "points"))
+    cases.append(Case("parse_svg_path/curve_paths",
+                      lambda: sum(parse_svg_path(data).point_count for data in curve_data), "points"))
+
+    for name, data in documents.items():
+        cases.append(Case(f"extract_paths_from_svg/{name}",
+                          lambda data=data: extract_paths_from_svg(io.BytesIO(data)).point_count,
+                          "points"))
+
+    for name in ("many_small_paths", "huge_paths"):
+        paths = extract_paths_from_svg(io.BytesIO(documents[name]))
+        cases.append(Case(f"normalize_svg_coordinates/{name}",
+                          lambda paths=paths: normalize_svg_coordinates(paths).point_count, "points"))
+
+    coords, extrude = _emit_moves(size(100000))
+    points = coords.tolist()
+    travel = (~extrude).tolist()
+
+    def emit_g0_g1():
+        parts = []
+        prev_x, prev_y = points[0]
+        for (x, y), is_travel in zip(points, travel):
+            parts.append(writer.G0(x, y) if is_travel else writer.G1(x, y, prev_x, prev_y))
+            prev_x, prev_y = x, y
+        "".join(parts)
+        return len(points)
+
+    def emit_batch():
+        _, e = writer.segment_extrusion(coords, extrude, coords[0, 0], coords[0, 1])
+        writer.moves_gcode(coords, e, extrude)
+        return len(coords)
+
+    cases.append(Case("emit/G0_G1", emit_g0_g1, "moves"))
+    def estimate():
+        lengths, _ = writer.segment_extrusion(coords, extrude, coords[0, 0], coords[0, 1])
+        speeds = np.where(extrude, writer.g1_speed / 60, writer.g0_speed / 60)
+        path_times(coords, lengths, speeds, writer.acceleration, writer.jerk,
+                   coords[0, 0], coords[0, 1])
+        return len(coords)
+
+    cases.append(Case("emit/moves_gcode", emit_batch, "moves"))
+    cases.append(Case("estimate/path_times", estimate, "moves"))
+
+    for name, data in documents.items():
+        svg_file = os.path.join(workdir, name + ".svg")
+        with open(svg_file, "wb") as file:
+            file.write(data)
+        output_file = os.path.join(workdir, name + ".gcode")
+        cases.append(Case(f"convert/{name}",
+                          lambda svg_file=svg_file, output_file=output_file: convert_svg(
+                              svg_file, output_file, layer_num=CONVERT_LAYERS)["points"],
+                          "points"))
+    return cases
+
+
+def environment():
+    """
+    Returns what a result depends on besides the code: versions, machine
+    and the git commit when there is one.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns case name -> (relative change of the best time, flag) for the
+    cases found in both runs; the flag is 'REGRESSION', 'faster' or ''.
+    """
+    changes = {}
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None or not before["best"]:
+            continue
+        change = result["best"] / before["best"] - 1
+        flag = "REGRESSION" if change > threshold else "faster" if change < -threshold else ""
+        changes[name] = (change, flag)
+    return changes
+
+
+def _format_rate(rate, unit):
+    if rate is None:
+        return ""
+    for scale, prefix in ((1e6, "M"), (1e3, "k"), (1, "")):
+        if rate >= scale:
+            break
+    return f"{rate / scale:.1f}{prefix} {unit}/s"
+
+
+def print_table(results, changes):
+    width = max(len("Case"), *(len(name) for name in results))
+    print(f"{'Case':<{width}}  {'Best s':>8}  {'Median s':>8}  {'Items':>9}  {'Throughput':>18}"
+          + ("  vs baseline" if changes is not None else ""))
+    for name, result in results.items():
+        line = (f"{name:<{width}}  {result['best']:>8.4f}  {result['median']:>8.4f}  "
+                f"{result['items']:>9}  {_format_rate(result['throughput'], result['unit']):>18}")
+        if changes is not None:
+            if name in changes:
+                change, flag = changes[name]
+                line += f"  {change:>+7.1%} {flag}"
+            else:
+                line += "  (new)"
+        print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiplies the size of every input (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="timed runs per case after a warm-up run (default: %(default)s)")
+    parser.add_argument("--filter", default="",
+                        help="only run the cases whose name contains this text")
+    parser.add_argument("-o", "--output",
+                        help="JSON file for the results (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--baseline",
+                        help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown of the best time flagged as a regression "
+                             "(default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger("svg_to_gcode").setLevel(logging.WARNING)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if (baseline.get("suite_version"), baseline.get("scale")) != (SUITE_VERSION, args.scale):
+            print(f"{args.baseline} was run with another suite version or scale, not comparable")
+            return 2
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for case in build_cases(args.scale, workdir):
+            if args.filter in case.name:
+                results[case.name] = case.measure(args.repeat)
+                print(f"  {case.name}: {results[case.name]['best']:.4f} s", file=sys.stderr)
+
+    changes = None if baseline is None else compare(results, baseline, args.threshold)
+    print_table(results, changes)
+
+    output = args.output or os.path.join(RESULTS_DIR, started.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump({
+            "suite_version": SUITE_VERSION,
+            "created": started.isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "environment": environment(),
+            "results": results,
+        }, file, indent=2)
+    print(f"Results written to {output}")
+
+    regressions = [name for name, (_, flag) in (changes or {}).items() if flag == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
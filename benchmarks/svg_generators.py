@@ -0,0 +1,141 @@
+"""
+Synthetic SVG documents for the benchmarks
+
+Every generator is seeded, so the same arguments always give the same bytes,
+and sized by a count so a suite can scale its inputs. The shapes cover the
+cases that stress different parts of the pipeline:
+
+    many_small_paths  thousands of short paths (per-path overhead, ordering)
+    huge_paths        a few paths with tens of thousands of segments
+                      (tokenizer and flattening throughput)
+    curve_heavy       only curves and arcs (C, S, Q, T, A), in relative and
+                      absolute form (curve flattening, arc fitting)
+    nested_groups     shapes deep inside transformed groups (transform
+                      stack, basic shape conversion)
+"""
+import random
+
+SVG_OPEN = ('<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="200mm" '
+            'viewBox="0 0 1000 1000">')
+SVG_CLOSE = '</svg>'
+
+
+def _document(parts):
+    return "\n".join([SVG_OPEN, *parts, SVG_CLOSE]).encode("utf-8")
+
+
+def _coordinate(rng, low=0.0, high=1000.0):
+    return f"{rng.uniform(low, high):.2f}"
+
+
+def many_small_paths(count, seed=0):
+    """
+    Returns an SVG of count closed paths of four short lines each.
+    """
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(count):
+        steps = " ".join(f"l{rng.uniform(-8, 8):.2f} {rng.uniform(-8, 8):.2f}" for _ in range(4))
+        parts.append(f'<path d="M{_coordinate(rng)} {_coordinate(rng)} {steps}z"/>')
+    return _document(parts)
+
+
+def huge_path_data(segments, seed=0):
+    """
+    Returns the d attribute of one path of segments relative lines and
+    cubic curves (one in four) wandering over the view box.
+    """
+    rng = random.Random(seed)
+    commands = [f"M{_coordinate(rng)} {_coordinate(rng)}"]
+    for i in range(segments):
+        if i % 4 == 3:
+            commands.append(f"c{rng.uniform(-5, 5):.2f} {rng.uniform(-5, 5):.2f} "
+                            f"{rng.uniform(-5, 5):.2f} {rng.uniform(-5, 5):.2f} "
+                            f"{rng.uniform(-5, 5):.2f} {rng.uniform(-5, 5):.2f}")
+        else:
+            commands.append(f"l{rng.uniform(-5, 5):.2f} {rng.uniform(-5, 5):.2f}")
+    return " ".join(commands)
+
+
+def huge_paths(count, segments, seed=0):
+    """
+    Returns an SVG of count paths of segments segments each.
+    """
+    return _document([f'<path d="{huge_path_data(segments, seed + i)}"/>' for i in range(count)])
+
+
+def curve_path_data(curves, seed=0):
+    """
+    Returns the d attribute of a closed path of curves curve commands,
+    cycling through C, S, Q, T and A in relative and absolute form.
+    """
+    rng = random.Random(seed)
+    x, y = rng.uniform(100, 900), rng.uniform(100, 900)
+    commands = [f"M{x:.2f} {y:.2f}"]
+    d = lambda: f"{rng.uniform(-20, 20):.2f}"  # a relative offset
+    for i in range(curves):
+        kind = i % 6
+        if kind == 0:
+            commands.append(f"c{d()} {d()} {d()} {d()} {d()} {d()}")
+        elif kind == 1:
+            commands.append(f"s{d()} {d()} {d()} {d()}")
+        elif kind == 2:
+            commands.append(f"q{d()} {d()} {d()} {d()}")
+        elif kind == 3:
+            commands.append(f"t{d()} {d()}")
+        elif kind == 4:
+            commands.append(f"a{rng.uniform(5, 30):.2f} {rng.uniform(5, 30):.2f} "
+                            f"{rng.uniform(0, 90):.1f} {rng.randint(0, 1)} {rng.randint(0, 1)} "
+                            f"{d()} {d()}")
+        else:
+            x, y = rng.uniform(100, 900), rng.uniform(100, 900)
+            commands.append(f"C{x + 10:.2f} {y - 10:.2f} {x - 10:.2f} {y + 10:.2f} "
+                            f"{x:.2f} {y:.2f}")
+    return " ".join(commands) + "z"
+
+
+def curve_heavy(count, curves=24, seed=0):
+    """
+    Returns an SVG of count paths of curves curve commands each.
+    """
+    return _document([f'<path d="{curve_path_data(curves, seed + i)}"/>' for i in range(count)])
+
+
+def nested_groups(count, depth=30, seed=0):
+    """
+    Returns an SVG of count circles, rects and paths inside depth nested
+    groups that each rotate, translate and scale.
+    """
+    rng = random.Random(seed)
+    parts = ['<g transform="rotate(1) translate(1 2) scale(1.01)">'] * depth
+    for i in range(count):
+        x, y = rng.uniform(0, 900), rng.uniform(0, 900)
+        if i % 3 == 0:
+            parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3"/>')
+        elif i % 3 == 1:
+            parts.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="8" height="4" rx="1" '
+                         f'transform="skewX(10)"/>')
+        else:
+            parts.append(f'<path d="M{x:.1f} {y:.1f}c1 2 3 4 5 6s3 4 5 6q2 2 4 0t4 0z"/>')
+    parts += ['</g>'] * depth
+    return _document(parts)
+
+
+def scaled_documents(scale=1.0):
+    """
+    Returns the benchmark documents at a given scale.
+
+    Args:
+        scale (float): Multiplies the path and shape counts of every
+            document; 1.0 takes seconds per case on a laptop.
+
+    Returns:
+        dict: Document name -> SVG bytes.
+    """
+    size = lambda count: max(1, int(count * scale))
+    return {
+        "many_small_paths": many_small_paths(size(2000)),
+        "huge_paths": huge_paths(4, size(10000)),
+        "curve_heavy": curve_heavy(size(300)),
+        "nested_groups": nested_groups(size(2000)),
+    }
@@ -0,0 +1,535 @@
+"""
+Local SVG to G-code conversion service
+
+A long-running process that keeps the printer profiles, the start/end G-code
+and a pool of warm worker processes in memory, so a conversion costs the
+conversion itself rather than an interpreter start, imports and file reads.
+
+    python gcode_service.py [--port 8765 | --unix /tmp/svg_to_gcode.sock]
+
+HTTP/1.1, one request per connection:
+
+    POST /convert?layers=20&size=60&profile=default
+        The body is the SVG file. The G-code is streamed back with chunked
+        transfer encoding while it is generated. The query parameters are
+        those of convert_svg(): layers, size ('none' keeps the SVG size),
+        start_x, start_y, layer_height, tolerance, simplify_tolerance,
+        arc_tolerance, optimize_travel (0 or 1), infill_density, infill_angle,
+        walls, walls_outside (0 or 1), wall_join, bounds, copies, spacing,
+        compress_level, plus the printer profile and format ('gcode', or 'gz'
+        to stream a .gcode.gz file). A job that doesn't fit on the bed of its profile is answered
+        with 422 and the report before any G-code is generated. With copies
+        above 1 the copies are placed on the bed and bounds doesn't apply; a
+        plate that doesn't fit is answered with 422 as well.
+
+    GET /metrics
+        JSON with the queue depth, running and finished jobs, and latency
+        percentiles (queue wait, time to first byte, total) in ms.
+
+The geometry of a job (parsing, flattening, simplification, arc fitting,
+infill, walls and travel ordering) runs in the process pool, at most one job per worker; jobs
+beyond that wait in the queue. The G-code is then generated in a thread next
+to the event loop and written to the socket as it comes, so a slow client
+holds back the generator instead of filling memory.
+"""
+import argparse
+import asyncio
+import collections
+import contextlib
+import functools
+import io
+import json
+import os
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from geometry.arcfit import DEFAULT_ARC_TOLERANCE
+from geometry.bounds import BOUNDS_MODES
+from geometry.cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, GeometryCache
+from geometry.flatten import DEFAULT_TOLERANCE
+from geometry.infill import DEFAULT_INFILL_ANGLE
+from geometry.simplify import DEFAULT_SIMPLIFY_TOLERANCE
+from geometry.tiling import DEFAULT_SPACING
+from geometry.walls import JOINS
+from svg_to_gcode import END_GCODE_FILE, START_GCODE_FILE, iter_gcode, place_copies, plan_paths
+from writer.gcodewriter import CONFIG_FILE, GcodeWriter
+from writer.package import DEFAULT_COMPRESS_LEVEL, open_output
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_PROFILE = "default"
+MAX_UPLOAD_SIZE = 64 * 1024 * 1024  # bytes
+STREAM_CHUNK_SIZE = 64 * 1024  # bytes of G-code per socket write
+REQUEST_TIMEOUT = 30.0  # seconds to receive a request
+LATENCY_WINDOW = 1000  # most recent jobs in the latency percentiles
+
+# Query parameters of /convert: name -> (plan_paths/iter_gcode argument, parser)
+JOB_PARAMETERS = {
+    "layers": ("layer_num", int),
+    "size": ("size", lambda text: None if text.lower() == "none" else float(text)),
+    "start_x": ("start_x", float),
+    "start_y": ("start_y", float),
+    "layer_height": ("layer_height", float),
+    "tolerance": ("tolerance", float),
+    "simplify_tolerance": ("simplify_tolerance", float),
+    "arc_tolerance": ("arc_tolerance", float),
+    "optimize_travel": ("optimize_travel", lambda text: text.lower() not in ("0", "false", "no")),
+    "infill_density": ("infill_density", float),
+    "infill_angle": ("infill_angle", float),
+    "walls": ("walls", int),
+    "walls_outside": ("walls_outside", lambda text: text.lower() not in ("0", "false", "no")),
+    "wall_join": ("wall_join", str),
+    "bounds": ("bounds", str),
+    "copies": ("copies", int),
+    "spacing": ("spacing", float),
+    "format": ("output_format", str),
+    "compress_level": ("compress_level", int),
+}
+# The .gcode.3mf package needs the estimate and thumbnail of the whole job
+# first; it is written by the command line only
+SERVICE_FORMATS = {"gcode": "text/plain; charset=utf-8", "gz": "application/gzip"}
+
+DEFAULT_JOB = {
+    "layer_num": 20,
+    "size": 60,
+    "start_x": 40,
+    "start_y": 40,
+    "layer_height": 0.2,
+    "tolerance": DEFAULT_TOLERANCE,
+    "simplify_tolerance": DEFAULT_SIMPLIFY_TOLERANCE,
+    "arc_tolerance": DEFAULT_ARC_TOLERANCE,
+    "optimize_travel": True,
+    "infill_density": 0.0,
+    "infill_angle": DEFAULT_INFILL_ANGLE,
+    "walls": 1,
+    "walls_outside": False,
+    "wall_join": "miter",
+    "bounds": "error",
+    "copies": 1,
+    "spacing": DEFAULT_SPACING,
+    "output_format": "gcode",
+    "compress_level": DEFAULT_COMPRESS_LEVEL,
+}
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+            500: "Internal Server Error"}
+
+_WARM_UP_SVG = b'<svg xmlns="http://www.w3.org/2000/svg"><circle cx="5" cy="5" r="4"/></svg>'
+
+
+class HttpError(Exception):
+    """
+    An error answered with an HTTP status and a plain-text message.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_job(query):
+    """
+    Returns the job parameters of a /convert query string.
+
+    Args:
+        query (str): e.g. 'layers=10&size=none'.
+
+    Returns:
+        tuple: (params, profile) where params holds every DEFAULT_JOB key.
+    """
+    params = dict(DEFAULT_JOB)
+    profile = DEFAULT_PROFILE
+    for name, value in urllib.parse.parse_qsl(query, keep_blank_values=True):
+        if name == "profile":
+            profile = value
+            continue
+        if name not in JOB_PARAMETERS:
+            raise HttpError(400, f"unknown parameter {name!r}")
+        argument, parse = JOB_PARAMETERS[name]
+        try:
+            params[argument] = parse(value)
+        except ValueError:
+            raise HttpError(400, f"bad value {value!r} for {name}") from None
+    if params["layer_num"] < 1 or params["layer_height"] <= 0:
+        raise HttpError(400, "layers and layer_height must be positive")
+    if not 0 <= params["infill_density"] <= 1:
+        raise HttpError(400, "infill_density must be between 0 and 1")
+    if params["walls"] < 1:
+        raise HttpError(400, "walls must be at least 1")
+    if params["wall_join"] not in JOINS:
+        raise HttpError(400, f"wall_join must be one of {', '.join(JOINS)}")
+    if params["copies"] < 1:
+        raise HttpError(400, "copies must be at least 1")
+    if params["bounds"] not in BOUNDS_MODES:
+        raise HttpError(400, f"bounds must be one of {', '.join(BOUNDS_MODES)}")
+    if params["output_format"] not in SERVICE_FORMATS:
+        raise HttpError(400, f"format must be one of {', '.join(SERVICE_FORMATS)}")
+    if not 1 <= params["compress_level"] <= 9:
+        raise HttpError(400, "compress_level must be between 1 and 9")
+    return params, profile
+
+
+def _plan_job(svg_data, params, cache, writer):
+    """
+    Runs plan_paths on an uploaded SVG in a worker process. Its progress is
+    logged at INFO level, below the default WARNING, so it is not shown.
+    With copies above 1 the SVG is planned at the origin and its copies are
+    placed on the bed (see place_copies()).
+    Returns the result of plan_paths and the objects of the plate, or None.
+    """
+    plate = params["copies"] > 1
+    planned = plan_paths(io.BytesIO(svg_data), params["size"],
+                         0 if plate else params["start_x"], 0 if plate else params["start_y"],
+                         params["layer_height"], params["tolerance"], params["simplify_tolerance"],
+                         params["arc_tolerance"], params["optimize_travel"], cache=cache,
+                         writer=writer, infill_density=params["infill_density"],
+                         infill_angle=params["infill_angle"], walls=params["walls"],
+                         walls_outside=params["walls_outside"], wall_join=params["wall_join"],
+                         bounds="off" if plate else params["bounds"])
+    objects = None
+    if plate:
+        objects = place_copies([planned[:2]], params["copies"], params["spacing"], writer)
+    return planned, objects
+
+
+def _next_chunk(chunks, size=STREAM_CHUNK_SIZE):
+    """
+    Returns the next size bytes or so of a G-code generator, b'' at the end.
+    """
+    parts = []
+    total = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+        parts.append(data)
+        total += len(data)
+        if total >= size:
+            break
+    return b"".join(parts)
+
+
+class _Pending:
+    """
+    Write-only file that holds the compressed output until it is taken.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _next_packed(chunks, sink, pending):
+    """
+    Returns the next compressed bytes of a G-code generator, b'' at the end.
+    The G-code goes through sink, which writes to pending, and sink is
+    closed at the end of the G-code.
+    """
+    while True:
+        data = _next_chunk(chunks)
+        if data:
+            sink.write(data)
+        else:
+            sink.close()
+        packed = pending.take()
+        if packed or not data:
+            return packed
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 2)
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": pick(1.0)}
+
+
+class ConversionService:
+    """
+    Serves conversions from warm worker processes.
+
+    Args:
+        profiles (dict): Printer profile name -> GcodeWriter.
+        workers (int): Number of worker processes, also the number of jobs
+            whose geometry is prepared at the same time.
+        cache (GeometryCache): Shared geometry cache, or None.
+        start_file (str): The start G-code, read once.
+        end_file (str): The end G-code, read once.
+    """
+
+    def __init__(self, profiles, workers, cache=None,
+                 start_file=START_GCODE_FILE, end_file=END_GCODE_FILE):
+        self.profiles = profiles
+        self.workers = workers
+        self.cache = cache
+        with open(start_file, encoding="utf-8") as file:
+            self.start_gcode = file.read()
+        with open(end_file, encoding="utf-8") as file:
+            self.end_gcode = file.read()
+        self.pool = None
+        self.threads = None
+        self.slots = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        # The workers use pickled copies of the cache, so its own counters
+        # stay at zero here; the outcome of every job is counted instead
+        self.cache_outcomes = collections.Counter()
+        self.latency = collections.deque(maxlen=LATENCY_WINDOW)
+        self.wait = collections.deque(maxlen=LATENCY_WINDOW)
+        self.first_byte = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def start(self):
+        """
+        Starts the worker processes and has each one import everything and
+        run a tiny conversion, so the first real job finds them warm.
+        """
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Workers are started on demand, one per job that finds none idle
+        warm_up = [self.pool.submit(_plan_job, _WARM_UP_SVG, DEFAULT_JOB, None, None)
+                   for _ in range(self.workers)]
+        for future in warm_up:
+            future.result()
+        self.threads = ThreadPoolExecutor(max_workers=self.workers)
+        self.slots = asyncio.Semaphore(self.workers)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        if self.threads is not None:
+            self.threads.shutdown(cancel_futures=True)
+
+    def metrics(self):
+        """
+        Returns the queue and latency metrics as a JSON-serializable dict.
+        """
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cache": None if self.cache is None else {"hits": self.cache_outcomes["hit"],
+                                                       "misses": self.cache_outcomes["miss"]},
+            "latency_ms": _percentiles(self.latency),
+            "queue_wait_ms": _percentiles(self.wait),
+            "first_byte_ms": _percentiles(self.first_byte),
+        }
+
+    async def handle(self, reader, writer):
+        """
+        Serves one connection.
+        """
+        received = time.perf_counter()
+        try:
+            try:
+                method, target, body = await asyncio.wait_for(_read_request(reader), REQUEST_TIMEOUT)
+                path, _, query = target.partition("?")
+                if path == "/metrics":
+                    if method != "GET":
+                        raise HttpError(405, "use GET")
+                    await _respond(writer, 200, json.dumps(self.metrics()), "application/json")
+                elif path == "/convert":
+                    if method != "POST":
+                        raise HttpError(405, "use POST with the SVG as the body")
+                    await self.convert(query, body, writer, received)
+                else:
+                    raise HttpError(404, f"no such endpoint {path}")
+            except HttpError as error:
+                await _respond(writer, error.status, str(error) + "\n")
+            except asyncio.TimeoutError:
+                await _respond(writer, 400, "request timed out\n")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def convert(self, query, svg_data, writer, received):
+        """
+        Converts one uploaded SVG and streams the G-code back.
+        """
+        params, profile = parse_job(query)
+        if profile not in self.profiles:
+            raise HttpError(400, f"unknown profile {profile!r}, known: {', '.join(sorted(self.profiles))}")
+        loop = asyncio.get_running_loop()
+        self.queued += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        started = time.perf_counter()
+        streaming = False
+        try:
+            try:
+                planned, objects = await loop.run_in_executor(
+                    self.pool, _plan_job, svg_data, params, self.cache, self.profiles[profile])
+            except Exception as error:
+                raise HttpError(422, f"{type(error).__name__}: {error}") from None
+            svg_paths, infill, point_count, cache_outcome = planned
+            if cache_outcome is not None:
+                self.cache_outcomes[cache_outcome] += 1
+            chunks = iter_gcode(svg_paths, params["layer_num"], params["layer_height"],
+                                params["start_x"], params["start_y"], writer=self.profiles[profile],
+                                infill=infill, objects=objects,
+                                start_gcode=self.start_gcode, end_gcode=self.end_gcode)
+            next_data = functools.partial(_next_chunk, chunks)
+            if params["output_format"] != "gcode":
+                pending = _Pending()
+                sink = open_output(pending, params["output_format"], params["compress_level"])
+                next_data = functools.partial(_next_packed, chunks, sink, pending)
+            streaming = True
+            writer.write(_head(200, SERVICE_FORMATS[params["output_format"]], {
+                "Transfer-Encoding": "chunked",
+                "X-Paths": str(len(svg_paths) * params["copies"]),
+                "X-Points": str(point_count),
+                "X-Moves": str(svg_paths.point_count * params["copies"]),
+            }))
+            first = True
+            while True:
+                data = await loop.run_in_executor(self.threads, next_data)
+                if not data:
+                    break
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+                if first:
+                    self.first_byte.append(time.perf_counter() - received)
+                    first = False
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except (HttpError, ConnectionError):
+            self.failed += 1
+            raise
+        except Exception as error:
+            self.failed += 1
+            if not streaming:
+                raise HttpError(500, f"{type(error).__name__}: {error}") from None
+            # The headers are out, so the response is cut short instead; the
+            # missing last chunk tells the client it is incomplete
+            writer.transport.abort()
+            return
+        else:
+            self.completed += 1
+            self.wait.append(started - received)
+            self.latency.append(time.perf_counter() - received)
+        finally:
+            self.running -= 1
+            self.slots.release()
+
+
+async def _read_request(reader):
+    """
+    Reads the request line, headers and body of one HTTP request.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "malformed request line") from None
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if method != "POST":
+        return method, target, b""
+    if "content-length" not in headers:
+        raise HttpError(411, "Content-Length is required")
+    try:
+        length = int(headers["content-length"])
+    except ValueError:
+        raise HttpError(400, "bad Content-Length") from None
+    if length > MAX_UPLOAD_SIZE:
+        raise HttpError(413, f"uploads are limited to {MAX_UPLOAD_SIZE} bytes")
+    return method, target, await reader.readexactly(length)
+
+
+def _head(status, content_type, headers=None):
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+             "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _respond(writer, status, text, content_type="text/plain; charset=utf-8"):
+    body = text.encode("utf-8")
+    writer.write(_head(status, content_type, {"Content-Length": str(len(body))}) + body)
+    await writer.drain()
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line of the service.
+    """
+    parser = argparse.ArgumentParser(description="Serve SVG to G-code conversions over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="TCP port, 0 picks a free one (default: %(default)s)")
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: one per core)")
+    parser.add_argument("--profile", action="append", default=[], metavar="NAME=CONFIG",
+                        help="printer profile, may be repeated; 'default' is config/config.json "
+                             "unless given")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="directory of the parsed geometry cache (default: %(default)s)")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_CACHE_SIZE / 1024**2,
+                        help="size limit of the geometry cache in MB (default: %(default)s)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="always parse the uploaded SVG files")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    profiles = {DEFAULT_PROFILE: CONFIG_FILE}
+    for entry in args.profile:
+        name, sep, path = entry.partition("=")
+        if not sep or not name or not path:
+            parser.error(f"--profile takes NAME=CONFIG, got {entry!r}")
+        profiles[name] = path
+    args.profiles = profiles
+    return args
+
+
+async def serve(args):
+    profiles = {name: GcodeWriter(path) for name, path in args.profiles.items()}
+    cache = GeometryCache(args.cache_dir, int(args.cache_size * 1024**2)) if args.cache else None
+    service = ConversionService(profiles, args.jobs, cache)
+    service.start()
+    try:
+        if args.unix:
+            server = await asyncio.start_unix_server(service.handle, path=args.unix)
+            where = args.unix
+        else:
+            server = await asyncio.start_server(service.handle, args.host, args.port)
+            host, port = server.sockets[0].getsockname()[:2]
+            where = f"http://{host}:{port}"
+        print(f"Serving on {where} with {args.jobs} workers, profiles: {', '.join(sorted(profiles))}",
+              flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
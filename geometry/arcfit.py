@@ -0,0 +1,186 @@
+"""
+Fits circular arcs to runs of flattened points
+
+Flattened curves turn into dozens of tiny line moves. Runs of points that lie
+within a tolerance of one circle are replaced by a single arc move (G2/G3),
+which keeps the file small and lets the firmware plan one smooth motion.
+
+A run is accepted when every point lies within tolerance of the circle
+through its first, middle and last point, the run turns the same way at
+every point, turns less than a full circle, and no arc bulges further away
+from the chords it replaces than the flattening tolerance the points were
+made with plus tolerance (so polygons aren't rounded off).
+Runs are grown greedily from each start point: doubling the length while
+the fit holds, then bisecting back to the longest fitting run.
+"""
+import math
+
+import numpy as np
+
+from geometry.pathset import PathSet, LINE, ARC_CW, ARC_CCW
+from geometry.flatten import DEFAULT_TOLERANCE
+
+DEFAULT_ARC_TOLERANCE = 0.02  # mm
+MIN_ARC_POINTS = 4  # start point and at least three line moves
+MAX_ARC_RADIUS = 1000.0  # mm, flatter runs stay lines
+
+
+def circle_through(a, b, c):
+    """
+    Returns the circle through three points.
+
+    Args:
+        a (np.ndarray): The first point.
+        b (np.ndarray): The second point.
+        c (np.ndarray): The third point.
+
+    Returns:
+        tuple: (center, radius), or None if the points are collinear.
+    """
+    bx, by = b - a
+    cx, cy = c - a
+    d = 2 * (bx * cy - by * cx)
+    if d == 0:
+        return None
+    b2 = bx * bx + by * by
+    c2 = cx * cx + cy * cy
+    ux = (cy * b2 - by * c2) / d
+    uy = (bx * c2 - cx * b2) / d
+    return np.array((a[0] + ux, a[1] + uy)), math.hypot(ux, uy)
+
+
+def fit_arc(points, tolerance=DEFAULT_ARC_TOLERANCE, max_radius=MAX_ARC_RADIUS,
+            chord_tolerance=DEFAULT_TOLERANCE):
+    """
+    Checks whether a run of points can be drawn as one arc.
+
+    Args:
+        points (np.ndarray): (n, 2) points, the first one is where the arc
+            starts and the last one where it ends.
+        tolerance (float): The maximum distance between the arc and the
+            points it replaces.
+        max_radius (float): Runs on a larger circle are not arcs.
+        chord_tolerance (float): How far the chords may be from the curve
+            they were flattened from; the arc may bulge this much (plus
+            tolerance) past them.
+
+    Returns:
+        tuple: (center, clockwise), or None if the points don't fit an arc.
+    """
+    circle = circle_through(points[0], points[len(points) // 2], points[-1])
+    if circle is None:
+        return None
+    center, radius = circle
+    if radius > max_radius:
+        return None
+    rel = points - center
+    if np.max(np.abs(np.hypot(rel[:, 0], rel[:, 1]) - radius)) > tolerance:
+        return None
+    cross = rel[:-1, 0] * rel[1:, 1] - rel[:-1, 1] * rel[1:, 0]
+    dot = rel[:-1, 0] * rel[1:, 0] + rel[:-1, 1] * rel[1:, 1]
+    steps = np.arctan2(cross, dot)
+    clockwise = steps[0] < 0
+    if np.any(steps >= 0) if clockwise else np.any(steps <= 0):
+        return None
+    if abs(steps.sum()) >= 2 * math.pi:
+        return None
+    # How far the arc bulges out from each chord it replaces
+    if radius * (1 - math.cos(float(np.max(np.abs(steps))) / 2)) > tolerance + chord_tolerance:
+        return None
+    return center, bool(clockwise)
+
+
+def _candidate_starts(coords, fits_line, min_points):
+    """
+    Returns the start points whose first min_points points turn the same way,
+    a cheap necessary condition checked for all points at once.
+    """
+    count = len(coords)
+    delta = np.diff(coords, axis=0)
+    turn = np.zeros(count, dtype=np.int8)
+    turn[1:-1] = np.sign(delta[:-1, 0] * delta[1:, 1] - delta[:-1, 1] * delta[1:, 0])
+    ok = np.ones(count, dtype=bool)
+    span = min_points - 1
+    ok[count - span:] = False
+    for k in range(1, span + 1):
+        ok[:count - k] &= fits_line[k:]
+    for k in range(1, span):
+        ok[:count - k] &= turn[k:] != 0
+        if k > 1:
+            ok[:count - k] &= turn[k:] == turn[1:count - k + 1]
+    return np.flatnonzero(ok)
+
+
+def fit_arcs(paths, tolerance=DEFAULT_ARC_TOLERANCE, max_radius=MAX_ARC_RADIUS,
+             min_points=MIN_ARC_POINTS, chord_tolerance=DEFAULT_TOLERANCE):
+    """
+    Replaces runs of line moves that lie on a circle by arc moves.
+
+    Args:
+        paths (PathSet): The flattened paths.
+        tolerance (float): The maximum distance between an arc and the
+            points it replaces, in the units of the paths.
+        max_radius (float): Runs on a larger circle stay lines.
+        min_points (int): The fewest points (including the start point)
+            replaced by one arc.
+        chord_tolerance (float): The tolerance the paths were flattened with.
+
+    Returns:
+        PathSet: The paths with ARC_CW/ARC_CCW moves and their centers.
+    """
+    coords = paths.coords
+    count = len(coords)
+    codes = paths.codes.copy()
+    centers = (np.full((count, 2), np.nan) if paths.centers is None
+               else paths.centers.copy())
+    # A point can end a line of an arc if it is a line within its path
+    fits_line = codes == LINE
+    fits_line[paths.offsets[:-1][paths.offsets[:-1] < count]] = False
+    # Last index of the line run each point belongs to
+    run_last = np.arange(count)
+    if count:
+        breaks = np.flatnonzero(~fits_line) - 1
+        breaks = np.append(breaks[breaks >= 0], count - 1)
+        run_last = breaks[np.searchsorted(breaks, np.arange(count))]
+
+    keep = np.ones(count, dtype=bool)
+    candidates = (_candidate_starts(coords, fits_line, min_points) if count >= min_points
+                  else np.empty(0, dtype=np.int64))
+    position = 0
+    while position < len(candidates):
+        start = int(candidates[position])
+        last = int(run_last[start + 1])
+        end = start + min_points - 1
+        fit = fit_arc(coords[start:end + 1], tolerance, max_radius, chord_tolerance)
+        if fit is None:
+            position += 1
+            continue
+        # Grow the arc: double while it fits, then bisect
+        good = end
+        bad = last + 1
+        step = min_points
+        while good < last:
+            end = min(good + step, last)
+            attempt = fit_arc(coords[start:end + 1], tolerance, max_radius, chord_tolerance)
+            if attempt is None:
+                bad = end
+                break
+            good, fit = end, attempt
+            step *= 2
+        while bad - good > 1:
+            end = (good + bad) // 2
+            attempt = fit_arc(coords[start:end + 1], tolerance, max_radius, chord_tolerance)
+            if attempt is None:
+                bad = end
+            else:
+                good, fit = end, attempt
+        center, clockwise = fit
+        keep[start + 1:good] = False
+        codes[good] = ARC_CW if clockwise else ARC_CCW
+        centers[good] = center
+        # The next arc may start where this one ends
+        position = np.searchsorted(candidates, good)
+
+    kept = np.zeros(count + 1, dtype=np.int64)
+    kept[1:] = np.cumsum(keep)
+    return PathSet(coords[keep], codes[keep], kept[paths.offsets], centers[keep])
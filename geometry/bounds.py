@@ -0,0 +1,394 @@
+"""
+Bed bounds: checking a job against the printable area and clipping it
+
+The printable area is the rectangle X_MIN..X_MAX, Y_MIN..Y_MAX of the config,
+in machine coordinates (the path coordinates plus the start offset and the
+X_OFFSET/Y_OFFSET of the printer). A job is checked against it before any
+G-code is formatted:
+
+- check_placement() needs no geometry at all. A normalized drawing starts at
+  the origin and is size mm wide or high, so a start offset off the bed, or a
+  size that fits neither side, is rejected before the SVG is even parsed.
+- check_bed() takes the extents of the whole job from its coordinate arrays,
+  with the points where arcs sweep past their end points, and only when they
+  don't fit counts the moves that leave the bed, for the report. A drawing
+  is scaled to its size by its points, and the arcs fitted to them can bulge
+  a little further, so the check allows a slack of the fitting tolerances.
+
+clip_to_bed() cuts every drawn segment to the bed in one batch (Liang-Barsky
+on the segment parameters), exactly where it crosses an edge. Arcs that
+cross an edge are split into chords first; arcs inside the bed stay arcs.
+What lies outside is dropped and the nozzle travels to where the path comes
+back onto the bed.
+"""
+import math
+
+import numpy as np
+
+from geometry.flatten import DEFAULT_TOLERANCE
+from geometry.infill import arc_chords
+from geometry.pathset import PathSet, MOVE, LINE, ARC_CW, ARC_CCW
+
+BOUNDS_MODES = ("error", "clip", "off")
+BOUNDS_EPSILON = 1e-6  # mm a point may lie past an edge, well below the printed precision
+_EDGES = ("X_MIN", "Y_MIN", "X_MAX", "Y_MAX")
+
+
+class BedBoundsError(ValueError):
+    """
+    A job that doesn't fit on the bed.
+
+    Args:
+        report (dict): What doesn't fit, see check_bed().
+    """
+
+    def __init__(self, report):
+        super().__init__(format_report(report))
+        self.report = report
+
+    def __reduce__(self):
+        # Raised in worker processes and pickled back with its report
+        return type(self), (self.report,)
+
+
+def bed_known(bed):
+    """
+    Returns whether a bed has an area; a config without X_MAX/Y_MAX (both 0)
+    has none and isn't checked.
+
+    Args:
+        bed (tuple): (x_min, y_min, x_max, y_max) of the bed.
+
+    Returns:
+        bool: True if the bed is wider and higher than 0.
+    """
+    return bed[2] > bed[0] and bed[3] > bed[1]
+
+
+def _arc_extents(starts, ends, centers, clockwise):
+    """
+    Returns the bounding boxes of arcs: their end points, and the leftmost,
+    lowest, rightmost and highest points of the circle they sweep over.
+
+    Args:
+        starts (np.ndarray): (N, 2) start points of the arcs.
+        ends (np.ndarray): (N, 2) end points of the arcs.
+        centers (np.ndarray): (N, 2) centers of the arcs.
+        clockwise (np.ndarray): (N,) boolean mask of clockwise arcs.
+
+    Returns:
+        tuple: (low, high) (N, 2) arrays of the box corners.
+    """
+    low = np.minimum(starts, ends)
+    high = np.maximum(starts, ends)
+    start = starts - centers
+    end = ends - centers
+    radius = np.hypot(start[:, 0], start[:, 1])
+    begin = np.arctan2(start[:, 1], start[:, 0])
+    turn = np.arctan2(start[:, 0] * end[:, 1] - start[:, 1] * end[:, 0],
+                      start[:, 0] * end[:, 0] + start[:, 1] * end[:, 1])
+    # The sweep the arc turns through, a full circle when it ends where it started
+    sweep = np.mod(np.where(clockwise, -turn, turn), 2 * math.pi)
+    sweep[sweep == 0] = 2 * math.pi
+    direction = np.where(clockwise, -1.0, 1.0)
+    for k, (axis, side) in enumerate(((0, 1), (1, 1), (0, -1), (1, -1))):
+        # Angle from the start to 0, 90, 180 and 270 degrees, along the arc
+        reached = np.mod((k * math.pi / 2 - begin) * direction, 2 * math.pi) <= sweep
+        extreme = centers[:, axis] + side * radius
+        if side > 0:
+            high[:, axis] = np.where(reached, np.maximum(high[:, axis], extreme), high[:, axis])
+        else:
+            low[:, axis] = np.where(reached, np.minimum(low[:, axis], extreme), low[:, axis])
+    return low, high
+
+
+def _segments(paths):
+    """
+    Returns the extents of every move of the paths: the point itself for a
+    travel move and the first point of a path, the box of the segment or arc
+    that ends at the point otherwise.
+
+    Args:
+        paths (PathSet): The paths.
+
+    Returns:
+        tuple: (low, high, drawn, arc) where low and high are (N, 2) corners,
+            drawn marks the moves that draw a segment and arc those that are arcs.
+    """
+    coords = paths.coords
+    codes = paths.codes
+    drawn = codes != MOVE
+    drawn[paths.offsets[:-1][paths.offsets[:-1] < len(coords)]] = False
+    previous = np.roll(coords, 1, axis=0)
+    low = np.where(drawn[:, None], np.minimum(previous, coords), coords)
+    high = np.where(drawn[:, None], np.maximum(previous, coords), coords)
+    arc = drawn & ((codes == ARC_CW) | (codes == ARC_CCW))
+    if paths.centers is not None and arc.any():
+        index = np.flatnonzero(arc)
+        low[index], high[index] = _arc_extents(coords[index - 1], coords[index],
+                                               paths.centers[index], codes[index] == ARC_CW)
+    return low, high, drawn, arc
+
+
+def job_extents(paths):
+    """
+    Returns the bounding box of everything the nozzle passes over, arcs
+    included, which can reach past the points of the paths.
+
+    Args:
+        paths (PathSet): The paths.
+
+    Returns:
+        tuple: (min_x, min_y, max_x, max_y), or None if there are no points.
+    """
+    extents = paths.bounds()
+    if extents is None or paths.centers is None:
+        return extents
+    arc = (paths.codes == ARC_CW) | (paths.codes == ARC_CCW)
+    arc[paths.offsets[:-1][paths.offsets[:-1] < paths.point_count]] = False
+    if not arc.any():
+        return extents
+    index = np.flatnonzero(arc)
+    low, high = _arc_extents(paths.coords[index - 1], paths.coords[index], paths.centers[index],
+                             paths.codes[index] == ARC_CW)
+    return (min(extents[0], float(low[:, 0].min())), min(extents[1], float(low[:, 1].min())),
+            max(extents[2], float(high[:, 0].max())), max(extents[3], float(high[:, 1].max())))
+
+
+def _overflow(extents, bed, slack=BOUNDS_EPSILON):
+    """
+    Returns how far the extents reach past each edge of the bed, in mm, for
+    the edges they cross by more than slack.
+    """
+    past = (bed[0] - extents[0], bed[1] - extents[1], extents[2] - bed[2], extents[3] - bed[3])
+    return {edge: distance for edge, distance in zip(_EDGES, past) if distance > slack}
+
+
+def check_placement(bed, origin, size):
+    """
+    Checks where a normalized drawing lands before it is parsed: it starts
+    at origin and is size mm along its longer side.
+
+    Args:
+        bed (tuple): (x_min, y_min, x_max, y_max) of the bed.
+        origin (tuple): Machine position of the drawing's origin, the start
+            offset plus the printer offsets.
+        size (float): The size of the drawing in mm, None if it keeps the
+            size of the SVG (then only the origin is checked).
+
+    Returns:
+        dict: The report (see check_bed()) if the drawing can't fit, else None.
+    """
+    if not bed_known(bed):
+        return None
+    x, y = origin
+    overflow = _overflow((x, y, x, y), bed)
+    if not overflow and size is not None:
+        # The longer side reaches size mm, along X or along Y
+        past_x = x + size - bed[2]
+        past_y = y + size - bed[3]
+        if min(past_x, past_y) > BOUNDS_EPSILON:
+            overflow = {"X_MAX" if past_x <= past_y else "Y_MAX": min(past_x, past_y)}
+    if not overflow:
+        return None
+    return {"bed": tuple(bed), "extents": None, "origin": (x, y), "size": size,
+            "overflow": overflow, "moves": None, "moves_outside": None}
+
+
+def check_bed(paths, bed, origin=(0.0, 0.0), slack=BOUNDS_EPSILON):
+    """
+    Checks that everything the nozzle passes over lies on the bed.
+
+    The extents of the whole job decide in one pass; the moves are only
+    looked at one by one when they don't fit.
+
+    Args:
+        paths (PathSet): The paths, in path coordinates.
+        bed (tuple): (x_min, y_min, x_max, y_max) of the bed in machine
+            coordinates.
+        origin (tuple): Machine position of the path origin.
+        slack (float): The mm the job may reach past an edge and still fit,
+            e.g. the tolerance of the arcs (see bounds_slack()).
+
+    Returns:
+        dict: None if the job fits (or the bed is unknown), else a report
+            with the bed, the job's extents in machine coordinates, the mm
+            the job reaches past each edge it crosses ('overflow', keyed
+            'X_MIN', 'Y_MIN', 'X_MAX', 'Y_MAX'), the number of moves and
+            the number that leave the bed.
+    """
+    extents = job_extents(paths)
+    if extents is None or not bed_known(bed):
+        return None
+    dx, dy = origin
+    extents = (extents[0] + dx, extents[1] + dy, extents[2] + dx, extents[3] + dy)
+    overflow = _overflow(extents, bed, slack)
+    if not overflow:
+        return None
+    low, high, _, _ = _segments(paths)
+    inside = (np.all(low + (dx, dy) >= np.asarray(bed[:2]) - slack, axis=1)
+              & np.all(high + (dx, dy) <= np.asarray(bed[2:]) + slack, axis=1))
+    return {"bed": tuple(bed), "extents": extents, "origin": (dx, dy), "size": None,
+            "overflow": overflow, "moves": paths.point_count,
+            "moves_outside": int(np.count_nonzero(~inside))}
+
+
+def bounds_slack(arc_tolerance, chord_tolerance, xy_precision):
+    """
+    Returns the mm a job may reach past the bed and still fit: how far the
+    fitted arcs can bulge past the chords they replace (see fit_arcs()), and
+    at least the resolution of the coordinates in the G-code.
+
+    Args:
+        arc_tolerance (float): The arc fitting tolerance, 0 without arcs.
+        chord_tolerance (float): The tolerance the points were made with,
+            the flattening plus the simplification tolerance.
+        xy_precision (int): The decimals of X and Y in the G-code.
+
+    Returns:
+        float: The slack in mm.
+    """
+    bulge = arc_tolerance + chord_tolerance if arc_tolerance else 0.0
+    return max(bulge, 10.0 ** -xy_precision)
+
+
+def _format_mm(distance):
+    """
+    Returns a distance with two decimals, or two significant digits when
+    it is smaller than that.
+    """
+    if distance <= 0 or distance >= 0.01:
+        return f"{distance:.2f}"
+    return f"{distance:.{1 - math.floor(math.log10(distance))}f}"
+
+
+def format_report(report):
+    """
+    Returns a report of check_bed() or check_placement() as one line of text.
+    """
+    bed = report["bed"]
+    edges = ", ".join(f"{_format_mm(distance)} mm past {edge}"
+                      for edge, distance in report["overflow"].items())
+    text = f"the job doesn't fit on the bed X {bed[0]:g}..{bed[2]:g} Y {bed[1]:g}..{bed[3]:g}: {edges}"
+    if report["extents"] is not None:
+        extents = report["extents"]
+        text += (f"; it spans X {extents[0]:.2f}..{extents[2]:.2f} Y {extents[1]:.2f}..{extents[3]:.2f}, "
+                 f"{report['moves_outside']} of {report['moves']} moves leave the bed")
+    else:
+        text += f"; it starts at X {report['origin'][0]:g} Y {report['origin'][1]:g}"
+        if report["size"] is not None:
+            text += f" and is {report['size']:g} mm"
+    return text
+
+
+def _split_arcs(paths, split, tolerance):
+    """
+    Returns the paths with the arcs marked in split turned into chords.
+    """
+    index = np.flatnonzero(split)
+    chord_ends, chord_arc = arc_chords(paths.coords[index - 1], paths.coords[index],
+                                       paths.centers[index], paths.codes[index] == ARC_CW,
+                                       tolerance)
+    sizes = np.ones(paths.point_count, dtype=np.int64)
+    sizes[index] = np.bincount(chord_arc, minlength=len(index))
+    starts = np.cumsum(sizes) - sizes
+    coords = np.empty((int(sizes.sum()), 2))
+    codes = np.empty(len(coords), dtype=np.uint8)
+    centers = np.full((len(coords), 2), np.nan)
+    kept = ~split
+    coords[starts[kept]] = paths.coords[kept]
+    codes[starts[kept]] = paths.codes[kept]
+    centers[starts[kept]] = paths.centers[kept]
+    within = np.arange(len(chord_arc)) - (np.cumsum(sizes[index]) - sizes[index])[chord_arc]
+    coords[starts[index][chord_arc] + within] = chord_ends
+    codes[starts[index][chord_arc] + within] = LINE
+    offsets = np.append(starts, len(coords))[paths.offsets]
+    return PathSet(coords, codes, offsets, centers)
+
+
+def clip_to_bed(paths, bed, origin=(0.0, 0.0), tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns the parts of the paths that lie on the bed.
+
+    Segments that cross an edge end where they cross it, and a path that
+    leaves the bed goes on with a travel move to where it comes back. Paths
+    entirely off the bed are dropped; the others keep their order.
+
+    Args:
+        paths (PathSet): The paths, in path coordinates.
+        bed (tuple): (x_min, y_min, x_max, y_max) of the bed in machine
+            coordinates.
+        origin (tuple): Machine position of the path origin.
+        tolerance (float): The largest distance between an arc that crosses
+            an edge and the chords it is cut into.
+
+    Returns:
+        PathSet: The clipped paths, in path coordinates.
+    """
+    if not paths.point_count or not bed_known(bed):
+        return paths
+    # The bed in path coordinates; moves within BOUNDS_EPSILON of it count as on it
+    low_edge = np.asarray(bed[:2], dtype=np.float64) - origin
+    high_edge = np.asarray(bed[2:], dtype=np.float64) - origin
+    low, high, drawn, arc = _segments(paths)
+    inside = (np.all(low >= low_edge - BOUNDS_EPSILON, axis=1)
+              & np.all(high <= high_edge + BOUNDS_EPSILON, axis=1))
+    if inside.all():
+        return paths
+    outside = (np.any(high < low_edge - BOUNDS_EPSILON, axis=1)
+               | np.any(low > high_edge + BOUNDS_EPSILON, axis=1))
+    split = arc & ~inside & ~outside
+    if split.any():
+        paths = _split_arcs(paths, split, tolerance)
+        low, high, drawn, arc = _segments(paths)
+        inside = (np.all(low >= low_edge - BOUNDS_EPSILON, axis=1)
+                  & np.all(high <= high_edge + BOUNDS_EPSILON, axis=1))
+
+    # Liang-Barsky: the stretch t0..t1 of every line inside the four edges
+    coords = paths.coords
+    starts = np.roll(coords, 1, axis=0)
+    delta = coords - starts
+    t0 = np.zeros(len(coords))
+    t1 = np.ones(len(coords))
+    visible = drawn & ~arc
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for axis in (0, 1):
+            for p, q in ((-delta[:, axis], starts[:, axis] - low_edge[axis]),
+                         (delta[:, axis], high_edge[axis] - starts[:, axis])):
+                visible &= (p != 0) | (q >= 0)
+                ratio = q / p
+                t0 = np.where(p < 0, np.maximum(t0, ratio), t0)
+                t1 = np.where(p > 0, np.minimum(t1, ratio), t1)
+    visible &= t0 < t1
+    # Arcs are either on the bed or off it by now, and what is on it stays whole
+    whole = drawn & inside
+    visible |= whole
+    t0[whole] = 0.0
+    t1[whole] = 1.0
+
+    # A visible segment needs a travel move to where it starts unless the
+    # one before it is drawn, visible and reaches its end
+    reaches_end = np.zeros(len(coords), dtype=bool)
+    reaches_end[1:] = visible[:-1] & (t1[:-1] == 1.0)
+    reaches_end[paths.offsets[:-1][paths.offsets[:-1] < len(coords)]] = False
+    segment = np.flatnonzero(visible)
+    travel = ~reaches_end[segment] | (t0[segment] > 0)
+    sizes = 1 + travel
+    point_starts = np.cumsum(sizes) - sizes
+    out = np.empty((int(sizes.sum()), 2))
+    out_codes = np.empty(len(out), dtype=np.uint8)
+    moves = point_starts[travel]
+    out[moves] = starts[segment[travel]] + t0[segment[travel], None] * delta[segment[travel]]
+    out_codes[moves] = MOVE
+    ends = point_starts + sizes - 1
+    out[ends] = np.where((t1[segment] == 1.0)[:, None], coords[segment],
+                         starts[segment] + t1[segment, None] * delta[segment])
+    out_codes[ends] = paths.codes[segment]
+    out_centers = None
+    if paths.centers is not None:
+        out_centers = np.full((len(out), 2), np.nan)
+        out_centers[ends] = paths.centers[segment]
+    # One path for every path that keeps anything
+    owner = np.repeat(np.repeat(np.arange(len(paths)), np.diff(paths.offsets))[segment], sizes)
+    offsets = np.append(np.flatnonzero(np.diff(owner, prepend=-1)), len(out))
+    return PathSet(out, out_codes, offsets, out_centers)
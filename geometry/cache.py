@@ -0,0 +1,176 @@
+"""
+On-disk cache of prepared geometry
+
+Parsing, flattening, normalizing, simplifying and arc fitting only depend on
+the SVG file and a few settings (size and tolerances), not on the layer
+count, layer height, offsets or speeds. Their result is stored as an
+uncompressed .npz of the PathSet arrays under a key made of the SHA-256 of
+the file content and those settings, so re-slicing a design loads a few
+arrays instead of parsing it again.
+
+The cache directory is bounded in size: a hit refreshes the file's mtime and
+the least recently used files are deleted once the total exceeds the limit.
+Entries are written to a temporary file and renamed into place, so several
+processes can share one directory.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from geometry.pathset import PathSet
+
+CACHE_VERSION = 2  # bump when the stored geometry changes for the same settings
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "svg_to_gcode")
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024  # bytes
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """
+    Returns the SHA-256 of a file's content.
+
+    Args:
+        path (str | file-like): The file to hash, or a binary file object,
+            which is read from its current position and then rewound there.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    if isinstance(path, (str, bytes, os.PathLike)):
+        with open(path, "rb") as file:
+            _hash_chunks(digest, file)
+    else:
+        position = path.tell()
+        _hash_chunks(digest, path)
+        path.seek(position)
+    return digest.hexdigest()
+
+
+def _hash_chunks(digest, file):
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+
+
+def cache_key(path, settings):
+    """
+    Returns the cache key of a file converted with the given settings.
+
+    Args:
+        path (str | file-like): The SVG file, see file_digest.
+        settings (dict): Every setting that changes the geometry, with
+            JSON-serializable values.
+
+    Returns:
+        str: The key, a hex digest.
+    """
+    description = json.dumps({"version": CACHE_VERSION, "file": file_digest(path),
+                              "settings": settings}, sort_keys=True)
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+
+class GeometryCache:
+    """
+    A size-bounded directory of PathSets stored as .npz files.
+
+    Args:
+        directory (str): Where the entries are stored, created on first write.
+        max_bytes (int): Total size above which the least recently used
+            entries are deleted.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key):
+        """
+        Loads an entry.
+
+        Args:
+            key (str): The key, see cache_key.
+
+        Returns:
+            tuple: (paths, info) where paths is the stored PathSet and info
+                the dict stored with it, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                centers = data["centers"] if "centers" in data.files else None
+                paths = PathSet(data["coords"], data["codes"], data["offsets"], centers)
+                info = json.loads(str(data["info"]))
+            os.utime(path)
+        except FileNotFoundError:
+            # Missing, or deleted by a concurrent eviction
+            self.misses += 1
+            return None
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            # Cut short by a crash or damaged: deleted so it is stored again
+            self.misses += 1
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+        self.hits += 1
+        return paths, info
+
+    def put(self, key, paths, info=None):
+        """
+        Stores an entry, then evicts old entries if the cache is too large.
+
+        Args:
+            key (str): The key, see cache_key.
+            paths (PathSet): The geometry to store.
+            info (dict): JSON-serializable values stored with it.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        arrays = {"coords": paths.coords, "codes": paths.codes, "offsets": paths.offsets,
+                  "info": np.array(json.dumps(info or {}))}
+        if paths.centers is not None:
+            arrays["centers"] = paths.centers
+        handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.savez(file, **arrays)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used entries until the cache fits in
+        max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".npz"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
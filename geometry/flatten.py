@@ -0,0 +1,264 @@
+"""
+Tolerance-driven flattening of path segments into polylines
+
+Segments are stored as rows of one (S, 10) float64 array so that every
+curve of a document is flattened in one batch:
+
+    MOVE / LINE   columns 8-9: end point
+    CUBIC         columns 0-7: P0, P1, P2 (and unused), 8-9: end point P3
+    ARC           columns 0-1: center, 2-5: the matrix [[a, b], [c, d]] that
+                  maps the unit circle onto the ellipse, 6: start angle,
+                  7: sweep angle, 8-9: end point
+
+The number of points of a cubic comes from Wang's formula and the number of
+points of an arc from the angular step that keeps the chord error below the
+tolerance, so the point count follows curvature and print size.
+"""
+import math
+
+import numpy as np
+
+from geometry.pathset import MOVE, LINE
+
+SEGMENT_MOVE = 0
+SEGMENT_LINE = 1
+SEGMENT_CUBIC = 2
+SEGMENT_ARC = 3
+
+SEGMENT_COLUMNS = 10
+END = slice(8, 10)
+_POINT_COLUMNS = [0, 1, 2, 3, 4, 5, 8, 9]
+
+DEFAULT_TOLERANCE = 0.05  # mm
+MAX_POINTS_PER_CURVE = 1000
+
+
+def segment_point_counts(kinds, segments, tolerance):
+    """
+    Returns how many points each segment is flattened into.
+
+    Args:
+        kinds (np.ndarray): (S,) SEGMENT_* kind of each segment.
+        segments (np.ndarray): (S, 10) segment array.
+        tolerance (float): Maximum distance between a curve and its chords,
+            in the units of the segments.
+
+    Returns:
+        np.ndarray: (S,) int64 point counts (at least 1 per segment).
+    """
+    counts = np.ones(len(kinds), dtype=np.int64)
+    tolerance = max(tolerance, 1e-12)
+
+    cubic = np.flatnonzero(kinds == SEGMENT_CUBIC)
+    if len(cubic):
+        p0 = segments[cubic, 0:2]
+        p1 = segments[cubic, 2:4]
+        p2 = segments[cubic, 4:6]
+        p3 = segments[cubic, END]
+        second = np.maximum(np.hypot(*(p0 - 2 * p1 + p2).T), np.hypot(*(p1 - 2 * p2 + p3).T))
+        # Wang's formula for a degree 3 curve: n = sqrt(3 * 2 / 8 * M / tol)
+        n = np.ceil(np.sqrt(0.75 * second / tolerance))
+        counts[cubic] = np.clip(n, 1, MAX_POINTS_PER_CURVE)
+
+    arc = np.flatnonzero(kinds == SEGMENT_ARC)
+    if len(arc):
+        matrix = segments[arc, 2:6].reshape(-1, 2, 2)
+        radius = np.linalg.norm(matrix, ord=2, axis=(1, 2))
+        # Largest angular step whose chord stays within the tolerance
+        step = 2 * np.arccos(np.clip(1 - tolerance / np.maximum(radius, 1e-12), -1, 1))
+        n = np.ceil(np.abs(segments[arc, 7]) / np.maximum(step, 1e-9))
+        counts[arc] = np.clip(n, 1, MAX_POINTS_PER_CURVE)
+
+    return counts
+
+
+def flatten_segments(kinds, segments, tolerance):
+    """
+    Flattens a batch of segments into points.
+
+    Args:
+        kinds (np.ndarray): (S,) SEGMENT_* kind of each segment.
+        segments (np.ndarray): (S, 10) segment array.
+        tolerance (float): Maximum distance between a curve and its chords,
+            in the units of the segments.
+
+    Returns:
+        tuple: (coords, codes, counts) where coords is an (N, 2) array of
+            points, codes their MOVE/LINE codes and counts the number of
+            points produced by each segment.
+    """
+    counts = segment_point_counts(kinds, segments, tolerance)
+    segment = np.repeat(np.arange(len(kinds)), counts)
+    step = np.arange(len(segment)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    t = step / counts[segment]
+    coords = segments[segment][:, END].copy()
+    point_kinds = kinds[segment]
+
+    cubic = np.flatnonzero((point_kinds == SEGMENT_CUBIC) & (t < 1))
+    if len(cubic):
+        rows = segments[segment[cubic]]
+        tc = t[cubic, None]
+        mt = 1 - tc
+        coords[cubic] = (mt**3 * rows[:, 0:2] + 3 * mt**2 * tc * rows[:, 2:4]
+                         + 3 * mt * tc**2 * rows[:, 4:6] + tc**3 * rows[:, END])
+
+    arc = np.flatnonzero((point_kinds == SEGMENT_ARC) & (t < 1))
+    if len(arc):
+        rows = segments[segment[arc]]
+        angle = rows[:, 6] + rows[:, 7] * t[arc]
+        cos = np.cos(angle)
+        sin = np.sin(angle)
+        coords[arc, 0] = rows[:, 0] + rows[:, 2] * cos + rows[:, 3] * sin
+        coords[arc, 1] = rows[:, 1] + rows[:, 4] * cos + rows[:, 5] * sin
+
+    codes = np.where(point_kinds == SEGMENT_MOVE, MOVE, LINE).astype(np.uint8)
+    return coords, codes, counts
+
+
+def segment_extent(kinds, segments):
+    """
+    Returns the larger side of the bounding box of the segment end points,
+    falling back to the control points when the end points coincide.
+    The end points never lie outside the flattened shape, so a scale
+    derived from this extent never makes the tolerance coarser than asked.
+
+    Args:
+        kinds (np.ndarray): (S,) SEGMENT_* kind of each segment.
+        segments (np.ndarray): (S, 10) segment array.
+
+    Returns:
+        float: The extent, 0 if there are no segments.
+    """
+    if not len(kinds):
+        return 0.0
+    ends = segments[:, END]
+    extent = float(np.max(ends.max(axis=0) - ends.min(axis=0)))
+    if extent > 0:
+        return extent
+    cubic = segments[kinds == SEGMENT_CUBIC]
+    points = np.concatenate([ends, cubic[:, 0:2], cubic[:, 2:4], cubic[:, 4:6]])
+    extent = float(np.max(points.max(axis=0) - points.min(axis=0)))
+    arc = segments[kinds == SEGMENT_ARC]
+    if len(arc):
+        extent = max(extent, 2 * float(np.max(np.linalg.norm(arc[:, 2:6].reshape(-1, 2, 2), ord=2, axis=(1, 2)))))
+    return extent
+
+
+def tolerance_for_size(kinds, segments, target_size, tolerance=DEFAULT_TOLERANCE):
+    """
+    Converts a chord tolerance in mm of the final print into path units.
+
+    Args:
+        kinds (np.ndarray): (S,) SEGMENT_* kind of each segment.
+        segments (np.ndarray): (S, 10) segment array.
+        target_size (float): The size the paths are scaled to, in mm.
+        tolerance (float): The tolerance in mm.
+
+    Returns:
+        float: The tolerance in path units.
+    """
+    extent = segment_extent(kinds, segments)
+    if extent == 0 or not target_size:
+        return tolerance
+    return tolerance * extent / target_size
+
+
+def arc_segment(center, radii, rotation, start_angle, sweep):
+    """
+    Returns the center/matrix/angle columns (0-7) of an elliptical arc row.
+
+    Args:
+        center (np.ndarray): (S, 2) arc centers.
+        radii (np.ndarray): (S, 2) x and y radii.
+        rotation (np.ndarray): (S,) x-axis rotation in radians.
+        start_angle (np.ndarray): (S,) start angle in radians.
+        sweep (np.ndarray): (S,) signed sweep angle in radians.
+
+    Returns:
+        np.ndarray: (S, 8) columns 0-7 of the arc rows.
+    """
+    cos = np.cos(rotation)
+    sin = np.sin(rotation)
+    return np.column_stack([
+        center[:, 0], center[:, 1],
+        radii[:, 0] * cos, -radii[:, 1] * sin,
+        radii[:, 0] * sin, radii[:, 1] * cos,
+        start_angle, sweep,
+    ])
+
+
+def endpoint_arcs(starts, ends, radii, rotation_deg, large_arc, sweep):
+    """
+    Converts SVG endpoint-parameterized arcs to center parameterization
+    (SVG 1.1 implementation notes, F.6.5 and F.6.6).
+
+    Args:
+        starts (np.ndarray): (S, 2) start points.
+        ends (np.ndarray): (S, 2) end points.
+        radii (np.ndarray): (S, 2) rx, ry as given in the path data.
+        rotation_deg (np.ndarray): (S,) x-axis rotation in degrees.
+        large_arc (np.ndarray): (S,) large-arc flags.
+        sweep (np.ndarray): (S,) sweep flags.
+
+    Returns:
+        tuple: (columns, degenerate) where columns are columns 0-7 of the
+            arc rows and degenerate marks arcs that are straight lines
+            (a zero radius) per the SVG rules.
+    """
+    radii = np.abs(radii)
+    degenerate = (radii[:, 0] == 0) | (radii[:, 1] == 0)
+    radii = np.where(degenerate[:, None], 1.0, radii)
+    phi = np.radians(rotation_deg)
+    cos = np.cos(phi)
+    sin = np.sin(phi)
+    half = (starts - ends) / 2
+    x1 = cos * half[:, 0] + sin * half[:, 1]
+    y1 = -sin * half[:, 0] + cos * half[:, 1]
+    # Scale radii up when they are too small to reach the end point
+    scale = np.sqrt(np.maximum(1, (x1 / radii[:, 0])**2 + (y1 / radii[:, 1])**2))
+    rx = radii[:, 0] * scale
+    ry = radii[:, 1] * scale
+    numerator = rx**2 * ry**2 - rx**2 * y1**2 - ry**2 * x1**2
+    denominator = rx**2 * y1**2 + ry**2 * x1**2
+    coef = np.sqrt(np.maximum(0, numerator / np.where(denominator == 0, 1, denominator)))
+    coef = np.where(np.asarray(large_arc) != np.asarray(sweep), coef, -coef)
+    cx1 = coef * rx * y1 / ry
+    cy1 = -coef * ry * x1 / rx
+    middle = (starts + ends) / 2
+    center = np.column_stack([cos * cx1 - sin * cy1 + middle[:, 0],
+                              sin * cx1 + cos * cy1 + middle[:, 1]])
+    theta1 = np.arctan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    theta2 = np.arctan2((-y1 - cy1) / ry, (-x1 - cx1) / rx)
+    # Positive sweep for a set sweep flag, negative otherwise
+    delta = np.mod(theta2 - theta1, 2 * math.pi)
+    delta = np.where((np.asarray(sweep) != 0) | (delta == 0), delta, delta - 2 * math.pi)
+    return arc_segment(center, np.column_stack([rx, ry]), phi, theta1, delta), degenerate
+
+
+def transform_segments(kinds, segments, matrices):
+    """
+    Applies affine transforms to a batch of segments in one pass. Arcs stay
+    exact under any affine transform because only their center and matrix
+    change.
+
+    Args:
+        kinds (np.ndarray): (S,) SEGMENT_* kind of each segment.
+        segments (np.ndarray): (S, 10) segment array.
+        matrices (np.ndarray): One (3, 3) matrix for all segments, or an
+            (S, 3, 3) array with one matrix per segment.
+
+    Returns:
+        np.ndarray: The transformed (S, 10) segment array.
+    """
+    count = len(segments)
+    matrices = np.broadcast_to(np.asarray(matrices, dtype=np.float64), (count, 3, 3))
+    linear = matrices[:, :2, :2]
+    shift = matrices[:, :2, 2]
+    out = segments.copy()
+    # Every column pair is a point, except the matrix of arcs
+    points = segments[:, _POINT_COLUMNS].reshape(count, 4, 2)
+    out[:, _POINT_COLUMNS] = (np.einsum('sij,skj->ski', linear, points) + shift[:, None, :]).reshape(count, 8)
+    arc = np.flatnonzero(kinds == SEGMENT_ARC)
+    if len(arc):
+        out[arc, 2:6] = (linear[arc] @ segments[arc, 2:6].reshape(-1, 2, 2)).reshape(-1, 4)
+    return out
@@ -0,0 +1,268 @@
+"""
+Travel-move ordering
+
+Every subpath (a travel move and the extruding moves after it) is a piece
+that can be printed in any order. Open pieces can be printed from either
+end; closed loops can be entered at any vertex and end where they start.
+
+The order is built with a nearest-neighbour pass over a uniform grid of the
+candidate entry points, then improved with 2-opt moves (reversing a stretch
+of the tour, which also flips the open pieces in it) until no move helps or
+the time budget runs out. Loop entry points are finally re-picked for the
+position the nozzle arrives from.
+"""
+import math
+import time
+
+import numpy as np
+
+from geometry.pathset import PathSet, MOVE, ARC_CW, ARC_CCW
+
+DEFAULT_TIME_BUDGET = 1.0  # seconds of 2-opt improvement
+CLOSED_EPSILON = 1e-9
+MAX_RINGS = 4  # grid rings searched before falling back to a full scan
+
+
+def travel_distance(paths, start=(0.0, 0.0)):
+    """
+    Returns the total length of the travel moves of the paths.
+
+    Args:
+        paths (PathSet): The paths.
+        start (tuple): Where the nozzle is before the first move.
+
+    Returns:
+        float: The travel distance.
+    """
+    coords = paths.coords
+    if not len(coords):
+        return 0.0
+    previous = np.empty_like(coords)
+    previous[0] = start
+    previous[1:] = coords[:-1]
+    travel = paths.codes == MOVE
+    delta = coords[travel] - previous[travel]
+    return float(np.hypot(delta[:, 0], delta[:, 1]).sum())
+
+
+def _pieces(paths):
+    """
+    Returns the first and last point index of every piece and whether it is
+    a closed loop.
+    """
+    count = paths.point_count
+    starts = np.union1d(np.flatnonzero(paths.codes == MOVE), paths.offsets[:-1])
+    starts = starts[starts < count]
+    ends = np.append(starts[1:], count) - 1
+    closed = (ends - starts > 1) & np.all(
+        np.abs(paths.coords[starts] - paths.coords[ends]) <= CLOSED_EPSILON, axis=1)
+    return starts, ends, closed
+
+
+class _Grid:
+    """
+    Uniform grid over the candidate entry points of the pieces.
+    """
+
+    def __init__(self, points, owners):
+        self.points = points
+        self.owners = owners
+        low = points.min(axis=0)
+        extent = max(float(np.max(points.max(axis=0) - low)), 1e-9)
+        self.cell = max(extent / max(math.sqrt(len(points)), 1), 1e-9)
+        self.low = low
+        cells = np.floor((points - low) / self.cell).astype(np.int64)
+        self.size = int(cells.max()) + 1
+        keys = cells[:, 0] * self.size + cells[:, 1]
+        order = np.argsort(keys, kind='stable')
+        self.order = order
+        self.keys = keys[order]
+
+    def _cell_members(self, cx, cy):
+        if cx < 0 or cy < 0 or cx >= self.size or cy >= self.size:
+            return None
+        key = cx * self.size + cy
+        lo = np.searchsorted(self.keys, key)
+        hi = np.searchsorted(self.keys, key, side='right')
+        return self.order[lo:hi] if hi > lo else None
+
+    def nearest(self, x, y, done):
+        """
+        Returns the index of the nearest point whose owner isn't done, or
+        None if every owner is done.
+        """
+        cx = int(math.floor((x - self.low[0]) / self.cell))
+        cy = int(math.floor((y - self.low[1]) / self.cell))
+        best = None
+        best_distance = math.inf
+        for ring in range(2 * self.size + 2 + max(abs(cx), abs(cy))):
+            # Nothing in this ring can beat what is already found
+            if best is not None and (ring - 1) * self.cell > best_distance:
+                break
+            if best is None and ring > MAX_RINGS:
+                return self._nearest_anywhere(x, y, done)
+            members = []
+            for dx in range(-ring, ring + 1):
+                for dy in (range(-ring, ring + 1) if abs(dx) == ring else (-ring, ring)):
+                    cell = self._cell_members(cx + dx, cy + dy)
+                    if cell is not None:
+                        members.append(cell)
+            if not members:
+                continue
+            members = np.concatenate(members)
+            members = members[~done[self.owners[members]]]
+            if not len(members):
+                continue
+            d = np.hypot(self.points[members, 0] - x, self.points[members, 1] - y)
+            k = int(np.argmin(d))
+            if d[k] < best_distance:
+                best, best_distance = int(members[k]), float(d[k])
+        return best
+
+    def _nearest_anywhere(self, x, y, done):
+        """
+        Brute-force search once the nearby cells are used up.
+        """
+        members = np.flatnonzero(~done[self.owners])
+        if not len(members):
+            return None
+        d = np.hypot(self.points[members, 0] - x, self.points[members, 1] - y)
+        return int(members[np.argmin(d)])
+
+
+def _two_opt(entries, exits, start, deadline):
+    """
+    Improves the tour in place with 2-opt moves until none helps or the
+    deadline passes. entries and exits are (M, 2) arrays in tour order;
+    reversing a stretch swaps the entry and exit of each piece in it.
+
+    Returns:
+        np.ndarray: The new tour order as indices into the input order, and
+            a mask of the pieces that are traversed backwards.
+    """
+    count = len(entries)
+    order = np.arange(count)
+    flipped = np.zeros(count, dtype=bool)
+    entries = entries.copy()
+    exits = exits.copy()
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(-1, count - 1):
+            if time.perf_counter() >= deadline:
+                break
+            # Edge i -> i + 1 against every edge j -> j + 1 after it; the
+            # stretch i + 1 .. j is reversed (j = i + 1 flips one piece)
+            a = start if i < 0 else exits[i]
+            b = entries[i + 1]
+            j = np.arange(i + 1, count)
+            c = exits[j]
+            old = math.hypot(*(a - b)) + np.append(np.hypot(*(c[:-1] - entries[j[:-1] + 1]).T), 0.0)
+            new = np.hypot(*(a - c).T) + np.append(np.hypot(*(b - entries[j[:-1] + 1]).T), 0.0)
+            gain = old - new
+            k = int(np.argmax(gain))
+            if gain[k] > 1e-9:
+                lo, hi = i + 1, int(j[k]) + 1
+                order[lo:hi] = order[lo:hi][::-1].copy()
+                flipped[lo:hi] = ~flipped[lo:hi][::-1]
+                entries[lo:hi], exits[lo:hi] = exits[lo:hi][::-1].copy(), entries[lo:hi][::-1].copy()
+                improved = True
+    return order, flipped
+
+
+def order_paths(paths, start=(0.0, 0.0), time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Reorders the pieces of the paths to shorten the travel moves.
+
+    Args:
+        paths (PathSet): The paths to reorder.
+        start (tuple): Where the nozzle is before the first move.
+        time_budget (float): Seconds to spend on 2-opt improvement.
+
+    Returns:
+        PathSet: The reordered paths, one path per piece.
+    """
+    if not paths.point_count:
+        return paths
+    deadline = time.perf_counter() + time_budget
+    coords = paths.coords
+    first, last, closed = _pieces(paths)
+    count = len(first)
+
+    # Candidate entry points: both ends of open pieces, every vertex of loops
+    loop_points = [np.arange(first[p], last[p]) for p in np.flatnonzero(closed).tolist()]
+    open_ = np.flatnonzero(~closed)
+    candidates = np.concatenate([first[open_], last[open_]] + loop_points).astype(np.int64)
+    owners = np.concatenate([open_, open_] + [np.full(len(points), p, dtype=np.int64)
+                                             for points, p in zip(loop_points, np.flatnonzero(closed))])
+    grid = _Grid(coords[candidates], owners.astype(np.int64))
+
+    # Nearest neighbour: from the current position go to the closest entry
+    done = np.zeros(count, dtype=bool)
+    sequence = []
+    entry_index = np.empty(count, dtype=np.int64)
+    position = np.asarray(start, dtype=np.float64)
+    for _ in range(count):
+        k = grid.nearest(position[0], position[1], done)
+        piece = int(owners[k])
+        point = int(candidates[k])
+        done[piece] = True
+        sequence.append(piece)
+        entry_index[piece] = point
+        if closed[piece]:
+            position = coords[point]
+        else:
+            position = coords[last[piece] if point == first[piece] else first[piece]]
+    sequence = np.array(sequence, dtype=np.int64)
+
+    entry = entry_index[sequence]
+    exit_ = np.where(closed[sequence], entry,
+                     np.where(entry == first[sequence], last[sequence], first[sequence]))
+    order, flipped = _two_opt(coords[entry], coords[exit_], np.asarray(start, dtype=np.float64), deadline)
+    sequence = sequence[order]
+    entry = np.where(flipped, exit_[order], entry[order])
+
+    # Loops end where they start, so pick the vertex closest to the arrival
+    position = np.asarray(start, dtype=np.float64)
+    parts = []
+    for piece, point in zip(sequence.tolist(), entry.tolist()):
+        s, e = int(first[piece]), int(last[piece])
+        if closed[piece]:
+            vertices = coords[s:e]
+            point = s + int(np.argmin(np.hypot(vertices[:, 0] - position[0], vertices[:, 1] - position[1])))
+            parts.append(np.concatenate([np.arange(point, e + 1), np.arange(s + 1, point + 1)]))
+            position = coords[point]
+        elif point == s:
+            parts.append(np.arange(s, e + 1))
+            position = coords[e]
+        else:
+            parts.append(-np.arange(e, s - 1, -1) - 1)
+            position = coords[s]
+    return _assemble(paths, parts)
+
+
+def _assemble(paths, parts):
+    """
+    Builds the reordered PathSet. Each part lists the point indices of one
+    piece in print order; reversed pieces are stored as -index - 1 so their
+    moves can take the code and center of the move they now replace.
+    """
+    index = np.concatenate(parts)
+    reversed_ = index < 0
+    point = np.where(reversed_, -index - 1, index)
+    lengths = np.array([len(part) for part in parts], dtype=np.int64)
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+
+    # A reversed move from p[i] to p[i - 1] is the original move into p[i]
+    # run backwards: it takes that move's code and center
+    source = point.copy()
+    source[1:][reversed_[1:]] = point[:-1][reversed_[1:]]
+    codes = paths.codes[source].copy()
+    codes[reversed_ & (codes == ARC_CW)] = ARC_CCW
+    codes[reversed_ & (paths.codes[source] == ARC_CCW)] = ARC_CW
+    codes[offsets[:-1]] = MOVE
+    centers = None if paths.centers is None else paths.centers[source]
+    if centers is not None:
+        centers[offsets[:-1]] = np.nan
+    return PathSet(paths.coords[point], codes, offsets, centers)
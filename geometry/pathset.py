@@ -0,0 +1,223 @@
+"""
+Array-backed storage for parsed SVG paths
+
+All points of all paths live in one contiguous float64 coordinate array with
+a parallel array of command codes; offsets[i]:offsets[i + 1] is the slice of
+path i. Whole-job operations (bounding box, scaling, flipping, offsets) are
+then a few NumPy operations instead of Python loops over point tuples.
+A point costs 17 bytes (two float64 and a uint8 code) instead of the
+100+ bytes of a ('line', x, y) tuple, and indexing a PathSet gives a view
+of one path that shares the arrays instead of copying them.
+
+Arc moves (ARC_CW / ARC_CCW, see geometry.arcfit) end at their point like a
+line does and keep their circle center in the optional centers array, which
+is NaN for every other point.
+"""
+import numpy as np
+
+MOVE = 0
+LINE = 1
+ARC_CW = 2
+ARC_CCW = 3
+
+CODE_NAMES = {MOVE: 'move', LINE: 'line', ARC_CW: 'arc_cw', ARC_CCW: 'arc_ccw'}
+NAME_CODES = {name: code for code, name in CODE_NAMES.items()}
+
+
+class PathSet:
+    """
+    A set of paths stored as contiguous arrays.
+
+    Args:
+        coords (np.ndarray): (N, 2) float64 array of x, y coordinates.
+        codes (np.ndarray): (N,) uint8 array of command codes (MOVE, LINE,
+            ARC_CW, ARC_CCW).
+        offsets (np.ndarray): (P + 1,) int64 array of path start indices.
+        centers (np.ndarray): (N, 2) float64 array of arc centers, NaN for
+            points that aren't arcs. None when there are no arcs.
+    """
+
+    __slots__ = ('coords', 'codes', 'offsets', 'centers')
+
+    def __init__(self, coords, codes, offsets, centers=None):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.codes = np.ascontiguousarray(codes, dtype=np.uint8)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        if centers is not None:
+            centers = np.ascontiguousarray(centers, dtype=np.float64).reshape(-1, 2)
+        self.centers = centers
+
+    @classmethod
+    def from_points(cls, paths):
+        """
+        Builds a PathSet from lists of ('move' | 'line', x, y) tuples.
+
+        Args:
+            paths (list): One list of point tuples per path.
+
+        Returns:
+            PathSet: The same paths stored as arrays.
+        """
+        offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(path) for path in paths])
+        total = int(offsets[-1])
+        coords = np.empty((total, 2), dtype=np.float64)
+        codes = np.empty(total, dtype=np.uint8)
+        i = 0
+        for path in paths:
+            for cmd_type, x, y in path:
+                coords[i, 0] = x
+                coords[i, 1] = y
+                codes[i] = NAME_CODES[cmd_type]
+                i += 1
+        return cls(coords, codes, offsets)
+
+    @classmethod
+    def from_arrays(cls, coords, codes):
+        """
+        Builds a PathSet from per-path coordinate and code arrays.
+
+        Args:
+            coords (list): One (n, 2) coordinate array per path.
+            codes (list): One (n,) code array per path.
+
+        Returns:
+            PathSet: The paths concatenated into one set.
+        """
+        offsets = np.zeros(len(coords) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(c) for c in coords])
+        if not coords:
+            return cls(np.empty((0, 2)), np.empty(0, dtype=np.uint8), offsets)
+        return cls(np.concatenate(coords), np.concatenate(codes), offsets)
+
+    @classmethod
+    def concatenate(cls, sets):
+        """
+        Joins several PathSets into one, keeping their paths separate.
+
+        Args:
+            sets (list): The PathSets to join, in order.
+
+        Returns:
+            PathSet: All their paths in one set.
+        """
+        if not sets:
+            return cls.from_arrays([], [])
+        sizes = [s.point_count for s in sets]
+        starts = np.cumsum([0] + sizes[:-1])
+        offsets = np.concatenate([[0]] + [s.offsets[1:] + start for s, start in zip(sets, starts)])
+        centers = None
+        if any(s.centers is not None for s in sets):
+            centers = np.concatenate([s.centers if s.centers is not None
+                                      else np.full((s.point_count, 2), np.nan) for s in sets])
+        return cls(np.concatenate([s.coords for s in sets]),
+                   np.concatenate([s.codes for s in sets]), offsets, centers)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """
+        Returns one path as a PathSet whose arrays are views of this one's.
+
+        Args:
+            index (int): The index of the path, negative from the end.
+
+        Returns:
+            PathSet: A set holding only that path.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("path index out of range")
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        centers = None if self.centers is None else self.centers[start:end]
+        return PathSet(self.coords[start:end], self.codes[start:end],
+                       np.array([0, end - start]), centers)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def point_count(self):
+        return len(self.coords)
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the arrays, in bytes.
+        """
+        arrays = (self.coords, self.codes, self.offsets, self.centers)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def path(self, index):
+        """
+        Returns the coordinates and codes of one path as array views.
+
+        Args:
+            index (int): The index of the path.
+
+        Returns:
+            tuple: (coords, codes) views of the path.
+        """
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.coords[start:end], self.codes[start:end]
+
+    def bounds(self):
+        """
+        Returns the bounding box of all points.
+
+        Returns:
+            tuple: (min_x, min_y, max_x, max_y), or None if there are no points.
+        """
+        if not len(self.coords):
+            return None
+        # One reduction per column is several times faster than along axis 0
+        x, y = self.coords[:, 0], self.coords[:, 1]
+        return float(x.min()), float(y.min()), float(x.max()), float(y.max())
+
+    def translate(self, dx, dy):
+        """
+        Returns a copy of the paths moved by (dx, dy).
+
+        Args:
+            dx (float): The offset along X.
+            dy (float): The offset along Y.
+
+        Returns:
+            PathSet: The translated paths.
+        """
+        centers = None if self.centers is None else self.centers + (dx, dy)
+        return PathSet(self.coords + (dx, dy), self.codes, self.offsets, centers)
+
+    def to_points(self):
+        """
+        Returns the paths as lists of ('move' | 'line', x, y) tuples.
+
+        Returns:
+            list: One list of point tuples per path. Arc centers are
+                not included.
+        """
+        names = [CODE_NAMES[code] for code in self.codes.tolist()]
+        points = list(zip(names, self.coords[:, 0].tolist(), self.coords[:, 1].tolist()))
+        offsets = self.offsets.tolist()
+        return [points[offsets[i]:offsets[i + 1]] for i in range(len(self))]
+
+
+def as_pathset(paths):
+    """
+    Returns paths as a PathSet, converting lists of point tuples or joining
+    a list of PathSets if needed.
+
+    Args:
+        paths (PathSet | list): The paths to convert.
+
+    Returns:
+        PathSet: The paths stored as arrays.
+    """
+    if isinstance(paths, PathSet):
+        return paths
+    if paths and all(isinstance(path, PathSet) for path in paths):
+        return PathSet.concatenate(paths)
+    return PathSet.from_points(paths)
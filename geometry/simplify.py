@@ -0,0 +1,104 @@
+"""
+Polyline simplification (Ramer-Douglas-Peucker)
+
+Removes points that lie within a tolerance of the line between their
+neighbours that are kept, so near-collinear runs from traced artwork become
+a few long moves. The recursion is run level by level: every open interval
+of every path is split at its farthest point in the same NumPy pass, so the
+number of Python iterations is the depth of the recursion, not the number
+of points.
+
+Only points inside a run of line moves can be removed; travel moves, arcs
+and the points arcs start from are kept as they are.
+"""
+import numpy as np
+
+from geometry.pathset import PathSet, LINE
+
+DEFAULT_SIMPLIFY_TOLERANCE = 0.02  # mm
+
+
+def _segment_distances(points, starts, ends):
+    """
+    Returns the distance of each point to the segment from start to end.
+    """
+    direction = ends - starts
+    length2 = np.einsum('ij,ij->i', direction, direction)
+    rel = points - starts
+    t = np.einsum('ij,ij->i', rel, direction) / np.where(length2 == 0, 1, length2)
+    t = np.clip(t, 0, 1)
+    offset = rel - t[:, None] * direction
+    return np.hypot(offset[:, 0], offset[:, 1])
+
+
+def simplify_mask(coords, removable, tolerance):
+    """
+    Returns which points Ramer-Douglas-Peucker keeps.
+
+    Args:
+        coords (np.ndarray): (N, 2) points.
+        removable (np.ndarray): (N,) boolean mask of points that may be
+            removed; every other point is an anchor that is always kept.
+        tolerance (float): The maximum distance between a removed point and
+            the simplified polyline.
+
+    Returns:
+        np.ndarray: (N,) boolean mask of the points to keep.
+    """
+    keep = ~removable
+    anchors = np.flatnonzero(keep)
+    if len(anchors) < 2:
+        return keep
+    # Intervals between consecutive anchors with points in between
+    lo = anchors[:-1]
+    hi = anchors[1:]
+    while True:
+        open_ = hi - lo > 1
+        lo = lo[open_]
+        hi = hi[open_]
+        if not len(lo):
+            return keep
+        sizes = hi - lo - 1
+        interval = np.repeat(np.arange(len(lo)), sizes)
+        first = np.cumsum(sizes) - sizes
+        index = np.arange(len(interval)) - np.repeat(first, sizes) + lo[interval] + 1
+        distance = _segment_distances(coords[index], coords[lo[interval]], coords[hi[interval]])
+        farthest = np.maximum.reduceat(distance, first)
+        split = farthest > tolerance
+        # Index of the first point at the maximum distance of each interval
+        at_max = distance == np.repeat(farthest, sizes)
+        where = np.minimum.reduceat(np.where(at_max, index, len(coords)), first)
+        middle = where[split]
+        keep[middle] = True
+        lo, hi = np.concatenate([lo[split], middle]), np.concatenate([middle, hi[split]])
+
+
+def simplify_paths(paths, tolerance=DEFAULT_SIMPLIFY_TOLERANCE):
+    """
+    Simplifies the line runs of all paths.
+
+    Args:
+        paths (PathSet): The paths to simplify.
+        tolerance (float): The maximum distance between a removed point and
+            the simplified polyline, in the units of the paths.
+
+    Returns:
+        PathSet: The simplified paths.
+    """
+    codes = paths.codes
+    count = len(codes)
+    if not count:
+        return paths
+    # A point can go if it is a line move followed by a line move of the
+    # same path, so every run keeps its first and last point
+    removable = codes == LINE
+    removable[-1] = False
+    removable[:-1] &= codes[1:] == LINE
+    removable[paths.offsets[1:] - 1] = False
+    removable[paths.offsets[:-1][paths.offsets[:-1] < count]] = False
+
+    keep = simplify_mask(paths.coords, removable, tolerance)
+    kept = np.zeros(count + 1, dtype=np.int64)
+    kept[1:] = np.cumsum(keep)
+    centers = None if paths.centers is None else paths.centers[keep]
+    return PathSet(paths.coords[keep], codes[keep], kept[paths.offsets], centers)
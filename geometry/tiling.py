@@ -0,0 +1,62 @@
+"""
+Placing several objects on the bed
+
+Every object is placed by its bounding box (shelf packing): the boxes go
+tallest first, left to right along a row, and a box that doesn't fit at the
+end of the row starts a new row on top of it. The packed block is then
+centred on the bed.
+
+The objects are printed row by row, back and forth, so the nozzle moves on
+to the neighbouring object instead of going back across the bed.
+"""
+import numpy as np
+
+DEFAULT_SPACING = 5.0  # mm between the boxes of two objects
+
+
+def pack_boxes(sizes, bed, spacing=DEFAULT_SPACING):
+    """
+    Returns where to put boxes on the bed, and the order to print them in.
+
+    Args:
+        sizes (np.ndarray): (N, 2) widths and heights of the boxes.
+        bed (tuple): (x_min, y_min, x_max, y_max) of the bed.
+        spacing (float): The gap between two boxes.
+
+    Returns:
+        tuple: (corners, order) where corners is the (N, 2) lower left corner
+            of every box, in the order of sizes, and order the indices of the
+            boxes in print order.
+
+    Raises:
+        ValueError: If the boxes don't all fit on the bed.
+    """
+    sizes = np.asarray(sizes, dtype=np.float64).reshape(-1, 2)
+    width, height = bed[2] - bed[0], bed[3] - bed[1]
+    corners = np.zeros((len(sizes), 2))
+    rows = []
+    x = y = row_height = 0.0
+    for index in np.argsort(-sizes[:, 1], kind="stable").tolist():
+        w, h = sizes[index]
+        if rows and x + w > width:
+            y += row_height + spacing
+            x = row_height = 0.0
+            rows.append([])
+        if not rows:
+            rows.append([])
+        if x + w > width or y + h > height:
+            placed = sum(len(row) for row in rows)
+            raise ValueError(f"only {placed} of {len(sizes)} objects fit on the bed "
+                             f"X {bed[0]:g}..{bed[2]:g} Y {bed[1]:g}..{bed[3]:g} "
+                             f"{spacing:g} mm apart")
+        corners[index] = (x, y)
+        rows[-1].append(index)
+        x += w + spacing
+        row_height = max(row_height, h)
+    if not len(sizes):
+        return corners, np.zeros(0, dtype=np.int64)
+    block = (corners + sizes).max(axis=0)
+    corners += (bed[0] + (width - block[0]) / 2, bed[1] + (height - block[1]) / 2)
+    # Back and forth: odd rows are printed right to left
+    order = [index for number, row in enumerate(rows) for index in (row[::-1] if number % 2 else row)]
+    return corners, np.array(order, dtype=np.int64)
@@ -0,0 +1,610 @@
+"""
+Perimeters (walls) around closed paths by polygon offsetting
+
+Every closed piece of a path (see geometry.infill.closed_loops) is offset
+by whole line widths, into the region the path fills or out of it, to give
+the extra walls printed next to the outline. Holes whose outline runs the
+other way move the other way, so inner walls always go into the material.
+
+All loops of all paths are offset at once: every vertex moves to where the
+offset edges before and after it meet (a miter), or, where the offset
+opens a gap on the outside of a corner, gets a bevel or an arc of points.
+The vertex counts differ per vertex, so the output is laid out with
+np.repeat instead of a loop.
+
+An offset loop crosses itself where the offset is larger than the features
+of the outline (a swallowtail at an inner corner, a narrow neck pinched
+shut). Crossings are found with a uniform grid: every segment is put in
+the cells of its bounding box and only segments of the same loop that
+share a cell are tested, so thousands of small contours cost about as much
+as their segments, not the square of them. Only the few loops that cross
+themselves are split into simple loops in Python; loops that turned around
+(they wind against their outline) or shrank to nothing have collapsed and
+are dropped. A convex loop offset past its inradius comes out turned half
+a turn about its centre, which keeps its winding and crosses nothing, so a
+loop that comes closer to its outline than the offset is dropped as well.
+"""
+import math
+
+import numpy as np
+
+from geometry.flatten import DEFAULT_TOLERANCE
+from geometry.infill import closed_loops
+from geometry.pathset import PathSet, MOVE, LINE
+
+JOINS = ("miter", "round")
+DEFAULT_MITER_LIMIT = 2.0  # longest miter in offset distances before it is beveled
+MAX_JOIN_POINTS = 64  # points of a round join
+PARALLEL_EPSILON = 1e-9  # 1 + cosine of the turn below which a corner is a reversal
+CONVEX_EPSILON = 1e-12  # radians of a turn that counts as straight
+CLEARANCE_SAMPLES = 16  # points of a split off loop compared with its outline
+TOUCH_EPSILON = 1e-7  # mm between a point and a segment it counts as lying on
+
+
+def loop_areas(coords, offsets):
+    """
+    Returns the signed area of rings of points, positive counterclockwise.
+
+    Args:
+        coords (np.ndarray): (N, 2) points, see closed_loops().
+        offsets (np.ndarray): (L + 1,) start of every ring in coords; the
+            last point of a ring equals its first.
+
+    Returns:
+        np.ndarray: (L,) areas.
+    """
+    if len(offsets) < 2:
+        return np.zeros(0)
+    cross = np.zeros(len(coords))
+    cross[1:] = coords[:-1, 0] * coords[1:, 1] - coords[1:, 0] * coords[:-1, 1]
+    cross[offsets[:-1]] = 0.0  # no edge runs into the first point of a ring
+    sums = np.add.reduceat(np.append(cross, 0.0), offsets[:-1])
+    sums[offsets[:-1] == offsets[1:]] = 0.0
+    return sums / 2
+
+
+def _polygons(coords, offsets):
+    """
+    Returns rings as polygons, without the closing point and without
+    edges of zero length: (vertices, offsets, kept ring indices). Rings of
+    fewer than 3 vertices are left out.
+    """
+    ring = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    keep = np.ones(len(coords), dtype=bool)
+    keep[offsets[1:] - 1] = False
+    # A vertex that repeats the one before it adds a zero length edge
+    same = np.zeros(len(coords), dtype=bool)
+    same[1:] = np.all(coords[1:] == coords[:-1], axis=1) & (ring[1:] == ring[:-1])
+    keep &= ~same
+    counts = np.bincount(ring[keep], minlength=len(offsets) - 1)
+    kept = np.flatnonzero(counts >= 3)
+    keep &= np.isin(ring, kept)
+    vertices = coords[keep]
+    polygon_offsets = np.zeros(len(kept) + 1, dtype=np.int64)
+    polygon_offsets[1:] = np.cumsum(counts[kept])
+    return vertices, polygon_offsets, kept
+
+
+def offset_polygons(vertices, offsets, distances, join="miter", miter_limit=DEFAULT_MITER_LIMIT,
+                    tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns every polygon moved to the left of its edges by its distance
+    (to the right for negative distances). The result can cross itself,
+    see clean_loops().
+
+    Args:
+        vertices (np.ndarray): (N, 2) polygon vertices, without the closing
+            point and without zero length edges.
+        offsets (np.ndarray): (P + 1,) start of every polygon in vertices.
+        distances (np.ndarray): (P,) offset of every polygon.
+        join (str): 'miter' for sharp corners, beveled beyond miter_limit,
+            or 'round' for arcs around the corners where the offset opens a
+            gap.
+        miter_limit (float): The longest miter, in offset distances.
+        tolerance (float): The largest distance between a round join and
+            its arc.
+
+    Returns:
+        tuple: (coords, offsets) of the offset polygons as rings, the last
+            point of a ring equal to its first.
+    """
+    if join not in JOINS:
+        raise ValueError(f"join must be one of {', '.join(JOINS)}, not {join!r}")
+    count = len(vertices)
+    polygon = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    distance = np.asarray(distances, dtype=np.float64)[polygon]
+    index = np.arange(count)
+    previous = index - 1
+    previous[offsets[:-1]] = offsets[1:] - 1
+    following = index + 1
+    following[offsets[1:] - 1] = offsets[:-1]
+
+    # Directions and left normals of the edges into and out of every vertex
+    edge_in = vertices - vertices[previous]
+    edge_in /= np.hypot(edge_in[:, 0], edge_in[:, 1])[:, None]
+    edge_out = edge_in[following]
+    normal_in = np.column_stack([-edge_in[:, 1], edge_in[:, 0]])
+    normal_out = np.column_stack([-edge_out[:, 1], edge_out[:, 0]])
+    cos = np.einsum("ij,ij->i", edge_in, edge_out)
+    sin = edge_in[:, 0] * edge_out[:, 1] - edge_in[:, 1] * edge_out[:, 0]
+
+    # The offset edges meet on the inside of a corner; on the outside
+    # (turning away from the offset) they leave a gap that is joined
+    reversal = 1 + cos < PARALLEL_EPSILON
+    gap = (distance * sin < 0) | reversal
+    with np.errstate(divide="ignore", invalid="ignore"):
+        miter = (normal_in + normal_out) / (1 + cos)[:, None]
+        miter_length = np.sqrt(2 / (1 + cos))
+    turn = np.arctan2(sin, cos)
+    # A reversal turns around the tip, on the side of the offset
+    turn[reversal] = -math.pi * np.sign(distance[reversal])
+    rounded = gap if join == "round" else np.zeros(count, dtype=bool)
+    # Long miters are cut off; on the inside of a sharp corner that leaves
+    # a small crossing for clean_loops() instead of a far spike
+    beveled = ~rounded & ((miter_length > miter_limit) | reversal)
+    sizes = np.where(beveled, 2, 1).astype(np.int64)
+    if rounded.any():
+        step = 2 * np.arccos(np.clip(1 - tolerance / np.maximum(np.abs(distance), tolerance), -1, 1))
+        steps = np.clip(np.ceil(np.abs(turn) / np.maximum(step, 1e-9)), 1, MAX_JOIN_POINTS)
+        sizes[rounded] = steps[rounded].astype(np.int64) + 1
+    joined = rounded | beveled
+
+    # Lay out the points of every vertex: a miter, or a bevel or an arc
+    # from the end of the offset edge before to the start of the one after
+    vertex = np.repeat(index, sizes)
+    first = np.cumsum(sizes) - sizes
+    within = np.arange(len(vertex)) - first[vertex]
+    points = vertices[vertex] + distance[vertex, None] * miter[vertex]
+    arc = joined[vertex]
+    fraction = within[arc] / (sizes[vertex[arc]] - 1)
+    angle = np.arctan2(normal_in[vertex[arc], 1], normal_in[vertex[arc], 0]) + turn[vertex[arc]] * fraction
+    points[arc] = vertices[vertex[arc]] + distance[vertex[arc], None] * np.column_stack(
+        [np.cos(angle), np.sin(angle)])
+
+    point_offsets = np.zeros(len(offsets), dtype=np.int64)
+    if count:
+        point_offsets[1:] = np.cumsum(np.add.reduceat(sizes, offsets[:-1]))
+    return _rings(points, point_offsets)
+
+
+def convex_rings(coords, offsets):
+    """
+    Returns which rings are convex: every corner turns the same way (or
+    not at all) and the turns add up to one full turn.
+
+    Args:
+        coords (np.ndarray): (N, 2) ring points, see offset_polygons().
+        offsets (np.ndarray): (L + 1,) start of every ring in coords.
+
+    Returns:
+        np.ndarray: (L,) boolean mask of the convex rings.
+    """
+    rings = len(offsets) - 1
+    sizes = np.diff(offsets)
+    ring = np.repeat(np.arange(rings), sizes)
+    edges = np.zeros_like(coords)
+    edges[1:] = coords[1:] - coords[:-1]
+    # The edge into the first point of a ring is the one into its last
+    edges[offsets[:-1][sizes > 0]] = edges[offsets[1:][sizes > 0] - 1]
+    following = np.roll(edges, -1, axis=0)
+    corner = np.ones(len(coords), dtype=bool)
+    corner[offsets[1:][sizes > 0] - 1] = False
+    turns = np.where(corner, np.arctan2(edges[:, 0] * following[:, 1] - edges[:, 1] * following[:, 0],
+                                        np.einsum("ij,ij->i", edges, following)), 0.0)
+    left = np.bincount(ring, turns > CONVEX_EPSILON, minlength=rings)
+    right = np.bincount(ring, turns < -CONVEX_EPSILON, minlength=rings)
+    total = np.bincount(ring, turns, minlength=rings)
+    return ((left == 0) | (right == 0)) & (np.abs(np.abs(total) - 2 * math.pi) < 1e-6) & (sizes > 3)
+
+
+def crossing_segments(coords, offsets):
+    """
+    Returns the pairs of segments of the same ring that cross, found with a
+    uniform grid over the segments.
+
+    Args:
+        coords (np.ndarray): (N, 2) ring points, see offset_polygons().
+        offsets (np.ndarray): (L + 1,) start of every ring in coords.
+
+    Returns:
+        tuple: (first, second) arrays of the indices (in coords) of the
+            points that end the crossing segments, first < second.
+    """
+    empty = np.empty(0, dtype=np.int64)
+    ring = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    segment = np.ones(len(coords), dtype=bool)
+    segment[offsets[:-1]] = False
+    # A convex ring (it turns one way, once around) can't meet itself
+    segment &= ~convex_rings(coords, offsets)[ring]
+    ends = np.flatnonzero(segment)
+    if len(ends) < 4:
+        return empty, empty
+    starts = coords[ends - 1]
+    stops = coords[ends]
+    low = np.minimum(starts, stops)
+    high = np.maximum(starts, stops)
+
+    a, b = _box_pairs(low, high, ring[ends])
+    # Neighbouring segments share a point; the first and last of a ring too
+    ring_first = offsets[:-1][ring[ends[a]]] + 1
+    ring_last = offsets[1:][ring[ends[a]]] - 1
+    neighbours = (ends[b] == ends[a] + 1) | ((ends[a] == ring_first) & (ends[b] == ring_last))
+    a, b = a[~neighbours], b[~neighbours]
+    # The segments cross (each one's ends lie on both sides of the other)
+    # or one ends on the other, as where offsets of parallel edges overlap
+    side_b0 = _cross(starts[a], stops[a], starts[b])
+    side_b1 = _cross(starts[a], stops[a], stops[b])
+    side_a0 = _cross(starts[b], stops[b], starts[a])
+    side_a1 = _cross(starts[b], stops[b], stops[a])
+    crossing = (side_b0 * side_b1 < 0) & (side_a0 * side_a1 < 0)
+    for point, segment in ((starts[b], a), (stops[b], a), (starts[a], b), (stops[a], b)):
+        crossing |= _distance(point, starts[segment], stops[segment]) <= TOUCH_EPSILON
+    return ends[a[crossing]], ends[b[crossing]]
+
+
+def _box_pairs(low, high, groups, split=None):
+    """
+    Returns the pairs of boxes of the same group that overlap, (a, b) with
+    a < b, from a uniform grid: only boxes that share a cell are compared.
+    With split, only pairs of a box before split and one from split on.
+    """
+    empty = np.empty(0, dtype=np.int64)
+    if not len(low):
+        return empty, empty
+    # Cells about as large as a box (of the second set with split); larger
+    # when large boxes would fill too many of them
+    sized = slice(None) if split is None else slice(split, None)
+    size = max(float(np.mean(np.max(high[sized] - low[sized], axis=1))) if len(low[sized]) else 0.0, 1e-9)
+    origin = low.min(axis=0) - TOUCH_EPSILON
+    while True:
+        cell_low = np.floor((low - TOUCH_EPSILON - origin) / size).astype(np.int64)
+        cell_high = np.floor((high + TOUCH_EPSILON - origin) / size).astype(np.int64)
+        spans = cell_high - cell_low + 1
+        cells = spans[:, 0] * spans[:, 1]
+        if cells.sum() <= 8 * len(low):
+            break
+        size *= 2
+
+    # One entry per box and cell, grouped by group and cell, boxes of the
+    # first set first
+    entry = np.repeat(np.arange(len(low)), cells)
+    within = np.arange(len(entry)) - np.repeat(np.cumsum(cells) - cells, cells)
+    cell_x = cell_low[entry, 0] + within % spans[entry, 0]
+    cell_y = cell_low[entry, 1] + within // spans[entry, 0]
+    columns = int(cell_high[:, 0].max()) + 1
+    key = (groups[entry] * (int(cell_high[:, 1].max()) + 1) + cell_y) * columns + cell_x
+    order = np.argsort(key, kind="stable")
+    entry, key = entry[order], key[order]
+    cell_x, cell_y = cell_x[order], cell_y[order]
+    new_group = np.ones(len(entry), dtype=bool)
+    new_group[1:] = key[1:] != key[:-1]
+    group_start = np.flatnonzero(new_group)
+    group_end = np.append(group_start[1:], len(entry))
+    sizes = group_end - group_start
+
+    # Every pair of boxes in a cell, in the first cell both are in only
+    if split is None:
+        partner_start = np.arange(len(entry)) + 1
+        partners = np.repeat(group_end, sizes) - partner_start
+    else:
+        second = np.add.reduceat(entry >= split, group_start)
+        partner_start = np.repeat(group_end - second, sizes)
+        partners = np.where(entry < split, np.repeat(second, sizes), 0)
+    first = np.repeat(np.arange(len(entry)), partners)
+    other = np.repeat(partner_start, partners) + np.arange(len(first)) \
+        - np.repeat(np.cumsum(partners) - partners, partners)
+    a, b = entry[first], entry[other]
+    shared = np.maximum(cell_low[a], cell_low[b])
+    once = (shared[:, 0] == cell_x[first]) & (shared[:, 1] == cell_y[first])
+    a, b = a[once], b[once]
+    a, b = np.minimum(a, b), np.maximum(a, b)
+    overlap = np.all((low[a] <= high[b] + TOUCH_EPSILON) & (low[b] <= high[a] + TOUCH_EPSILON), axis=1)
+    return a[overlap], b[overlap]
+
+
+def _cross(origin, to, point):
+    return ((to[:, 0] - origin[:, 0]) * (point[:, 1] - origin[:, 1])
+            - (to[:, 1] - origin[:, 1]) * (point[:, 0] - origin[:, 0]))
+
+
+def _distance(points, starts, stops):
+    """
+    Returns the distance of every point from its segment.
+    """
+    edge = stops - starts
+    length2 = np.einsum("ij,ij->i", edge, edge)
+    t = np.clip(np.einsum("ij,ij->i", points - starts, edge) / np.maximum(length2, 1e-300), 0, 1)
+    nearest = starts + t[:, None] * edge
+    return np.hypot(points[:, 0] - nearest[:, 0], points[:, 1] - nearest[:, 1])
+
+
+def meeting_points(coords, first, second):
+    """
+    Returns where the segments of pairs cross or touch, once on each of the
+    two segments: at the crossing, or at the end of one segment that lies
+    on the other.
+
+    Args:
+        coords (np.ndarray): (N, 2) ring points.
+        first (np.ndarray): (M,) indices of the points that end the first
+            segments of the pairs, see crossing_segments().
+        second (np.ndarray): (M,) the same for the second segments.
+
+    Returns:
+        tuple: (positions, points, touched) where a position is the index
+            of the point a segment starts from plus how far along the
+            segment the meeting point is, as a fraction of the segment,
+            and touched are the indices of the ends of segments that lie
+            on the other segment.
+    """
+    starts = {"a": coords[first - 1], "b": coords[second - 1]}
+    edges = {"a": coords[first] - starts["a"], "b": coords[second] - starts["b"]}
+    segments = {"a": first, "b": second}
+    positions = []
+    points = []
+    touched = []
+    # The ends of each segment that lie on the other
+    for index, on in ((second - 1, "a"), (second, "a"), (first - 1, "b"), (first, "b")):
+        point = coords[index]
+        edge = edges[on]
+        t = np.einsum("ij,ij->i", point - starts[on], edge) / np.einsum("ij,ij->i", edge, edge)
+        nearest = starts[on] + np.clip(t, 0, 1)[:, None] * edge
+        touch = np.hypot(*(point - nearest).T) <= TOUCH_EPSILON
+        inside = (t > 0) & (t < 1)
+        positions.append(segments[on][touch & inside] - 1 + t[touch & inside])
+        points.append(point[touch & inside])
+        touched.append(index[touch])
+    # Crossings away from the ends
+    r, s = edges["a"], edges["b"]
+    gap = starts["b"] - starts["a"]
+    denominator = r[:, 0] * s[:, 1] - r[:, 1] * s[:, 0]
+    skew = np.abs(denominator) > TOUCH_EPSILON * np.hypot(*r.T) * np.hypot(*s.T)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (gap[:, 0] * s[:, 1] - gap[:, 1] * s[:, 0]) / denominator
+        u = (gap[:, 0] * r[:, 1] - gap[:, 1] * r[:, 0]) / denominator
+    crossing = skew & (t > 0) & (t < 1) & (u > 0) & (u < 1)
+    point = starts["a"][crossing] + t[crossing, None] * r[crossing]
+    positions += [first[crossing] - 1 + t[crossing], second[crossing] - 1 + u[crossing]]
+    points += [point, point]
+    return np.concatenate(positions), np.concatenate(points), np.concatenate(touched)
+
+
+def _split_loop(keys, nodes, length):
+    """
+    Splits a ring of length points (without its closing point) at the
+    points where it meets itself, nodes[i] being the index of the point
+    keys[i] (a meeting point comes twice, once on each segment), into
+    loops that don't. Returns the loops as arrays of point indices, the
+    last one equal to the first.
+    """
+    # Walk the ring from node to node; coming back to a node closes the
+    # loop since it. The path is the nodes still open, each with where
+    # the walk entered and last left it
+    loops = []
+    path = [(None, 0, 0)]
+    seen = {}  # node -> its index in path
+    for key, index in zip(keys, nodes):
+        start = seen.get(key)
+        if start is None:
+            seen[key] = len(path)
+            path.append((key, index, index))
+            continue
+        runs = [np.arange(path[k][2], path[k + 1][1]) for k in range(start, len(path) - 1)]
+        loops.append(np.concatenate(runs + [np.arange(path[-1][2], index + 1)]))
+        for dropped, _, _ in path[start + 1:]:
+            del seen[dropped]
+        del path[start + 1:]
+        path[start] = (key, path[start][1], index)
+    runs = [np.arange(path[k][2], path[k + 1][1]) for k in range(len(path) - 1)]
+    loops.append(np.concatenate(runs + [np.arange(path[-1][2], length), [0]]))
+    return loops
+
+
+def clean_loops(coords, offsets, orientations, min_area, outlines=None, distances=None,
+                tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns rings split where they cross or touch themselves, without the
+    loops that run against their ring's orientation or are smaller than
+    min_area. With the outlines the rings are offsets of, a loop that comes
+    closer to its outline than the offset, less tolerance, is dropped too
+    (a ring offset past the inradius of a convex outline, a piece of the
+    offset folding over itself, or of an outline that crosses itself).
+
+    Args:
+        coords (np.ndarray): (N, 2) ring points, see offset_polygons().
+        offsets (np.ndarray): (L + 1,) start of every ring in coords.
+        orientations (np.ndarray): (L,) 1 for rings that should run
+            counterclockwise, -1 for clockwise.
+        min_area (float): The smallest area of a loop that is kept.
+        outlines (tuple): (vertices, offsets) of the polygon every ring is
+            an offset of, see offset_polygons().
+        distances (np.ndarray): (L,) offset of every ring.
+        tolerance (float): How much closer than the offset a point may be,
+            as on the chords of a round join.
+
+    Returns:
+        tuple: (coords, offsets, sources) of the loops that are left, sources
+            being the index of the ring each came from, in ascending order.
+    """
+    rings = len(offsets) - 1
+    ring = np.repeat(np.arange(rings), np.diff(offsets))
+    first, second = crossing_segments(coords, offsets)
+    crossed = np.zeros(rings, dtype=bool)
+    crossed[ring[first]] = True
+    keep = ~crossed & (loop_areas(coords, offsets) * orientations > min_area)
+    if outlines is not None and keep.any():
+        kept = np.flatnonzero(keep)
+        keep[kept] = _clear_of(*_select(coords, offsets, kept), kept, outlines,
+                               np.abs(distances) - tolerance)
+
+    # The rings that meet themselves, with the meeting points in between
+    # their points, are split one by one; there are few, and only the
+    # points where they meet themselves are visited in Python
+    positions, meetings, touched = meeting_points(coords, first, second)
+    closing = np.zeros(len(coords), dtype=bool)
+    closing[offsets[1:] - 1] = True
+    touched = np.where(closing[touched], offsets[:-1][ring[touched]], touched)
+    vertices = np.flatnonzero(crossed[ring] & ~closing)
+    positions = np.concatenate([vertices.astype(np.float64), positions])
+    order = np.argsort(positions, kind="stable")
+    sequence = np.concatenate([coords[vertices], meetings])[order]
+    node = np.concatenate([np.isin(vertices, touched), np.ones(len(meetings), dtype=bool)])[order]
+    bounds = np.searchsorted(positions[order], offsets.astype(np.float64))
+    nodes = np.flatnonzero(node)
+    node_bounds = np.searchsorted(nodes, bounds)
+    keys = list(map(tuple, sequence[nodes].tolist()))
+    pieces = []
+    sources = []
+    for source in np.flatnonzero(crossed).tolist():
+        start, stop = bounds[source], bounds[source + 1]
+        span = slice(node_bounds[source], node_bounds[source + 1])
+        loops = _split_loop(keys[span], (nodes[span] - start).tolist(), stop - start)
+        pieces += [loop + start for loop in loops]
+        sources += [source] * len(loops)
+    sources = np.array(sources, dtype=np.int64)
+    piece_offsets = np.zeros(len(pieces) + 1, dtype=np.int64)
+    piece_offsets[1:] = np.cumsum([len(loop) for loop in pieces])
+    piece_coords = sequence[np.concatenate(pieces)] if pieces else np.empty((0, 2))
+    # A meeting point can fall on a point of the ring
+    piece_coords, piece_offsets = _drop_repeats(piece_coords, piece_offsets)
+    valid = loop_areas(piece_coords, piece_offsets) * orientations[sources] > min_area
+    if outlines is not None and valid.any():
+        valid[valid] = _clear_of(*_select(piece_coords, piece_offsets, np.flatnonzero(valid)),
+                                 sources[valid], outlines, np.abs(distances) - tolerance)
+
+    # The simple rings that are kept and the pieces, in the order of the rings
+    all_coords = np.concatenate([coords, piece_coords])
+    all_offsets = np.concatenate([offsets[:-1], piece_offsets + len(coords)])
+    all_sources = np.concatenate([np.arange(rings), sources])
+    selected = np.flatnonzero(np.concatenate([keep, valid]))
+    selected = selected[np.argsort(all_sources[selected], kind="stable")]
+    return (*_select(all_coords, all_offsets, selected), all_sources[selected])
+
+
+def _clear_of(coords, offsets, rings, outlines, distances):
+    """
+    Returns which loops have no point closer than its distance to the
+    outline of its ring. Up to CLEARANCE_SAMPLES points of a loop are
+    compared, each only with nearby outline edges.
+    """
+    vertices, outline_offsets = outlines
+    sizes = np.diff(offsets)
+    # Points spread over each loop, not its first (where it was split off)
+    samples = np.minimum(sizes - 2, CLEARANCE_SAMPLES).clip(0)
+    loop = np.repeat(np.arange(len(sizes)), samples)
+    k = np.arange(len(loop)) - np.repeat(np.cumsum(samples) - samples, samples)
+    points = coords[offsets[:-1][loop] + 1 + k * (sizes[loop] - 2) // samples[loop]]
+    point_ring = rings[loop]
+    reach = np.maximum(np.asarray(distances, dtype=np.float64)[point_ring], 0.0)
+
+    used = np.unique(rings)
+    outline, used_offsets = _select(vertices, outline_offsets, used)
+    edge_ring = np.repeat(used, np.diff(used_offsets))
+    following = np.arange(1, len(outline) + 1)
+    following[used_offsets[1:] - 1] = used_offsets[:-1]
+    starts, stops = outline, outline[following]
+    low = np.concatenate([points - reach[:, None], np.minimum(starts, stops)])
+    high = np.concatenate([points + reach[:, None], np.maximum(starts, stops)])
+    a, b = _box_pairs(low, high, np.concatenate([point_ring, edge_ring]), len(points))
+    b -= len(points)
+    close = _distance(points[a], starts[b], stops[b]) < reach[a] - TOUCH_EPSILON
+    return np.bincount(loop[a[close]], minlength=len(sizes)) == 0
+
+
+def _drop_repeats(coords, offsets):
+    """
+    Returns rings without the points that repeat the point before them.
+    """
+    ring = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    keep = np.ones(len(coords), dtype=bool)
+    keep[1:] = np.any(coords[1:] != coords[:-1], axis=1) | (ring[1:] != ring[:-1])
+    kept_offsets = np.zeros(len(offsets), dtype=np.int64)
+    kept_offsets[1:] = np.cumsum(np.bincount(ring[keep], minlength=len(offsets) - 1))
+    return coords[keep], kept_offsets
+
+
+def _select(coords, offsets, rings):
+    """
+    Returns the rings with the given indices, in that order, as (coords,
+    offsets).
+    """
+    sizes = offsets[1:][rings] - offsets[:-1][rings]
+    selected_offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+    selected_offsets[1:] = np.cumsum(sizes)
+    index = np.repeat(offsets[:-1][rings] - selected_offsets[:-1], sizes) + np.arange(int(selected_offsets[-1]))
+    return coords[index], selected_offsets
+
+
+def perimeters(paths, count, line_width, outside=False, join="miter",
+               miter_limit=DEFAULT_MITER_LIMIT, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns the extra walls of the closed pieces of the paths: copies of
+    every outline line_width, 2 line_width, ... apart, into the region the
+    path fills or out of it. The outline itself is the first wall and is
+    not returned.
+
+    Args:
+        paths (PathSet): The paths whose closed pieces get walls.
+        count (int): The number of walls, counting the outline.
+        line_width (float): The width of an extruded line, the distance
+            between walls.
+        outside (bool): Whether the walls go around the outline instead of
+            into the region.
+        join (str): 'miter' or 'round' corners, see offset_polygons().
+        miter_limit (float): The longest miter, in offset distances.
+        tolerance (float): The largest distance between an arc of the
+            outline or of a round join and its chords.
+
+    Returns:
+        PathSet: One closed path per wall loop, the walls of a path next to
+            each other, in the order of paths and from the outline out.
+    """
+    if count < 1:
+        raise ValueError(f"the wall count must be at least 1, not {count}")
+    if count == 1:
+        return PathSet.from_arrays([], [])
+    coords, offsets, owners = closed_loops(paths, tolerance)
+    vertices, offsets, kept = _polygons(coords, offsets)
+    if not len(kept):
+        return PathSet.from_arrays([], [])
+    owners = owners[kept]
+    areas = loop_areas(*_rings(vertices, offsets))
+    # A path fills to the left of its largest loop when that runs
+    # counterclockwise; its other loops move the same way along their edges
+    largest = np.lexsort((np.abs(areas), owners))
+    last = np.append(owners[largest][1:] != owners[largest][:-1], True)
+    fill_side = np.zeros(len(paths))
+    fill_side[owners[largest][last]] = np.sign(areas[largest][last])
+    orientations = np.sign(areas)
+    loops = len(kept)
+
+    # All walls of all loops in one batch, wall after wall
+    walls = np.repeat(np.arange(1, count), loops)
+    polygon = np.tile(np.arange(loops), count - 1)
+    batch, batch_offsets = _select(vertices, offsets, polygon)
+    distances = walls * line_width * fill_side[owners[polygon]] * (-1 if outside else 1)
+    rings, ring_offsets = offset_polygons(batch, batch_offsets, distances, join,
+                                          miter_limit, tolerance)
+    rings, ring_offsets, sources = clean_loops(rings, ring_offsets, orientations[polygon],
+                                               line_width**2 / 4, (batch, batch_offsets), distances,
+                                               tolerance)
+
+    # Walls of a path together, each loop one path
+    order = np.lexsort((walls[sources], owners[polygon[sources]]))
+    coords, path_offsets = _select(rings, ring_offsets, order)
+    codes = np.full(len(coords), LINE, dtype=np.uint8)
+    codes[path_offsets[:-1]] = MOVE
+    return PathSet(coords, codes, path_offsets)
+
+
+def _rings(vertices, offsets):
+    """
+    Returns polygons as rings, with their first vertex repeated at the end.
+    """
+    sizes = np.diff(offsets)
+    ring_offsets = np.zeros(len(offsets), dtype=np.int64)
+    ring_offsets[1:] = np.cumsum(sizes + 1)
+    rings = np.empty((int(ring_offsets[-1]), 2))
+    rings[np.arange(len(vertices)) + np.repeat(np.arange(len(sizes)), sizes)] = vertices
+    rings[ring_offsets[1:] - 1] = vertices[offsets[:-1]]
+    return rings, ring_offsets
@@ -0,0 +1,201 @@
+"""
+Per-stage timers and counters for the conversion pipeline
+
+A Profiler is passed down the pipeline like the writer and the cache. Every
+stage runs inside `with profiler.stage(name) as stage:` and reports what it
+handled with stage.count(points=..., bytes=...). Stages may nest (the layers
+are generated while the file is written); the time of a stage is its own,
+without the stages nested in it, so the stage times add up to the total.
+
+NULL_PROFILER, the default everywhere, hands out one shared stage object
+whose methods do nothing, so a disabled profiler costs a method call per
+stage and no clock reads.
+"""
+import json
+import time
+
+COUNTERS = ("paths", "segments", "points", "bytes")
+OTHER = "other"  # time of a conversion outside every named stage
+
+
+class _Stage:
+    """
+    One timed run of a stage; the context manager returned by
+    Profiler.stage().
+    """
+    __slots__ = ("profiler", "name", "started", "nested")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.nested = 0.0
+        self.profiler._open.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        open_stages = self.profiler._open
+        open_stages.pop()
+        if open_stages:
+            open_stages[-1].nested += elapsed
+        entry = self.profiler._entry(self.name)
+        entry["calls"] += 1
+        entry["seconds"] += elapsed - self.nested
+        return False
+
+    def count(self, **counts):
+        """
+        Adds to the counters of the stage, e.g. count(points=1000).
+        """
+        self.profiler.count(self.name, **counts)
+
+
+class Profiler:
+    """
+    Collects the time, number of runs and counters of every stage.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}  # name -> {"calls", "seconds", "counts"} in first-run order
+        self._open = []
+
+    def _entry(self, name):
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = {"calls": 0, "seconds": 0.0, "counts": {}}
+        return entry
+
+    def stage(self, name):
+        """
+        Returns a context manager that times one run of a stage.
+
+        Args:
+            name (str): The stage, e.g. 'tokenize'.
+
+        Returns:
+            _Stage: Use as `with profiler.stage(name) as stage:`.
+        """
+        return _Stage(self, name)
+
+    def count(self, name, **counts):
+        """
+        Adds to the counters of a stage.
+
+        Args:
+            name (str): The stage.
+            **counts (int): Amounts to add, e.g. points=1000, bytes=4096.
+        """
+        totals = self._entry(name)["counts"]
+        for counter, amount in counts.items():
+            totals[counter] = totals.get(counter, 0) + amount
+
+    def merge(self, data):
+        """
+        Adds the stages of another profile, e.g. one run in a worker process.
+
+        Args:
+            data (dict): The result of to_dict() of the other profiler.
+        """
+        for name, stage in data["stages"].items():
+            entry = self._entry(name)
+            entry["calls"] += stage["calls"]
+            entry["seconds"] += stage["seconds"]
+            self.count(name, **stage["counts"])
+
+    def _ordered(self):
+        # The leftover time reads best after the stages it is left over from
+        return sorted(self.stages.items(), key=lambda item: item[0] == OTHER)
+
+    def to_dict(self):
+        """
+        Returns the profile as a JSON-serializable dict: the total time, and
+        for every stage its runs, time, share of the total, counters and
+        throughput of each counter per second.
+        """
+        total = sum(entry["seconds"] for entry in self.stages.values())
+        stages = {}
+        for name, entry in self._ordered():
+            seconds = entry["seconds"]
+            stages[name] = {
+                "calls": entry["calls"],
+                "seconds": seconds,
+                "share": seconds / total if total else 0.0,
+                "counts": dict(entry["counts"]),
+                "per_second": {counter: amount / seconds
+                               for counter, amount in entry["counts"].items() if seconds > 0},
+            }
+        return {"total_seconds": total, "stages": stages}
+
+    def to_json(self):
+        """
+        Returns to_dict() as indented JSON.
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_table(self):
+        """
+        Returns the profile as a text table, one row per stage.
+        """
+        data = self.to_dict()
+        width = max([len("Stage"), len("total")] + [len(name) for name in data["stages"]])
+        lines = [f"{'Stage':<{width}}  {'Calls':>6}  {'Time s':>8}  {'Share':>6}  "
+                 + "  ".join(f"{counter.capitalize():>10}" for counter in COUNTERS)
+                 + "  Throughput"]
+        for name, stage in data["stages"].items():
+            counts = stage["counts"]
+            cells = "  ".join(f"{counts[counter]:>10}" if counter in counts else f"{'':>10}"
+                              for counter in COUNTERS)
+            lines.append(f"{name:<{width}}  {stage['calls']:>6}  {stage['seconds']:>8.3f}  "
+                         f"{stage['share']:>6.1%}  {cells}  {_throughput(stage['per_second'])}")
+        lines.append(f"{'total':<{width}}  {'':>6}  {data['total_seconds']:>8.3f}")
+        return "\n".join(lines)
+
+
+def _throughput(per_second):
+    """
+    Formats the rate of the most telling counter of a stage.
+    """
+    for counter in ("bytes", "points", "segments", "paths"):
+        if counter in per_second:
+            rate = per_second[counter]
+            for scale, prefix in ((1e9, "G"), (1e6, "M"), (1e3, "k"), (1, "")):
+                if rate >= scale:
+                    break
+            if counter == "bytes":
+                return f"{rate / scale:.1f} {prefix}B/s"
+            return f"{rate / scale:.1f}{prefix} {counter}/s"
+    return ""
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def count(self, **counts):
+        pass
+
+
+class NullProfiler:
+    """
+    A profiler that records nothing, the default of every pipeline function.
+    """
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def count(self, name, **counts):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
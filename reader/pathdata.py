@@ -0,0 +1,533 @@
+"""
+Tokenizer and parser for SVG path data (the d attribute of <path>)
+
+The d string is scanned once as bytes: command letters and number starts
+are found with lookup tables and every number is converted by NumPy in a
+single call, giving the commands, the number of parameters of each command
+and one flat float64 array of all parameters. The parser then expands the
+commands into segments and resolves relative coordinates with array
+operations, so multi-megabyte path data never goes through a per-number
+Python loop.
+"""
+import re
+import warnings
+
+import numpy as np
+
+from geometry.pathset import MOVE, LINE
+from geometry.flatten import (SEGMENT_MOVE, SEGMENT_LINE, SEGMENT_CUBIC, SEGMENT_ARC,
+                              SEGMENT_COLUMNS, END, endpoint_arcs, flatten_segments,
+                              tolerance_for_size)
+
+COMMANDS = 'MmZzLlHhVvCcSsQqTtAa'
+
+# Segment kinds
+SEG_MOVE = 0
+SEG_LINE = 1
+SEG_CUBIC = 2
+SEG_SMOOTH_CUBIC = 3
+SEG_QUAD = 4
+SEG_SMOOTH_QUAD = 5
+SEG_ARC = 6
+SEG_CLOSE = 7
+
+MAX_ARITY = 7
+
+_COMMAND_RE = re.compile(r'([MmZzLlHhVvCcSsQqTtAa])')
+_NUMBER_RE = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+# A second decimal point directly after a number starts a new number (0.5.5)
+_COMPACT_DECIMAL_RE = re.compile(r'\.\d*(?=\.)')
+_EXPONENT_RE = re.compile(r'([eE]) ([+-])')
+_ARC_FLAG_POSITIONS = (3, 4)
+
+
+def _byte_table(chars):
+    table = np.zeros(256, dtype=bool)
+    table[list(chars.encode('ascii'))] = True
+    return table
+
+_IS_COMMAND = _byte_table(COMMANDS)
+_IS_DIGIT_OR_DOT = _byte_table('0123456789.')
+_IS_NUMBER_START = _byte_table('0123456789.+-')
+_IS_SIGN = _byte_table('+-')
+_IS_EXPONENT = _byte_table('eE')
+_IN_NUMBER = _byte_table('0123456789.eE+-')
+_DROP_COMMANDS = str.maketrans('', '', COMMANDS)
+_SEPARATORS = bytes.maketrans((COMMANDS + ',').encode('ascii'), b' ' * (len(COMMANDS) + 1))
+
+# Per-command lookup tables indexed by the ASCII code of the command letter
+_ARITY = np.zeros(128, dtype=np.int64)
+_KIND = np.zeros(128, dtype=np.uint8)
+_END_X = np.full(128, -1, dtype=np.int64)
+_END_Y = np.full(128, -1, dtype=np.int64)
+for _letter, _arity, _kind, _end_x, _end_y in (
+        ('M', 2, SEG_MOVE, 0, 1),
+        ('L', 2, SEG_LINE, 0, 1),
+        ('H', 1, SEG_LINE, 0, -1),
+        ('V', 1, SEG_LINE, -1, 0),
+        ('C', 6, SEG_CUBIC, 4, 5),
+        ('S', 4, SEG_SMOOTH_CUBIC, 2, 3),
+        ('Q', 4, SEG_QUAD, 2, 3),
+        ('T', 2, SEG_SMOOTH_QUAD, 0, 1),
+        ('A', 7, SEG_ARC, 5, 6),
+        ('Z', 0, SEG_CLOSE, -1, -1)):
+    for _code in (ord(_letter), ord(_letter.lower())):
+        _ARITY[_code] = _arity
+        _KIND[_code] = _kind
+        _END_X[_code] = _end_x
+        _END_Y[_code] = _end_y
+
+
+def _split_arc_numbers(text):
+    """
+    Returns the numbers of arc arguments, splitting packed flags
+    (e.g. "a5 5 0 1050 50" has the flags 1, 0 and x = 50).
+    """
+    numbers = []
+    pending = _NUMBER_RE.findall(text)
+    pending.reverse()
+    while pending:
+        token = pending.pop()
+        if len(numbers) % MAX_ARITY in _ARC_FLAG_POSITIONS and len(token) > 1 and token[0] in '01':
+            # A flag is a single digit, whatever follows it is the next number
+            pending.extend(reversed(_NUMBER_RE.findall(token[1:])))
+            token = token[0]
+        numbers.append(token)
+    return " ".join(numbers)
+
+
+def _parse_numbers(pieces):
+    """
+    Converts the argument text of all commands into one float array with a
+    NaN marker in front of each command's arguments.
+    """
+    text = " nan ".join(pieces)
+    text = text.replace(',', ' ').replace('-', ' -').replace('+', ' +')
+    for attempt in range(2):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            try:
+                return np.fromstring(text, dtype=np.float64, sep=' ')
+            except (ValueError, DeprecationWarning):
+                pass
+        # Undo the split of exponent signs and separate compact decimals
+        # (0.5.5), which are rare enough to only be handled on failure
+        text = _EXPONENT_RE.sub(r'\1\2', text)
+        text = _COMPACT_DECIMAL_RE.sub(lambda match: match.group() + ' ', text)
+    # Stray characters in the data: fall back to picking out valid numbers
+    numbers = []
+    for i, piece in enumerate(pieces):
+        if i:
+            numbers.append(np.nan)
+        numbers.extend(float(n) for n in _NUMBER_RE.findall(piece))
+    return np.array(numbers, dtype=np.float64)
+
+
+def _split_values(values):
+    """
+    Splits the marked values from _parse_numbers() into per-command
+    parameter counts and one array of parameters.
+    """
+    markers = np.flatnonzero(np.isnan(values))
+    counts = np.diff(np.append(markers, len(values))) - 1
+    return counts, np.delete(values, markers)
+
+
+def _packed_arc_commands(letters, counts, numbers):
+    """
+    Returns the indices of arc commands whose flags were read as part of a
+    longer number (e.g. "00" or "1.5"), which need the flag-aware scanner.
+    """
+    arcs = np.flatnonzero((letters == ord('A')) | (letters == ord('a')))
+    if not len(arcs):
+        return arcs
+    bad = counts[arcs] % MAX_ARITY != 0
+    groups = counts[arcs] // MAX_ARITY
+    starts = (np.cumsum(counts) - counts)[arcs]
+    group_arc = np.repeat(np.arange(len(arcs)), groups)
+    group_start = np.repeat(starts, groups) + MAX_ARITY * (
+        np.arange(groups.sum()) - np.repeat(np.cumsum(groups) - groups, groups))
+    flags = numbers[group_start[:, None] + np.array(_ARC_FLAG_POSITIONS)]
+    bad_groups = np.any((flags != 0) & (flags != 1), axis=1)
+    bad[group_arc[bad_groups]] = True
+    return arcs[bad]
+
+
+def _tokenize_bytes(path_data):
+    """
+    Fast path of the tokenizer working on the raw bytes: commands and number
+    starts are found with lookup tables, numbers that touch the previous one
+    (1-2, 0.5.5) get a space inserted and all numbers are converted in one
+    call. Returns None when the data needs the slower, more forgiving path
+    (stray characters, non-ASCII text, decimals directly after an exponent).
+    """
+    try:
+        data = path_data.encode('ascii')
+    except UnicodeEncodeError:
+        return None
+    chars = np.frombuffer(data, dtype=np.uint8)
+    positions = np.flatnonzero(_IS_COMMAND[chars])
+    starts = np.empty(len(chars), dtype=bool)
+    starts[0] = _IS_NUMBER_START[chars[0]]
+    starts[1:] = ((_IS_DIGIT_OR_DOT[chars[1:]] & ~_IN_NUMBER[chars[:-1]])
+                  | (_IS_SIGN[chars[1:]] & ~_IS_EXPONENT[chars[:-1]]))
+    # A sign right after a number starts the next one without a separator
+    signs = np.flatnonzero(_IS_SIGN[chars[1:]] & _IN_NUMBER[chars[:-1]] & ~_IS_EXPONENT[chars[:-1]]) + 1
+    # So does a second decimal point in a number (0.5.5): no number started
+    # since the previous decimal point
+    dots = np.flatnonzero(chars == ord('.'))
+    seen = np.cumsum(starts, dtype=np.int32)
+    compact = dots[1:][(seen[dots[1:]] == seen[dots[:-1]])]
+    if len(compact):
+        starts[compact] = True
+        seen = np.cumsum(starts, dtype=np.int32)
+    touching = np.union1d(signs, compact) if len(compact) else signs
+
+    total = int(seen[-1])
+    before = seen[positions] - starts[positions]
+    counts = np.diff(np.append(before, total))
+    spaced = np.frombuffer(data.translate(_SEPARATORS), dtype=np.uint8)
+    if len(touching):
+        spaced = np.insert(spaced, touching, ord(' '))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        try:
+            numbers = np.fromstring(spaced.tobytes(), dtype=np.float64, sep=' ')
+        except (ValueError, DeprecationWarning):
+            return None
+    if len(numbers) != total:
+        return None
+    # Numbers before the first command are ignored
+    return chars[positions], counts.astype(np.int64), numbers[before[0]:]
+
+
+def _tokenize_pieces(path_data, split_arcs=False):
+    """
+    Forgiving path of the tokenizer: splits the data at the commands and
+    picks out valid numbers, optionally with flag-aware arc scanning.
+    """
+    pieces = _COMMAND_RE.split(path_data)
+    letters = np.frombuffer("".join(pieces[1::2]).encode('ascii'), dtype=np.uint8)
+    pieces = pieces[0::2]
+    if split_arcs:
+        for i, letter in enumerate(letters.tolist()):
+            if letter in (ord('A'), ord('a')):
+                pieces[i + 1] = _split_arc_numbers(pieces[i + 1])
+    counts, numbers = _split_values(_parse_numbers(pieces))
+    return letters, counts, numbers
+
+
+def tokenize_path_data(path_data):
+    """
+    Tokenizes SVG path data in a single pass.
+
+    Args:
+        path_data (str): The d attribute of a path.
+
+    Returns:
+        tuple: (letters, counts, numbers) where letters is a uint8 array of
+            the ASCII codes of the commands, counts the number of parameters
+            of each command and numbers one float64 array of all parameters.
+    """
+    if not _COMMAND_RE.search(path_data):
+        return np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+    tokens = _tokenize_bytes(path_data)
+    if tokens is None:
+        tokens = _tokenize_pieces(path_data)
+    if len(_packed_arc_commands(*tokens)):
+        tokens = _tokenize_pieces(path_data, split_arcs=True)
+    return tokens
+
+
+def iter_path_tokens(path_data):
+    """
+    Yields (command, parameters) tokens of SVG path data.
+
+    Args:
+        path_data (str): The d attribute of a path.
+
+    Yields:
+        tuple: The command letter and a float64 array (a view) of its parameters.
+    """
+    letters, counts, numbers = tokenize_path_data(path_data)
+    start = 0
+    for letter, count in zip(letters.tolist(), counts.tolist()):
+        yield chr(letter), numbers[start:start + count]
+        start += count
+
+
+def _local_scan(values, absolute, run_start):
+    """
+    Resolves one coordinate axis relative to the start of each run.
+    Absolute segments set the value, relative ones add to it.
+
+    Returns:
+        tuple: (local, anchored) where local is the absolute value for
+            anchored segments (an absolute segment came earlier in the run)
+            and the offset from the run's initial point otherwise.
+    """
+    deltas = np.where(absolute, 0.0, values)
+    running = np.cumsum(deltas)
+    reset = absolute | run_start
+    base = np.where(absolute, values - running, deltas - running)
+    index = np.maximum.accumulate(np.where(reset, np.arange(len(values)), 0))
+    local = np.where(absolute, values, running + base[index])
+    return local, absolute[index]
+
+
+def path_segments(path_data):
+    """
+    Expands SVG path data into segments with absolute end points.
+
+    Args:
+        path_data (str): The d attribute of a path.
+
+    Returns:
+        tuple: (kinds, starts, ends, params, relative) where kinds holds the
+            SEG_* kind of each segment, starts and ends are (S, 2) arrays of
+            absolute start and end points, params is an (S, 7) array of the
+            raw command parameters (NaN padded) and relative marks segments
+            whose parameters are relative to their start point.
+    """
+    kinds, starts, ends, params, relative, _ = _token_segments(*tokenize_path_data(path_data))
+    return kinds, starts, ends, params, relative
+
+
+def _token_segments(letters, counts, numbers):
+    """
+    Expands tokens into segments, see path_segments(). Also returns the
+    index of the command each segment comes from.
+    """
+    arity = _ARITY[letters]
+    # Implicit repetitions: every full group of parameters is one segment
+    seg_counts = np.where(arity > 0, counts // np.maximum(arity, 1), 1)
+    seg_command = np.repeat(np.arange(len(letters)), seg_counts)
+    first_seg = np.repeat(np.cumsum(seg_counts) - seg_counts, seg_counts)
+    repeat_index = np.arange(len(seg_command)) - first_seg
+    param_offsets = np.cumsum(counts) - counts
+    seg_letters = letters[seg_command]
+    seg_arity = arity[seg_command]
+    param_start = param_offsets[seg_command] + repeat_index * seg_arity
+
+    kinds = _KIND[seg_letters].copy()
+    # Coordinate pairs after a moveto are implicit linetos
+    kinds[(kinds == SEG_MOVE) & (repeat_index > 0)] = SEG_LINE
+    relative = seg_letters >= ord('a')
+    count = len(kinds)
+    ends = np.empty((count, 2), dtype=np.float64)
+    params = np.full((count, MAX_ARITY), np.nan)
+    if not count:
+        return kinds, ends.copy(), ends, params, relative, seg_command
+
+    columns = np.arange(MAX_ARITY)
+    has_param = columns < seg_arity[:, None]
+    params[has_param] = numbers[(param_start[:, None] + columns)[has_param]]
+
+    # Runs start at every moveto and after every closepath; within a run the
+    # end points only depend on the run's initial point
+    is_move = kinds == SEG_MOVE
+    is_close = kinds == SEG_CLOSE
+    run_start = is_move.copy()
+    run_start[0] = True
+    run_start[1:] |= is_close[:-1]
+    run_id = np.cumsum(run_start) - 1
+    firsts = np.flatnonzero(run_start)
+    lasts = np.append(firsts[1:] - 1, count - 1)
+
+    rows = np.arange(count)
+    local = []
+    anchored = []
+    for table in (_END_X, _END_Y):
+        column = table[seg_letters]
+        # Axes without a parameter (H, V, Z) stay where they are: relative 0
+        values = np.where(column >= 0, params[rows, np.maximum(column, 0)], 0.0)
+        axis_local, axis_anchored = _local_scan(values, ~relative & (column >= 0), run_start)
+        local.append(axis_local)
+        anchored.append(axis_anchored)
+
+    # Walk the runs to find each run's initial point and subpath start
+    first_move = is_move[firsts].tolist()
+    last_close = is_close[lasts].tolist()
+    first_local = [axis[firsts].tolist() for axis in local]
+    first_anchored = [axis[firsts].tolist() for axis in anchored]
+    last_local = [axis[lasts].tolist() for axis in local]
+    last_anchored = [axis[lasts].tolist() for axis in anchored]
+    initial = np.empty((len(firsts), 2), dtype=np.float64)
+    subpath = np.empty((len(firsts), 2), dtype=np.float64)
+    current = [0.0, 0.0]
+    start = [0.0, 0.0]
+    for r in range(len(firsts)):
+        if first_move[r]:
+            start = [first_local[a][r] if first_anchored[a][r] else current[a] + first_local[a][r]
+                     for a in (0, 1)]
+        initial[r] = current
+        subpath[r] = start
+        if last_close[r]:
+            current = start
+        else:
+            current = [last_local[a][r] if last_anchored[a][r] else current[a] + last_local[a][r]
+                       for a in (0, 1)]
+
+    for a in (0, 1):
+        ends[:, a] = np.where(anchored[a], local[a], initial[run_id, a] + local[a])
+    ends[is_close] = subpath[run_id[is_close]]
+
+    starts = np.empty_like(ends)
+    starts[0] = 0.0
+    starts[1:] = ends[:-1]
+    return kinds, starts, ends, params, relative, seg_command
+
+
+def _smooth_quad_controls(kinds, starts, controls):
+    """
+    Fills in the reflected control points of T segments in place.
+    A T after a Q or T reflects the previous control point about its start
+    point; any other T uses its start point. Only T chains need a loop.
+    """
+    smooth = np.flatnonzero(kinds == SEG_SMOOTH_QUAD)
+    if not len(smooth):
+        return
+    previous = np.full(len(smooth), SEG_MOVE, dtype=kinds.dtype)
+    has_previous = smooth > 0
+    previous[has_previous] = kinds[smooth[has_previous] - 1]
+    controls[smooth] = starts[smooth]
+    after_quad = smooth[previous == SEG_QUAD]
+    controls[after_quad] = 2 * starts[after_quad] - controls[after_quad - 1]
+    for i in smooth[previous == SEG_SMOOTH_QUAD].tolist():
+        controls[i] = 2 * starts[i] - controls[i - 1]
+
+
+def curve_segments(path_data):
+    """
+    Converts SVG path data into the segment array used by geometry.flatten.
+    Quadratic Beziers are raised to cubics, smooth curves get their reflected
+    control points, arcs are converted to center form and closepaths become
+    lines (dropped when the subpath is already closed).
+
+    Args:
+        path_data (str): The d attribute of a path.
+
+    Returns:
+        tuple: (kinds, segments) where kinds holds the SEGMENT_* kind of each
+            segment and segments is the (S, 10) float64 segment array.
+    """
+    out_kinds, segments, keep = _curves(*path_segments(path_data))
+    return out_kinds[keep], segments[keep]
+
+
+def _curves(kinds, starts, ends, params, relative):
+    """
+    Builds the segment array of curve_segments() and the mask of the
+    segments that draw something.
+    """
+    count = len(kinds)
+    segments = np.zeros((count, SEGMENT_COLUMNS), dtype=np.float64)
+    segments[:, END] = ends
+    out_kinds = np.where(kinds == SEG_MOVE, SEGMENT_MOVE, SEGMENT_LINE).astype(np.uint8)
+    if not count:
+        return out_kinds, segments, np.ones(0, dtype=bool)
+
+    origin = np.where(relative[:, None], starts, 0.0)
+    first = params[:, 0:2] + origin
+    second = params[:, 2:4] + origin
+
+    # Cubic: C gives both control points, S reflects the previous second one
+    cubic = kinds == SEG_CUBIC
+    smooth = kinds == SEG_SMOOTH_CUBIC
+    second_control = np.where(cubic[:, None], second, first)
+    after_cubic = np.zeros(count, dtype=bool)
+    after_cubic[1:] = cubic[:-1] | smooth[:-1]
+    reflected = starts.copy()
+    reflected[after_cubic] = 2 * starts[after_cubic] - second_control[np.flatnonzero(after_cubic) - 1]
+    first_control = np.where(cubic[:, None], first, reflected)
+    rows = cubic | smooth
+    segments[rows, 0:2] = starts[rows]
+    segments[rows, 2:4] = first_control[rows]
+    segments[rows, 4:6] = second_control[rows]
+    out_kinds[rows] = SEGMENT_CUBIC
+
+    # Quadratic: raise Q and T to cubics with the same shape
+    controls = first.copy()
+    _smooth_quad_controls(kinds, starts, controls)
+    rows = (kinds == SEG_QUAD) | (kinds == SEG_SMOOTH_QUAD)
+    segments[rows, 0:2] = starts[rows]
+    segments[rows, 2:4] = starts[rows] + 2 / 3 * (controls[rows] - starts[rows])
+    segments[rows, 4:6] = ends[rows] + 2 / 3 * (controls[rows] - ends[rows])
+    out_kinds[rows] = SEGMENT_CUBIC
+
+    # Arc: center form, or a straight line when a radius is 0
+    rows = np.flatnonzero(kinds == SEG_ARC)
+    if len(rows):
+        columns, degenerate = endpoint_arcs(
+            starts[rows], ends[rows], params[rows, 0:2], params[rows, 2],
+            params[rows, 3], params[rows, 4])
+        segments[rows, 0:8] = columns
+        out_kinds[rows[~degenerate]] = SEGMENT_ARC
+
+    # A closepath or arc that ends where it starts draws nothing
+    keep = ((kinds != SEG_CLOSE) & (kinds != SEG_ARC)) | np.any(starts != ends, axis=1)
+    return out_kinds, segments, keep
+
+
+def curve_segments_batch(path_datas):
+    """
+    Converts the path data of many paths into segment arrays in one pass.
+    Every path is prefixed with "M0 0", which puts the current point back at
+    the origin as at the start of a path, and the joined data is tokenized
+    and expanded once; the prefix segments are dropped afterwards. This
+    avoids the fixed per-call cost on documents with thousands of small
+    paths.
+
+    Args:
+        path_datas (list): The d attributes of the paths.
+
+    Returns:
+        tuple: (kinds, segments, counts) where kinds and segments are as in
+            curve_segments() for all paths one after another and counts
+            holds the number of segments of each path.
+    """
+    path_count = len(path_datas)
+    commands = np.array([len(d) - len(d.translate(_DROP_COMMANDS)) for d in path_datas],
+                        dtype=np.int64) + 1
+    letters, counts, numbers = tokenize_path_data("".join(["M0 0 " + d + " " for d in path_datas]))
+    prefixes = np.cumsum(commands) - commands
+    # Numbers before the first command of a path would be read as part of
+    # the prefix; such paths are parsed one by one
+    if len(letters) != commands.sum() or np.any(counts[prefixes] != 2):
+        parsed = [curve_segments(d) for d in path_datas]
+        if not parsed:
+            return (np.zeros(0, dtype=np.uint8), np.zeros((0, SEGMENT_COLUMNS)),
+                    np.zeros(0, dtype=np.int64))
+        return (np.concatenate([kinds for kinds, _ in parsed]),
+                np.concatenate([segments for _, segments in parsed]),
+                np.array([len(kinds) for kinds, _ in parsed], dtype=np.int64))
+    kinds, starts, ends, params, relative, seg_command = _token_segments(letters, counts, numbers)
+    out_kinds, segments, keep = _curves(kinds, starts, ends, params, relative)
+    prefix = np.zeros(len(letters), dtype=bool)
+    prefix[prefixes] = True
+    keep &= ~prefix[seg_command]
+    seg_path = np.repeat(np.arange(path_count), commands)[seg_command[keep]]
+    return out_kinds[keep], segments[keep], np.bincount(seg_path, minlength=path_count)
+
+
+def parse_path_data(path_data, tolerance=0.1, target_size=None):
+    """
+    Parses SVG path data into points.
+    Curves and arcs are flattened so that no chord is further than tolerance
+    from the curve.
+
+    Args:
+        path_data (str): The d attribute of a path.
+        tolerance (float): The maximum chord error, in path units, or in mm
+            when target_size is given.
+        target_size (float): The size in mm the path will be scaled to.
+
+    Returns:
+        tuple: (coords, codes) where coords is an (N, 2) float64 array of
+            points and codes the MOVE/LINE code of each point.
+    """
+    kinds, segments = curve_segments(path_data)
+    if target_size:
+        tolerance = tolerance_for_size(kinds, segments, target_size, tolerance)
+    coords, codes, _ = flatten_segments(kinds, segments, tolerance)
+    return coords, codes
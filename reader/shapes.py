@@ -0,0 +1,100 @@
+"""
+Conversion of SVG basic shapes to path data
+
+<rect>, <circle>, <ellipse>, <line>, <polyline> and <polygon> are rewritten
+as the equivalent d attribute (SVG 1.1, section 9), so they go through the
+same parser and flattening as <path>.
+"""
+from reader.transforms import numbers
+
+
+def _number(element, name):
+    values = numbers(element.get(name))
+    return values[0] if values else 0.0
+
+
+def _rect_path_data(element):
+    x = _number(element, 'x')
+    y = _number(element, 'y')
+    width = _number(element, 'width')
+    height = _number(element, 'height')
+    if width <= 0 or height <= 0:
+        return None
+    rx = element.get('rx')
+    ry = element.get('ry')
+    rx = _number(element, 'rx') if rx is not None else None
+    ry = _number(element, 'ry') if ry is not None else None
+    # A missing radius takes the other one
+    rx = ry if rx is None else rx
+    ry = rx if ry is None else ry
+    rx = min(max(rx or 0.0, 0.0), width / 2)
+    ry = min(max(ry or 0.0, 0.0), height / 2)
+    if not rx or not ry:
+        return f"M{x} {y}H{x + width}V{y + height}H{x}Z"
+    corner = f"A{rx} {ry} 0 0 1"
+    return (f"M{x + rx} {y}H{x + width - rx}{corner} {x + width} {y + ry}"
+            f"V{y + height - ry}{corner} {x + width - rx} {y + height}"
+            f"H{x + rx}{corner} {x} {y + height - ry}"
+            f"V{y + ry}{corner} {x + rx} {y}Z")
+
+
+def _ellipse_path_data(cx, cy, rx, ry):
+    if rx <= 0 or ry <= 0:
+        return None
+    half = f"A{rx} {ry} 0 1 0"
+    return f"M{cx - rx} {cy}{half} {cx + rx} {cy}{half} {cx - rx} {cy}Z"
+
+
+def _circle_path_data(element):
+    r = _number(element, 'r')
+    return _ellipse_path_data(_number(element, 'cx'), _number(element, 'cy'), r, r)
+
+
+def _ellipse_element_path_data(element):
+    return _ellipse_path_data(_number(element, 'cx'), _number(element, 'cy'),
+                              _number(element, 'rx'), _number(element, 'ry'))
+
+
+def _line_path_data(element):
+    return (f"M{_number(element, 'x1')} {_number(element, 'y1')}"
+            f"L{_number(element, 'x2')} {_number(element, 'y2')}")
+
+
+def _polyline_path_data(element, close=False):
+    points = numbers(element.get('points'))
+    # An odd trailing coordinate is an error; the points before it still render
+    points = points[:len(points) // 2 * 2]
+    if len(points) < 4:
+        return None
+    return "M" + " ".join(map(str, points)) + ("Z" if close else "")
+
+
+def _polygon_path_data(element):
+    return _polyline_path_data(element, close=True)
+
+
+SHAPES = {
+    'rect': _rect_path_data,
+    'circle': _circle_path_data,
+    'ellipse': _ellipse_element_path_data,
+    'line': _line_path_data,
+    'polyline': _polyline_path_data,
+    'polygon': _polygon_path_data,
+}
+
+
+def shape_path_data(name, element):
+    """
+    Returns the path data of a <path> or basic shape element.
+
+    Args:
+        name (str): The local tag name of the element.
+        element (Element): The element.
+
+    Returns:
+        str: The path data, or None if the element draws nothing.
+    """
+    if name == 'path':
+        return element.get('d') or None
+    convert = SHAPES.get(name)
+    return convert(element) if convert else None
@@ -0,0 +1,193 @@
+"""
+Incremental SVG reader
+
+The document is read with ElementTree.iterparse instead of being loaded into
+a DOM: every <path> is handed on as soon as its end tag is read, and every
+finished element is removed from its parent, so the memory held by the
+reader is the chain of open elements rather than the whole document.
+
+While reading, the composed transform of every open element (its own
+transform and viewport on top of its parent's) is kept on the same stack.
+Elements without a transform share their parent's matrix, so a group with
+thousands of children costs one matrix product; the matrices are applied to
+the parsed coordinates later, in one batch.
+"""
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from profiling import NULL_PROFILER
+from reader.pathdata import curve_segments_batch
+from reader.shapes import shape_path_data
+from reader.transforms import IDENTITY, parse_transform, viewport_transform
+
+# Elements whose content is only drawn when referenced from elsewhere
+NON_RENDERED = {
+    'defs', 'clipPath', 'mask', 'marker', 'pattern', 'symbol',
+    'linearGradient', 'radialGradient', 'style', 'script',
+    'metadata', 'title', 'desc',
+}
+
+PARSE_BATCH_SIZE = 1000  # paths parsed per tokenizer call
+
+
+def local_name(tag):
+    """
+    Returns a tag name without its XML namespace.
+
+    Args:
+        tag (str): An ElementTree tag, e.g. '{http://www.w3.org/2000/svg}path'.
+
+    Returns:
+        str: The local name, e.g. 'path'.
+    """
+    return tag.rsplit('}', 1)[-1]
+
+
+def presentation_value(element, name):
+    """
+    Returns a presentation property of an element: its declaration in the
+    style attribute, which takes precedence, or else the attribute itself.
+
+    Args:
+        element (Element): The element.
+        name (str): The property, e.g. 'display'.
+
+    Returns:
+        str | None: The value with surrounding whitespace removed, or None if
+            it isn't set.
+    """
+    style = element.get("style")
+    if style and name in style:
+        value = None
+        # The last declaration wins
+        for declaration in style.split(";"):
+            key, colon, declared = declaration.partition(":")
+            if colon and key.strip() == name:
+                value = declared.replace("!important", "").strip()
+        if value is not None:
+            return value
+    value = element.get(name)
+    return value.strip() if value is not None else None
+
+
+def iter_elements(svg_file):
+    """
+    Yields every element of an SVG file once its end tag has been read.
+    The element is cleared and detached from its parent after the consumer
+    moves on, so it must not be kept.
+
+    Args:
+        svg_file (str | file-like): The SVG file to read.
+
+    Yields:
+        Element: Each element, children before their parent.
+    """
+    open_elements = []
+    for event, element in ET.iterparse(svg_file, events=("start", "end")):
+        if event == "start":
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        yield element
+        element.clear()
+        # Finished siblings are already gone, so this is the only child
+        if open_elements:
+            open_elements[-1].remove(element)
+
+
+def iter_path_data(svg_file):
+    """
+    Yields the d attribute of every <path> of an SVG file in document order.
+
+    Args:
+        svg_file (str | file-like): The SVG file to read.
+
+    Yields:
+        str: The path data of each path that has any.
+    """
+    for element in iter_elements(svg_file):
+        if local_name(element.tag) == "path":
+            path_data = element.get("d")
+            if path_data:
+                yield path_data
+
+
+def iter_svg_shapes(svg_file):
+    """
+    Yields the path data and transform of every <path> and basic shape
+    (rect, circle, ellipse, line, polyline, polygon) that is drawn, in
+    document order.
+
+    Args:
+        svg_file (str | file-like): The SVG file to read.
+
+    Yields:
+        tuple: (path_data, matrix) where matrix is the 3x3 transform from the
+            element's user units to mm. Elements with the same transform
+            share the same matrix object.
+    """
+    # (element, matrix, hidden) of every open element
+    open_elements = []
+    for event, element in ET.iterparse(svg_file, events=("start", "end")):
+        if event == "start":
+            matrix, hidden = (open_elements[-1][1:] if open_elements else (IDENTITY, False))
+            name = local_name(element.tag)
+            hidden = (hidden or name in NON_RENDERED
+                      or presentation_value(element, "display") == "none")
+            transform = parse_transform(element.get("transform"))
+            if transform is not None:
+                matrix = matrix @ transform
+            if name == "svg":
+                matrix = matrix @ viewport_transform(element)
+            open_elements.append((element, matrix, hidden))
+            continue
+        _, matrix, hidden = open_elements.pop()
+        if not hidden:
+            path_data = shape_path_data(local_name(element.tag), element)
+            if path_data:
+                yield path_data, matrix
+        element.clear()
+        if open_elements:
+            open_elements[-1][0].remove(element)
+
+
+def _parse_batch(shapes, profiler=NULL_PROFILER):
+    """
+    Parses a batch of (path_data, matrix) shapes in one call and yields them
+    one by one.
+    """
+    if not shapes:
+        return
+    with profiler.stage("tokenize") as stage:
+        kinds, segments, counts = curve_segments_batch([path_data for path_data, _ in shapes])
+        stage.count(paths=len(shapes), segments=len(kinds))
+    ends = np.cumsum(counts).tolist()
+    start = 0
+    for (_, matrix), end in zip(shapes, ends):
+        yield kinds[start:end], segments[start:end], matrix
+        start = end
+
+
+def iter_svg_paths(svg_file, batch_size=PARSE_BATCH_SIZE, profiler=NULL_PROFILER):
+    """
+    Yields every drawn path and shape of an SVG file as a parsed segment
+    array with its transform. Path data is parsed batch_size paths at a time.
+
+    Args:
+        svg_file (str | file-like): The SVG file to read.
+        batch_size (int): Number of paths parsed together.
+        profiler (Profiler): Times the tokenizer calls as 'tokenize'.
+
+    Yields:
+        tuple: (kinds, segments, matrix), see reader.pathdata.curve_segments
+            and iter_svg_shapes. The segments are in the element's user
+            units; the matrix is not applied yet.
+    """
+    batch = []
+    for shape in iter_svg_shapes(svg_file):
+        batch.append(shape)
+        if len(batch) >= batch_size:
+            yield from _parse_batch(batch, profiler)
+            batch = []
+    yield from _parse_batch(batch, profiler)
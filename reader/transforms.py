@@ -0,0 +1,147 @@
+"""
+SVG transform and viewport parsing
+
+Transforms are 3x3 affine matrices acting on column vectors (x, y, 1), so
+composing a parent and a child transform is parent @ child.
+"""
+import math
+import re
+
+import numpy as np
+
+IDENTITY = np.eye(3)
+
+# Size of one unit of each SVG length unit in mm (user units are CSS px)
+MM_PER_UNIT = {
+    '': 25.4 / 96,
+    'px': 25.4 / 96,
+    'mm': 1.0,
+    'cm': 10.0,
+    'in': 25.4,
+    'pt': 25.4 / 72,
+    'pc': 25.4 / 6,
+    'q': 0.25,
+}
+
+_TRANSFORM_RE = re.compile(r'([A-Za-z]+)\s*\(([^)]*)\)')
+_NUMBER_RE = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+_LENGTH_RE = re.compile(r'\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)\s*([A-Za-z%]*)\s*$')
+
+
+def numbers(text):
+    """
+    Returns all numbers in an attribute value.
+
+    Args:
+        text (str): e.g. '0 0 100 50' or '1,2 3,4'.
+
+    Returns:
+        list: The numbers as floats.
+    """
+    return [float(number) for number in _NUMBER_RE.findall(text or '')]
+
+
+def affine(a, b, c, d, e, f):
+    """
+    Returns the 3x3 matrix of the SVG matrix(a b c d e f).
+    """
+    return np.array([[a, c, e], [b, d, f], [0.0, 0.0, 1.0]])
+
+
+def _rotation(degrees):
+    cos = math.cos(math.radians(degrees))
+    sin = math.sin(math.radians(degrees))
+    return affine(cos, sin, -sin, cos, 0, 0)
+
+
+def parse_transform(text):
+    """
+    Parses an SVG transform attribute.
+
+    Args:
+        text (str): The transform list, e.g. 'translate(10 5) rotate(30)'.
+
+    Returns:
+        np.ndarray: The 3x3 matrix, or None if there is no transform.
+            Unknown or malformed entries are ignored.
+    """
+    if not text:
+        return None
+    matrix = IDENTITY
+    for name, arguments in _TRANSFORM_RE.findall(text):
+        values = numbers(arguments)
+        count = len(values)
+        if name == 'matrix' and count == 6:
+            step = affine(*values)
+        elif name == 'translate' and count in (1, 2):
+            step = affine(1, 0, 0, 1, values[0], values[1] if count == 2 else 0)
+        elif name == 'scale' and count in (1, 2):
+            step = affine(values[0], 0, 0, values[1] if count == 2 else values[0], 0, 0)
+        elif name == 'rotate' and count == 1:
+            step = _rotation(values[0])
+        elif name == 'rotate' and count == 3:
+            cx, cy = values[1], values[2]
+            step = affine(1, 0, 0, 1, cx, cy) @ _rotation(values[0]) @ affine(1, 0, 0, 1, -cx, -cy)
+        elif name == 'skewX' and count == 1:
+            step = affine(1, 0, math.tan(math.radians(values[0])), 1, 0, 0)
+        elif name == 'skewY' and count == 1:
+            step = affine(1, math.tan(math.radians(values[0])), 0, 1, 0, 0)
+        else:
+            continue
+        matrix = matrix @ step
+    return matrix
+
+
+def parse_length(text, default=None):
+    """
+    Parses an SVG length into mm.
+
+    Args:
+        text (str): e.g. '210mm', '8.5in' or '300' (CSS px).
+        default (float): Returned for missing, relative (%, em) or
+            malformed lengths.
+
+    Returns:
+        float: The length in mm.
+    """
+    match = _LENGTH_RE.match(text or '')
+    if not match or match.group(2).lower() not in MM_PER_UNIT:
+        return default
+    return float(match.group(1)) * MM_PER_UNIT[match.group(2).lower()]
+
+
+def viewport_transform(element):
+    """
+    Returns the transform from the user units of an <svg> element to mm,
+    honouring its viewBox, width, height, x, y and preserveAspectRatio.
+
+    Args:
+        element (Element): The <svg> element.
+
+    Returns:
+        np.ndarray: The 3x3 matrix.
+    """
+    px = MM_PER_UNIT['px']
+    x = parse_length(element.get('x'), 0.0)
+    y = parse_length(element.get('y'), 0.0)
+    view_box = numbers(element.get('viewBox'))
+    if len(view_box) != 4 or view_box[2] <= 0 or view_box[3] <= 0:
+        # Without a viewBox a user unit is a CSS px
+        return affine(px, 0, 0, px, x, y)
+    vx, vy, vw, vh = view_box
+    width = parse_length(element.get('width'), vw * px)
+    height = parse_length(element.get('height'), vh * px)
+    sx = width / vw
+    sy = height / vh
+    align = (element.get('preserveAspectRatio') or 'xMidYMid meet').split()
+    if align[0] != 'none':
+        sx = sy = max(sx, sy) if align[-1] == 'slice' else min(sx, sy)
+    tx = x - vx * sx
+    ty = y - vy * sy
+    if align[0] != 'none':
+        # Align the scaled viewBox inside the viewport
+        free_x = width - vw * sx
+        free_y = height - vh * sy
+        tx += {'xMin': 0.0, 'xMid': free_x / 2, 'xMax': free_x}.get(align[0][:4], free_x / 2)
+        ty += {'YMin': 0.0, 'YMid': free_y / 2, 'YMax': free_y}.get(align[0][4:], free_y / 2)
+    return affine(sx, 0, 0, sy, tx, ty)
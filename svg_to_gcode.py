@@ -1,200 +1,155 @@
-from xml.dom import minidom
+import argparse
+import contextlib
+import io
+import logging
+import os
 import re
-from writer.gcodewriter import *
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+import numpy as np
+from writer.gcodewriter import GcodeWriter, default_writer, format_number, progressGcode
+from writer.estimate import format_duration, move_times, path_times
+from writer.gcodestream import GcodeStream, COPY_CHUNK_SIZE
+from writer.package import (DEFAULT_COMPRESS_LEVEL, OUTPUT_FORMATS, open_output, output_format,
+                            render_thumbnail)
+from geometry.pathset import PathSet, MOVE, ARC_CW, ARC_CCW, as_pathset
+from geometry.flatten import DEFAULT_TOLERANCE, flatten_segments, tolerance_for_size, transform_segments
+from geometry.arcfit import DEFAULT_ARC_TOLERANCE, fit_arcs
+from geometry.infill import DEFAULT_INFILL_ANGLE, arc_chords, rectilinear_infill
+from geometry.walls import JOINS, perimeters
+from geometry.bounds import (BOUNDS_MODES, BedBoundsError, bed_known, bounds_slack, check_bed,
+                             check_placement, clip_to_bed, format_report, job_extents)
+from geometry.tiling import DEFAULT_SPACING, pack_boxes
+from geometry.simplify import DEFAULT_SIMPLIFY_TOLERANCE, simplify_paths
+from geometry.cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, GeometryCache, cache_key
+from geometry.ordering import DEFAULT_TIME_BUDGET, order_paths, travel_distance
+from reader.pathdata import parse_path_data
+from reader.svgreader import iter_svg_paths
+from profiling import NULL_PROFILER, OTHER, Profiler
 
-def parse_svg_path(path_data):
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+START_GCODE_FILE = os.path.join(CONFIG_DIR, "a1m_start.gcode")
+END_GCODE_FILE = os.path.join(CONFIG_DIR, "a1m_end.gcode")
+DEFAULT_SVG_FILE = "bakery.svg"
+DEFAULT_OUTPUT_FILE = "output.gcode"
+PLATE_OUTPUT_FILE = "plate.gcode"
+# Feed rates of the retraction and the Z move of every layer change, mm/min
+RETRACT_SPEED = 1800
+LAYER_Z_SPEED = 300
+INFILL_FEATURE = "; FEATURE: Sparse infill\n"
+
+HEADER_START = "; HEADER_BLOCK_START\n"
+HEADER_BLOCK = re.compile(r"; HEADER_BLOCK_START\n.*?; HEADER_BLOCK_END\n", re.S)
+# Progress lines of the job the start G-code was exported with
+STALE_PROGRESS = re.compile(r"^M73 P\d+ R\d+\b[^\n]*(?:\n|\Z)", re.M)
+
+# Progress messages; per-path details are at DEBUG level
+log = logging.getLogger("svg_to_gcode")
+
+
+def parse_svg_path(path_data, tolerance=0.1):
     """
-    Parse SVG path data and return a list of (x, y) coordinates.
+    Parse SVG path data and return it as a PathSet holding one path.
     Supports M (moveto), L (lineto), H (horizontal), V (vertical), C (cubic bezier), 
-    Q (quadratic bezier), A (arc), and Z (closepath) commands.
+    S/Q/T (smooth cubic / quadratic bezier), A (arc), and Z (closepath) commands.
+    Curves are flattened to within tolerance (in path units).
+    A list of results can be passed to any function that takes paths; use
+    to_points() for the old list of ('move' | 'line', x, y) tuples.
     """
-    # print(f"\n=== Parsing path data ===")
-    # print(f"Raw path data: {path_data[:200]}...")  # Print first 200 chars
-    
-    points = []
-    # Better regex to handle commands with optional whitespace and commas
-    commands = re.findall(r'[MLHVZCSQTAmlhvzcsqta][^MLHVZCSQTAmlhvzcsqta]*', path_data)
-    
-    # print(f"Found {len(commands)} commands: {[c[0] for c in commands]}")
-    
-    current_x = 0
-    current_y = 0
-    path_start_x = 0
-    path_start_y = 0
+    coords, codes = parse_path_data(path_data, tolerance)
+    log.debug("Parsed %d points", len(coords))
+    return PathSet(coords, codes, [0, len(coords)])
+
+
+def extract_paths_from_svg(svg_file, target_size=60, tolerance=DEFAULT_TOLERANCE,
+                           profiler=NULL_PROFILER):
+    """
+    Extract all paths and basic shapes from an SVG file, with their group
+    transforms and the viewBox applied (coordinates in mm).
+    The file is read incrementally (see reader.svgreader), so the document
+    is never held in memory as a whole.
+    Returns the parsed paths as a PathSet.
+    """
+    return flatten_svg_paths(iter_svg_paths(svg_file, profiler=profiler), target_size, tolerance,
+                             profiler)
+
+
+def flatten_svg_paths(parsed_paths, target_size=60, tolerance=DEFAULT_TOLERANCE,
+                      profiler=NULL_PROFILER):
+    """
+    Flatten parsed paths, e.g. from iter_svg_paths(), into a PathSet.
+    The transforms of all paths are applied in one batch, then curves are
+    flattened so that the chord error stays below tolerance mm once the
+    drawing is scaled to target_size mm (or at its own size in mm when
+    target_size is None).
+    Reading parsed_paths is timed as 'xml parse' (the tokenizer reports
+    itself separately), the rest as 'flatten'.
+    """
+    all_kinds = []
+    all_segments = []
+    matrices = []
+    matrix_index = {}
+    path_matrices = []
+    with profiler.stage("xml parse") as stage:
+        for kinds, segments, matrix in parsed_paths:
+            all_kinds.append(kinds)
+            all_segments.append(segments)
+            # Paths under the same group share one matrix object
+            if id(matrix) not in matrix_index:
+                matrix_index[id(matrix)] = len(matrices)
+                matrices.append(matrix)
+            path_matrices.append(matrix_index[id(matrix)])
+        stage.count(paths=len(all_kinds))
     
-    for cmd_idx, cmd in enumerate(commands):
-        cmd_type = cmd[0]
-        # Better number extraction - handles scientific notation and negative numbers
-        params_str = cmd[1:].strip()
-        params = re.findall(r'-?\d*\.?\d+(?:[eE][+-]?\d+)?', params_str)
-        params = [float(p) for p in params if p]
-        
-        # print(f"Command {cmd_idx}: '{cmd_type}' with params: {params}")
-        
-        if cmd_type == 'M':  # Absolute moveto
-            if len(params) >= 2:
-                current_x = params[0]
-                current_y = params[1]
-                path_start_x = current_x
-                path_start_y = current_y
-                points.append(('move', current_x, current_y))
-                # Subsequent coordinate pairs are treated as lineto
-                for i in range(2, len(params), 2):
-                    if i + 1 < len(params):
-                        current_x = params[i]
-                        current_y = params[i + 1]
-                        points.append(('line', current_x, current_y))
-            
-        elif cmd_type == 'm':  # Relative moveto
-            if len(params) >= 2:
-                current_x += params[0]
-                current_y += params[1]
-                path_start_x = current_x
-                path_start_y = current_y
-                points.append(('move', current_x, current_y))
-                # Subsequent coordinate pairs are treated as relative lineto
-                for i in range(2, len(params), 2):
-                    if i + 1 < len(params):
-                        current_x += params[i]
-                        current_y += params[i + 1]
-                        points.append(('line', current_x, current_y))
-            
-        elif cmd_type == 'L':  # Absolute lineto
-            for i in range(0, len(params), 2):
-                if i + 1 < len(params):
-                    current_x = params[i]
-                    current_y = params[i + 1]
-                    points.append(('line', current_x, current_y))
-                
-        elif cmd_type == 'l':  # Relative lineto
-            for i in range(0, len(params), 2):
-                if i + 1 < len(params):
-                    current_x += params[i]
-                    current_y += params[i + 1]
-                    points.append(('line', current_x, current_y))
-                
-        elif cmd_type == 'H':  # Absolute horizontal lineto
-            for param in params:
-                current_x = param
-                points.append(('line', current_x, current_y))
-                
-        elif cmd_type == 'h':  # Relative horizontal lineto
-            for param in params:
-                current_x += param
-                points.append(('line', current_x, current_y))
-                
-        elif cmd_type == 'V':  # Absolute vertical lineto
-            for param in params:
-                current_y = param
-                points.append(('line', current_x, current_y))
-                
-        elif cmd_type == 'v':  # Relative vertical lineto
-            for param in params:
-                current_y += param
-                points.append(('line', current_x, current_y))
-        
-        elif cmd_type == 'C':  # Absolute cubic Bezier curve
-            # C x1 y1, x2 y2, x y - we'll just use the endpoint for now
-            for i in range(0, len(params), 6):
-                if i + 5 < len(params):
-                    current_x = params[i + 4]
-                    current_y = params[i + 5]
-                    points.append(('line', current_x, current_y))
-        
-        elif cmd_type == 'c':  # Relative cubic Bezier curve
-            for i in range(0, len(params), 6):
-                if i + 5 < len(params):
-                    current_x += params[i + 4]
-                    current_y += params[i + 5]
-                    points.append(('line', current_x, current_y))
-        
-        elif cmd_type == 'S':  # Absolute smooth cubic Bezier
-            for i in range(0, len(params), 4):
-                if i + 3 < len(params):
-                    current_x = params[i + 2]
-                    current_y = params[i + 3]
-                    points.append(('line', current_x, current_y))
-        
-        elif cmd_type == 's':  # Relative smooth cubic Bezier
-            for i in range(0, len(params), 4):
-                if i + 3 < len(params):
-                    current_x += params[i + 2]
-                    current_y += params[i + 3]
-                    points.append(('line', current_x, current_y))
-        
-        elif cmd_type == 'Q':  # Absolute quadratic Bezier
-            for i in range(0, len(params), 4):
-                if i + 3 < len(params):
-                    current_x = params[i + 2]
-                    current_y = params[i + 3]
-                    points.append(('line', current_x, current_y))
-        
-        elif cmd_type == 'q':  # Relative quadratic Bezier
-            for i in range(0, len(params), 4):
-                if i + 3 < len(params):
-                    current_x += params[i + 2]
-                    current_y += params[i + 3]
-                    points.append(('line', current_x, current_y))
-        
-        elif cmd_type == 'A' or cmd_type == 'a':  # Arc (simplified to just use endpoint)
-            # A rx ry x-axis-rotation large-arc-flag sweep-flag x y
-            for i in range(0, len(params), 7):
-                if i + 6 < len(params):
-                    if cmd_type == 'A':
-                        current_x = params[i + 5]
-                        current_y = params[i + 6]
-                    else:
-                        current_x += params[i + 5]
-                        current_y += params[i + 6]
-                    points.append(('line', current_x, current_y))
-                
-        elif cmd_type in ['Z', 'z']:  # Close path
-            if (current_x, current_y) != (path_start_x, path_start_y):
-                points.append(('line', path_start_x, path_start_y))
+    if not all_kinds:
+        return PathSet.from_arrays([], [])
     
-    print(f"Parsed {len(points)} points")
-    return points
+    with profiler.stage("flatten") as stage:
+        paths = _flatten_parsed(all_kinds, all_segments, matrices, path_matrices,
+                                target_size, tolerance)
+        stage.count(segments=sum(len(kinds) for kinds in all_kinds), points=paths.point_count)
+    if log.isEnabledFor(logging.DEBUG):
+        for count in np.diff(paths.offsets).tolist():
+            log.debug("Parsed %d points", count)
+    return paths
 
 
-def extract_paths_from_svg(svg_file):
+def _flatten_parsed(all_kinds, all_segments, matrices, path_matrices, target_size, tolerance):
     """
-    Extract all path elements from an SVG file.
-    Returns a list of parsed path data.
+    Transform and flatten the segment arrays of every path in one batch.
     """
-    doc = minidom.parse(svg_file)
-    path_elements = doc.getElementsByTagName('path')
+    segment_counts = [len(kinds) for kinds in all_kinds]
+    segment_offsets = np.zeros(len(all_kinds) + 1, dtype=np.int64)
+    segment_offsets[1:] = np.cumsum(segment_counts)
+    kinds = np.concatenate(all_kinds)
+    segments = np.concatenate(all_segments)
+    segment_matrices = np.stack(matrices)[np.repeat(path_matrices, segment_counts)]
+    segments = transform_segments(kinds, segments, segment_matrices)
     
-    all_paths = []
-    for path in path_elements:
-        path_data = path.getAttribute('d')
-        if path_data:
-            points = parse_svg_path(path_data)
-            all_paths.append(points)
+    tolerance = tolerance_for_size(kinds, segments, target_size, tolerance)
+    coords, codes, counts = flatten_segments(kinds, segments, tolerance)
     
-    return all_paths
+    # Each path gets the points of its segments
+    point_ends = np.zeros(len(counts) + 1, dtype=np.int64)
+    point_ends[1:] = np.cumsum(counts)
+    return PathSet(coords, codes, point_ends[segment_offsets])
 
 
 def normalize_svg_coordinates(paths, target_size=60):
     """
     Normalize SVG coordinates to fit within target_size.
     SVG coordinates often start from 0,0 and can be in various scales.
+    With target_size None the drawing keeps its size and is only moved.
+    Accepts a PathSet or lists of point tuples and returns a PathSet.
     """
-    if not paths or not any(paths):
+    paths = as_pathset(paths)
+    if not paths.point_count:
         return paths
     
     # Find bounding box
-    all_x = []
-    all_y = []
-    for path in paths:
-        for point in path:
-            all_x.append(point[1])
-            all_y.append(point[2])
-    
-    min_x = min(all_x)
-    max_x = max(all_x)
-    min_y = min(all_y)
-    max_y = max(all_y)
+    min_x, min_y, max_x, max_y = paths.bounds()
     
     svg_width = max_x - min_x
     svg_height = max_y - min_y
@@ -202,31 +157,34 @@ def normalize_svg_coordinates(paths, target_size=60):
     if svg_width == 0 or svg_height == 0:
         return paths
     
-    # Calculate scale to fit within target_size
-    scale = target_size / max(svg_width, svg_height)
+    # Calculate scale to fit within target_size, or keep the size in mm
+    scale = 1.0 if target_size is None else target_size / max(svg_width, svg_height)
+    
+    # Normalize all points at once
+    coords = (paths.coords - (min_x, min_y)) * scale
+    # Flip Y: subtract from max to invert
+    coords[:, 1] = svg_height * scale - coords[:, 1]
     
-    # Normalize paths
-    normalized_paths = []
-    for path in paths:
-        normalized_path = []
-        for point in path:
-            cmd_type = point[0]
-            x = (point[1] - min_x) * scale
-            # Flip Y: subtract from max to invert
-            y = svg_height * scale - (point[2] - min_y) * scale
-            normalized_path.append((cmd_type, x, y))
-        normalized_paths.append(normalized_path)
+    codes = paths.codes
+    centers = paths.centers
+    if centers is not None:
+        centers = (centers - (min_x, min_y)) * scale
+        centers[:, 1] = svg_height * scale - centers[:, 1]
+        # The flip mirrors the arcs, so clockwise becomes counterclockwise
+        codes = np.where(codes == ARC_CW, ARC_CCW, np.where(codes == ARC_CCW, ARC_CW, codes)).astype(np.uint8)
     
-    return normalized_paths
+    return PathSet(coords, codes, paths.offsets, centers)
 
 
 def layer_change_block_full(layer_idx, z_height, total_layers, layer_height,
                             wipe=False, object_id=0,
-                            retract_e=0.8, prime_e=0.8):
+                            retract_e=0.8, prime_e=0.8, writer=None, progress=None):
     """
     Full-featured layer-change block with wipe, arc move, object ID, etc.
     layer_idx: 0-based
+    progress: (percent, minutes left) written as M73 P/R, or None
     """
+    writer = writer or default_writer()
     one_based = layer_idx + 1
     lines = []
     lines.append("; CHANGE_LAYER")
@@ -239,18 +197,20 @@ def layer_change_block_full(layer_idx, z_height, total_layers, layer_height,
         lines.append("; WIPE_END")
         lines.append("G1 E-.04 F1800")
     else:
-        lines.append(f"G1 E-{retract_e} F1800")
+        lines.append(f"G1 E-{retract_e} F{RETRACT_SPEED}")
 
     lines.append(f"; layer num/total_layer_count: {one_based}/{total_layers}")
     lines.append("; update layer progress")
     lines.append(f"M73 L{one_based}")
+    if progress is not None:
+        lines.append(progressGcode(*progress).rstrip("\n"))
     lines.append(f"M991 S0 P{layer_idx} ;notify layer change")
 
     lines.append(f"; OBJECT_ID: {object_id}")
-    lines.append("M204 S10000")
+    lines.append("M204 S" + format_number(writer.acceleration, 0))
     lines.append("G17")
-    lines.append("G1 Z" + str(z_height) + " F300")
-    lines.append(f"G1 E{prime_e} F1800")
+    lines.append("G1 Z" + format_number(z_height, writer.z_precision) + f" F{LAYER_Z_SPEED}")
+    lines.append(f"G1 E{prime_e} F{RETRACT_SPEED}")
 
     lines.append("; FEATURE: Inner wall")
     lines.append("; LINE_WIDTH: 0.45")
@@ -258,6 +218,14 @@ def layer_change_block_full(layer_idx, z_height, total_layers, layer_height,
     return "\n".join(lines) + "\n"
 
 
+def object_change_block(object_id):
+    """
+    Start the next object of a layer of several; the first one's ID is in
+    the layer change block.
+    """
+    return f"; OBJECT_ID: {object_id}\n; FEATURE: Inner wall\n; LINE_WIDTH: 0.45\n"
+
+
 def visualize_svg_paths(svg_paths, title="SVG Paths Visualization"):
     """
     Visualize parsed SVG paths using matplotlib.
@@ -267,18 +235,14 @@ def visualize_svg_paths(svg_paths, title="SVG Paths Visualization"):
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 7))
     
     # Plot raw parsed paths
-    for i, path in enumerate(svg_paths):
-        x_coords = []
-        y_coords = []
+    svg_paths = as_pathset(svg_paths)
+    for i in range(len(svg_paths)):
+        coords, _ = svg_paths.path(i)
         
-        for point in path:
-            x_coords.append(point[1])
-            y_coords.append(point[2])
-        
-        if x_coords and y_coords:
-            ax1.plot(x_coords, y_coords, marker='o', markersize=3, linewidth=1.5, label=f'Path {i+1}')
+        if len(coords):
+            ax1.plot(coords[:, 0], coords[:, 1], marker='o', markersize=3, linewidth=1.5, label=f'Path {i+1}')
             # Mark start point
-            ax1.plot(x_coords[0], y_coords[0], 'go', markersize=8, label=f'Start {i+1}' if i == 0 else '')
+            ax1.plot(coords[0, 0], coords[0, 1], 'go', markersize=8, label=f'Start {i+1}' if i == 0 else '')
     
     ax1.set_xlabel('X')
     ax1.set_ylabel('Y')
@@ -290,18 +254,13 @@ def visualize_svg_paths(svg_paths, title="SVG Paths Visualization"):
     
     # Plot normalized paths
     normalized = normalize_svg_coordinates(svg_paths, target_size=60)
-    for i, path in enumerate(normalized):
-        x_coords = []
-        y_coords = []
-        
-        for point in path:
-            x_coords.append(point[1])
-            y_coords.append(point[2])
+    for i in range(len(normalized)):
+        coords, _ = normalized.path(i)
         
-        if x_coords and y_coords:
-            ax2.plot(x_coords, y_coords, marker='o', markersize=3, linewidth=1.5, label=f'Path {i+1}')
+        if len(coords):
+            ax2.plot(coords[:, 0], coords[:, 1], marker='o', markersize=3, linewidth=1.5, label=f'Path {i+1}')
             # Mark start point
-            ax2.plot(x_coords[0], y_coords[0], 'go', markersize=8)
+            ax2.plot(coords[0, 0], coords[0, 1], 'go', markersize=8)
     
     ax2.set_xlabel('X (mm)')
     ax2.set_ylabel('Y (mm)')
@@ -313,31 +272,507 @@ def visualize_svg_paths(svg_paths, title="SVG Paths Visualization"):
     
     plt.tight_layout()
     plt.savefig('svg_debug_visualization.png', dpi=150)
-    print("Visualization saved as 'svg_debug_visualization.png'")
+    log.info("Visualization saved as 'svg_debug_visualization.png'")
     plt.show()
 
 
-def main():
-    # Configuration
-    svg_file = "bakery.svg"  # Change to your SVG file path
-    layer_num = 20  # Number of layers
-    size = 60  # Size of the output in mm
-    start_x = 40  # Starting X coordinate offset
-    start_y = 40  # Starting Y coordinate offset
-    layer_height = 0.2  # Height of each layer
-    debug = False  # Enable debug mode for visualization
+def _iter_gcode_file(path, fallback, warning):
+    """
+    Yield the contents of a start/end G-code file in chunks, or the fallback
+    G-code if the file does not exist.
+    """
+    try:
+        file = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        log.warning(warning)
+        yield fallback
+        return
+    with file:
+        while True:
+            chunk = file.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def render_layer_body(svg_paths, prev_x=0, prev_y=0, layer_height=None, writer=None):
+    """
+    Format the XY/E moves of one layer from a PathSet already placed on the bed.
+    Fitted arcs are written as G2/G3 moves.
+    Segment lengths and E values are computed for the whole layer at once.
+    writer is the GcodeWriter of the job, the default one if None.
+    Returns the encoded G-code and the position the nozzle ends at, so the
+    same body can be written again for every layer.
+    """
+    writer = writer or default_writer()
+    if not svg_paths.point_count:
+        return b"\n", prev_x, prev_y
+    coords = svg_paths.coords
+    extrude = svg_paths.codes != MOVE
+    centers = svg_paths.centers
+    clockwise = svg_paths.codes == ARC_CW
+    _, e = writer.segment_extrusion(coords, extrude, prev_x, prev_y, layer_height,
+                             centers=centers, clockwise=clockwise)
+    arc_offsets = None
+    if centers is not None:
+        # I/J are relative to where each arc starts
+        starts = np.empty_like(coords)
+        starts[0] = (prev_x, prev_y)
+        starts[1:] = coords[:-1]
+        arc_offsets = centers - starts
+    body = writer.moves_gcode(coords, e, extrude, arc_offsets=arc_offsets, clockwise=clockwise) + "\n"
+    last_x, last_y = svg_paths.coords[-1].tolist()
+    return body.encode("ascii"), last_x, last_y
+
+
+def _object_moves(paths, layer_height, writer):
+    """
+    The moves of paths as render_layer_body() formats them, entered with a
+    travel move wherever the nozzle was, so they are the same for every
+    copy but for the coordinates.
+    Returns (coords, e, extrude, arc offsets, clockwise).
+    """
+    coords = paths.coords
+    extrude = paths.codes != MOVE
+    extrude[0] = False
+    clockwise = paths.codes == ARC_CW
+    centers = paths.centers
+    arc_offsets = None
+    if centers is not None:
+        centers = centers.copy()
+        centers[0] = np.nan
+        starts = np.empty_like(coords)
+        starts[0] = coords[0]
+        starts[1:] = coords[:-1]
+        arc_offsets = centers - starts
+    _, e = writer.segment_extrusion(coords, extrude, *coords[0].tolist(), layer_height,
+                                    centers=centers, clockwise=clockwise)
+    return coords, e, extrude, arc_offsets, clockwise
+
+
+def object_variants(objects):
+    """
+    Return the number of different layers of a plate, 2 with infill at
+    alternate angles and 1 without.
+    """
+    return max([len(infill) for _, infill, _, _ in objects if infill] or [1])
+
+
+def render_objects(objects, variant=0, layer_height=None, writer=None):
+    """
+    Format one layer of a plate: every object (paths, infill, x offset,
+    y offset, see place_copies()) after its object change block, with the
+    infill of the variant. Copies share the PathSets of their design, whose
+    E values and arc offsets are computed once per layer; a copy only moves
+    the coordinates before they are formatted.
+    Returns the encoded G-code and the position the nozzle ends at.
+    """
+    writer = writer or default_writer()
+    moves = {}  # id of a PathSet -> its moves
+    pieces = []
+    last_x = last_y = 0
+    for object_id, (paths, infill, dx, dy) in enumerate(objects):
+        if object_id:
+            pieces.append(object_change_block(object_id))
+        parts = [paths, infill[variant % len(infill)]] if infill else [paths]
+        for number, part in enumerate(parts):
+            if not part.point_count:
+                continue
+            if id(part) not in moves:
+                moves[id(part)] = _object_moves(part, layer_height, writer)
+            coords, e, extrude, arc_offsets, clockwise = moves[id(part)]
+            coords = coords + (dx, dy)
+            if number:
+                pieces.append(INFILL_FEATURE)
+            pieces.append(writer.moves_gcode(coords, e, extrude, arc_offsets=arc_offsets,
+                                             clockwise=clockwise) + "\n")
+            last_x, last_y = coords[-1].tolist()
+    return "".join(pieces).encode("ascii"), last_x, last_y
+
+
+def place_objects(objects, variant=0):
+    """
+    Return one layer of a plate (see render_objects()) as a single PathSet
+    placed on the bed, every object entered with a travel move.
+    """
+    parts = []
+    for paths, infill, dx, dy in objects:
+        parts.append(paths.translate(dx, dy))
+        if infill:
+            parts.append(infill[variant % len(infill)].translate(dx, dy))
+    placed = PathSet.concatenate(parts)
+    sizes = np.array([part.point_count for part in parts], dtype=np.int64)
+    starts = (np.cumsum(sizes) - sizes)[sizes > 0]
+    placed.codes[starts] = MOVE
+    if placed.centers is not None:
+        placed.centers[starts] = np.nan
+    return placed
+
+
+def place_copies(designs, copies=1, spacing=DEFAULT_SPACING, writer=None):
+    """
+    Lay out copies of every design, a (paths, infill) pair from plan_paths()
+    at start offset 0, side by side on the bed of writer (see pack_boxes()).
+    Returns the objects as (paths, infill, x offset, y offset) in print
+    order; the copies of a design share its arrays.
+    """
+    writer = writer or default_writer()
+    bed = (writer.x_min, writer.y_min, writer.x_max, writer.y_max)
+    if not bed_known(bed):
+        raise ValueError("placing objects needs the bed size (X_MIN, X_MAX, Y_MIN, Y_MAX) "
+                         "in the config")
+    extents = np.array([job_extents(paths) or (0.0, 0.0, 0.0, 0.0) for paths, _ in designs])
+    design = np.repeat(np.arange(len(designs)), copies)
+    corners, order = pack_boxes(extents[design, 2:] - extents[design, :2], bed, spacing)
+    # From the corner of a box on the bed back to path coordinates
+    shifts = corners - extents[design, :2] - (writer.x_offset, writer.y_offset)
+    return [(*designs[index], *shifts[copy].tolist())
+            for copy, index in zip(order.tolist(), design[order].tolist())]
+
+
+def plate_thumbnail(paths, tolerance=DEFAULT_TOLERANCE):
+    """
+    Draw the extruding moves of a layer placed on the bed (see
+    place_objects()) as the PNG thumbnail of a .gcode.3mf package, arcs as
+    chords within tolerance.
+    """
+    drawn = np.flatnonzero(paths.codes != MOVE)
+    drawn = drawn[drawn > 0]
+    starts, ends = paths.coords[drawn - 1], paths.coords[drawn]
+    if paths.centers is not None:
+        arc = ~np.isnan(paths.centers[drawn, 0])
+        if arc.any():
+            arcs = drawn[arc]
+            chord_ends, chord_arc = arc_chords(starts[arc], ends[arc], paths.centers[arcs],
+                                               paths.codes[arcs] == ARC_CW, tolerance)
+            # Every chord starts where the one before it ends, the first at its arc's start
+            chord_starts = np.roll(chord_ends, 1, axis=0)
+            first = np.r_[True, chord_arc[1:] != chord_arc[:-1]]
+            chord_starts[first] = starts[arc][chord_arc[first]]
+            starts = np.concatenate([starts[~arc], chord_starts])
+            ends = np.concatenate([ends[~arc], chord_ends])
+    return render_thumbnail(starts, ends)
+
+
+def estimate_layer(svg_paths, prev_x=0, prev_y=0, layer_height=None, writer=None):
+    """
+    Estimate the time and filament of the XY/E moves of one layer, as
+    render_layer_body() writes them, with the acceleration and jerk of the
+    writer (see writer.estimate). The layer starts and ends at rest.
+    Returns (seconds, filament mm) and the position the nozzle ends at.
+    """
+    writer = writer or default_writer()
+    if not svg_paths.point_count:
+        return 0.0, 0.0, prev_x, prev_y
+    coords = svg_paths.coords
+    extrude = svg_paths.codes != MOVE
+    centers = svg_paths.centers
+    clockwise = svg_paths.codes == ARC_CW
+    lengths, e = writer.segment_extrusion(coords, extrude, prev_x, prev_y, layer_height,
+                                          centers=centers, clockwise=clockwise)
+    # Arcs extrude too; moves_gcode writes them with the G1 speed
+    if centers is not None:
+        extrude = extrude | ~np.isnan(centers[:, 0])
+    speeds = np.where(extrude, writer.g1_speed / 60, writer.g0_speed / 60)
+    times = path_times(coords, lengths, speeds, writer.acceleration, writer.jerk,
+                       prev_x, prev_y, centers, clockwise)
+    last_x, last_y = coords[-1].tolist()
+    return float(times.sum()), float(e.sum()), last_x, last_y
+
+
+def estimate_job(svg_paths, layer_num, layer_height, writer=None, infill=None, objects=None):
+    """
+    Estimate the print time and filament use of a job as iter_gcode() writes
+    it; svg_paths and infill must already be placed on the bed, or objects
+    given instead for a plate (see place_copies()). Like the
+    layer templates, a layer is only estimated again when it starts from
+    another position or has other infill than an earlier one.
+    Returns a dict with the seconds of every layer (including its layer
+    change), the time of the moves ('model_seconds') and of the whole job
+    with the start and end G-code ('print_seconds'), the filament length
+    in mm, volume in cm^3 and weight in g, and the height of the top layer.
+    """
+    writer = writer or default_writer()
+    if objects is not None:
+        # Every layer of a plate is all its objects, with their infill of the layer
+        svg_paths = PathSet.from_arrays([], [])
+        infill = [place_objects(objects, variant) for variant in range(object_variants(objects))]
+    svg_paths = as_pathset(svg_paths)
+    # Retraction, Z move and prime of a layer change, each from rest to rest
+    change = float(move_times([0.8, layer_height, 0.8],
+                              [RETRACT_SPEED / 60, LAYER_Z_SPEED / 60, RETRACT_SPEED / 60],
+                              writer.acceleration).sum())
+    layer_seconds = np.full(layer_num, change)
+    filament = 0.0
+    estimated = {}  # (infill variant, start position) -> (seconds, filament, end position)
+    position = (0, 0)
+    for layer in range(layer_num):
+        variant = layer % len(infill) if infill else 0
+        key = (variant, position)
+        if key not in estimated:
+            seconds, e, x, y = estimate_layer(svg_paths, *position, layer_height, writer)
+            if infill:
+                fill_seconds, fill_e, x, y = estimate_layer(infill[variant], x, y, layer_height,
+                                                            writer)
+                seconds += fill_seconds
+                e += fill_e
+            estimated[key] = (seconds, e, (x, y))
+        seconds, e, position = estimated[key]
+        layer_seconds[layer] += seconds
+        filament += e
+    model_seconds = float(layer_seconds.sum())
+    volume = filament * writer.filament_area / 1000
+    return {
+        "layer_seconds": layer_seconds,
+        "model_seconds": model_seconds,
+        "print_seconds": model_seconds + writer.prepare_time,
+        "filament_mm": filament,
+        "filament_cm3": volume,
+        "filament_g": volume * writer.filament_density,
+        "max_z": layer_num * layer_height,
+    }
+
+
+def format_header(estimate, layer_num, writer=None):
+    """
+    Return the header block the printer shows before a print, in the
+    format of the slicer the start G-code comes from.
+    """
+    writer = writer or default_writer()
+    return "".join([
+        HEADER_START,
+        "; svg_to_gcode\n",
+        f"; model printing time: {format_duration(estimate['model_seconds'])}; "
+        f"total estimated time: {format_duration(estimate['print_seconds'])}\n",
+        f"; total layer number: {layer_num}\n",
+        f"; total filament length [mm] : {estimate['filament_mm']:.2f}\n",
+        f"; total filament volume [cm^3] : {estimate['filament_cm3']:.2f}\n",
+        f"; total filament weight [g] : {estimate['filament_g']:.2f}\n",
+        f"; filament_density: {writer.filament_density:g}\n",
+        f"; filament_diameter: {writer.filament_diameter:g}\n",
+        f"; max_z_height: {estimate['max_z']:.2f}\n",
+        "; filament: 1\n",
+        "; HEADER_BLOCK_END\n",
+    ])
+
+
+def _progress(done, total):
+    """
+    Return the M73 (percent, minutes left) after done of total seconds.
+    """
+    if total <= 0:
+        return 100, 0
+    return min(int(100 * done / total), 100), int(max(total - done, 0) // 60)
+
+
+def _rewrite_start_gcode(chunks, header, progress):
+    """
+    Put the header of this job in the start G-code, in place of the header
+    block it was exported with or in front of it, and fix its progress
+    lines: the first one is rewritten to progress, the later ones, which
+    counted down the exported job, are dropped.
+    Lines split between chunks are carried over to the next one.
+    """
+    chunks = iter(chunks)
+    head = ""
+    # Read until it is clear whether there is a header block to replace
+    for chunk in chunks:
+        head += chunk
+        if "; HEADER_BLOCK_END\n" in head or not HEADER_START.startswith(head[:len(HEADER_START)]):
+            break
+    if head.startswith(HEADER_START) and HEADER_BLOCK.match(head):
+        head = HEADER_BLOCK.sub(lambda match: header, head, count=1)
+    else:
+        head = header + head
+    rewritten = False
+
+    def rewrite(match):
+        nonlocal rewritten
+        if rewritten:
+            return ""
+        rewritten = True
+        return progressGcode(*progress).rstrip("\n") + "\n"
+
+    pending = head
+    for chunk in chunks:
+        pending += chunk
+        cut = pending.rfind("\n") + 1
+        yield STALE_PROGRESS.sub(rewrite, pending[:cut])
+        pending = pending[cut:]
+    yield STALE_PROGRESS.sub(rewrite, pending)
+
+
+def report_arc_fitting(lines, arcs, layer_height, writer=None):
+    """
+    Log how much arc fitting shrank one layer and return the fitted paths.
+    Both layers are formatted for this, so it is skipped below INFO level.
+    """
+    if not log.isEnabledFor(logging.INFO):
+        return arcs
+    line_bytes = len(render_layer_body(lines, layer_height=layer_height, writer=writer)[0])
+    arc_bytes = len(render_layer_body(arcs, layer_height=layer_height, writer=writer)[0])
+    log.info("Arc fitting: %d -> %d moves per layer, %d -> %d bytes (compression %.2fx)",
+             lines.point_count, arcs.point_count, line_bytes, arc_bytes,
+             line_bytes / max(arc_bytes, 1))
+    return arcs
+
+
+def iter_gcode(svg_paths, layer_num, layer_height, start_x=0, start_y=0,
+               start_file=START_GCODE_FILE, end_file=END_GCODE_FILE,
+               layer_template=True, writer=None, start_gcode=None, end_gcode=None,
+               infill=None, estimate=None, objects=None, profiler=NULL_PROFILER):
+    """
+    Generate the full G-code program piece by piece.
+    svg_paths must already be normalized; start_x/start_y are applied to all
+    points in one step before any layer is formatted. Nothing is accumulated between
+    pieces, so the caller can write them to any sink (see GcodeStream) with
+    flat memory use regardless of the number of layers or paths.
+    infill is a list of PathSets in the same coordinates as svg_paths (see
+    plan_paths()); layer i prints infill[i % len(infill)] after the paths.
+    With layer_template each different body is formatted once and replayed
+    for the layers it repeats in; only the layer change block is generated
+    per layer.
+    objects replaces svg_paths, infill and the start offset for a plate of
+    several objects (see place_copies()), each printed in every layer under
+    its own OBJECT_ID, 0 for the first.
+    writer is the GcodeWriter of the job, the default one if None.
+    start_gcode/end_gcode replace the start/end files with text already in
+    memory. The header of the start G-code and the M73 progress of every
+    layer come from estimate (see estimate_job()), which is computed here
+    (as 'estimate') when not given. The layers are timed as 'emit layers',
+    without the time the consumer spends between pieces.
+    """
+    writer = writer or default_writer()
+    if objects is not None:
+        variants = object_variants(objects)
+        points = sum(paths.point_count for paths, _, _, _ in objects)
+    else:
+        # Apply offset
+        svg_paths = as_pathset(svg_paths).translate(start_x, start_y)
+        infill = [fill.translate(start_x, start_y) for fill in infill or ()]
+        variants = len(infill) or 1
+        points = svg_paths.point_count
+    if estimate is None:
+        with profiler.stage("estimate") as stage:
+            estimate = estimate_job(svg_paths, layer_num, layer_height, writer, infill, objects)
+            stage.count(points=points)
+    total = estimate["print_seconds"]
+    progress = _progress(0, total)
+    if start_gcode is not None:
+        start_chunks = [start_gcode]
+    else:
+        start_chunks = _iter_gcode_file(
+            start_file,
+            "; Start GCode\n"
+            "G28 ; Home all axes\n"
+            "G90 ; Absolute positioning\n",
+            "Warning: Start gcode file not found, skipping...")
+    yield from _rewrite_start_gcode(start_chunks, format_header(estimate, layer_num, writer),
+                                    progress)
+    
+    prev_x = 0
+    prev_y = 0
+    yield writer.G0(0, 0)  # Initial position
+    yield "\n; Begin SVG Print\n"
+    yield "; ==================\n"
     
+    # Seconds done when each layer starts, the start G-code counted first
+    layer_starts = total - estimate["model_seconds"] + np.cumsum(estimate["layer_seconds"])
+    layer_starts = np.concatenate([[total - estimate["model_seconds"]], layer_starts]).tolist()
+    # (infill variant, start position or None) -> (body, end x, end y)
+    templates = {}
+    # A body that opens with a travel move doesn't depend on where the
+    # nozzle was before it; every object of a plate does
+    starts_with_move = objects is not None or (svg_paths.point_count > 0
+                                               and svg_paths.codes[0] == MOVE)
+    # Generate G-code for each layer
+    for layer in range(layer_num):
+        z_height = layer * layer_height + layer_height
+        
+        with profiler.stage("emit layers") as stage:
+            # Progress only when it changed since the last update
+            layer_progress = _progress(layer_starts[layer], total)
+            if layer_progress == progress:
+                layer_progress = None
+            else:
+                progress = layer_progress
+            # Add layer change block
+            block = layer_change_block_full(
+                layer_idx=layer,
+                z_height=z_height,
+                total_layers=layer_num,
+                layer_height=layer_height,
+                wipe=False,
+                writer=writer,
+                progress=layer_progress
+            )
+            
+            # Otherwise the body only depends on where the previous layer ended
+            # and on its infill, so it repeats once those do
+            variant = layer % variants
+            key = (variant, None if starts_with_move else (prev_x, prev_y))
+            if key in templates:
+                body, prev_x, prev_y = templates[key]
+            elif objects is not None:
+                body, prev_x, prev_y = render_objects(objects, variant, layer_height, writer)
+                stage.count(points=points)
+                if layer_template:
+                    templates[key] = body, prev_x, prev_y
+            else:
+                body, prev_x, prev_y = render_layer_body(svg_paths, prev_x, prev_y, layer_height,
+                                                         writer)
+                stage.count(points=svg_paths.point_count)
+                if infill and infill[variant].point_count:
+                    fill = infill[variant]
+                    fill_body, prev_x, prev_y = render_layer_body(fill, prev_x, prev_y,
+                                                                  layer_height, writer)
+                    body += INFILL_FEATURE.encode("ascii") + fill_body
+                    stage.count(points=fill.point_count)
+                if layer_template:
+                    templates[key] = body, prev_x, prev_y
+            stage.count(bytes=len(block) + len(body))
+        yield block
+        yield body
+    if _progress(layer_starts[-1], total) != progress:
+        yield progressGcode(*_progress(layer_starts[-1], total)).rstrip("\n") + "\n"
+    
+    if end_gcode is not None:
+        yield end_gcode
+    else:
+        yield from _iter_gcode_file(
+            end_file,
+            "; End GCode\n"
+            "G28 X Y ; Home X and Y\n"
+            "M104 S0 ; Turn off extruder\n"
+            "M140 S0 ; Turn off bed\n"
+            "M84 ; Disable motors\n",
+            "Warning: End gcode file not found, using default...")
+
+
+def prepare_geometry(svg_file, size=60, tolerance=DEFAULT_TOLERANCE,
+                     simplify_tolerance=DEFAULT_SIMPLIFY_TOLERANCE,
+                     arc_tolerance=DEFAULT_ARC_TOLERANCE, layer_height=0.2, debug=False,
+                     writer=None, profiler=NULL_PROFILER):
+    """
+    Parse, normalize, simplify and arc-fit the paths of an SVG file.
+    layer_height and writer are only used to report the arc fitting gain. Nothing here
+    depends on the layers or the offsets, so the result can be cached.
+    Returns (paths, point_count) with the number of points before
+    simplification, or None if stopped in debug mode.
+    """
     # Parse SVG
-    print(f"Parsing SVG file: {svg_file}")
-    svg_paths = extract_paths_from_svg(svg_file)
+    log.info("Parsing SVG file: %s", svg_file)
+    svg_paths = extract_paths_from_svg(svg_file, target_size=size, tolerance=tolerance,
+                                       profiler=profiler)
+    point_count = svg_paths.point_count
     
-    print(f"Found {len(svg_paths)} paths in SVG")
+    log.info("Found %d paths in SVG", len(svg_paths))
     
     if debug:
         # Debug: Print first few points of each path
         for i, path in enumerate(svg_paths):
-            print(f"\nPath {i+1}: {len(path)} points")
-            print(f"  First 5 points: {path[:5]}")
+            log.info("\nPath %d: %d points", i + 1, path.point_count)
+            log.info("  First 5 points: %s", path.to_points()[0][:5])
         
         # Visualize the paths
         visualize_svg_paths(svg_paths)
@@ -345,86 +780,595 @@ def main():
         # Ask user if they want to continue to G-code generation
         response = input("\nDoes the visualization look correct? Continue to G-code generation? (y/n): ")
         if response.lower() != 'y':
-            print("Stopping. Please fix the SVG parsing first.")
-            return
+            log.info("Stopping. Please fix the SVG parsing first.")
+            return None
     
-    gcode = ""
+    # Normalize coordinates
+    with profiler.stage("normalize") as stage:
+        svg_paths = normalize_svg_coordinates(svg_paths, target_size=size)
+        stage.count(points=svg_paths.point_count)
     
-    # Read start gcode
-    try:
-        with open("config/a1m_start.gcode", "r") as file:
-            start_gcode = file.read()
-            gcode += start_gcode
-    except FileNotFoundError:
-        print("Warning: Start gcode file not found, skipping...")
-        gcode += "; Start GCode\n"
-        gcode += "G28 ; Home all axes\n"
-        gcode += "G90 ; Absolute positioning\n"
+    # Drop points that barely change the shape
+    if simplify_tolerance:
+        count = svg_paths.point_count
+        with profiler.stage("simplify") as stage:
+            svg_paths = simplify_paths(svg_paths, simplify_tolerance)
+            stage.count(points=count)
+        log.info("Simplified paths: %d -> %d points", count, svg_paths.point_count)
     
-    # Normalize coordinates
-    svg_paths = normalize_svg_coordinates(svg_paths, target_size=size)
+    # Replace runs of short lines on a circle by G2/G3 arcs
+    if arc_tolerance:
+        with profiler.stage("arc fit") as stage:
+            arcs = fit_arcs(svg_paths, arc_tolerance, chord_tolerance=tolerance + simplify_tolerance)
+            stage.count(points=svg_paths.point_count)
+        svg_paths = report_arc_fitting(svg_paths, arcs, layer_height, writer)
+    return svg_paths, point_count
+
+
+def plan_paths(svg_file, size=60, start_x=40, start_y=40, layer_height=0.2,
+               tolerance=DEFAULT_TOLERANCE, simplify_tolerance=DEFAULT_SIMPLIFY_TOLERANCE,
+               arc_tolerance=DEFAULT_ARC_TOLERANCE, optimize_travel=True, debug=False,
+               cache=None, writer=None, infill_density=0.0, infill_angle=DEFAULT_INFILL_ANGLE,
+               walls=1, walls_outside=False, wall_join="miter", bounds="error",
+               profiler=NULL_PROFILER):
+    """
+    Prepare the paths of an SVG file (or binary file object) for printing:
+    the geometry from the cache or prepare_geometry(), the walls and infill
+    of its closed shapes, the bed bounds check, then the travel order.
+    With more than one wall every closed shape is printed walls times, one
+    nozzle width of writer apart, into the shape or around it with
+    walls_outside, with 'miter' or 'round' corners (wall_join).
+    With an infill_density above 0 the closed shapes are filled with lines
+    of the nozzle width, at infill_angle degrees and at right angles to it
+    on alternate layers, inside the walls.
+    The job must fit on the bed of writer (X_MIN..X_MAX, Y_MIN..Y_MAX, once
+    moved by start_x/start_y and the printer offsets), give or take how far
+    the fitted arcs may bulge past the points (see bounds_slack()): with
+    bounds 'error' a BedBoundsError is raised as soon as it is known not to,
+    before parsing when the size and start offset already rule it out, with
+    'clip' what is off the bed is cut off, and 'off' skips the check.
+    Returns (paths, infill, point_count, cache outcome) where infill is the
+    list of the infill of alternate layers (None without infill) and the
+    outcome is 'hit', 'miss' or None without a cache, or None if stopped in
+    debug mode.
+    """
+    writer = writer or default_writer()
+    bed = (writer.x_min, writer.y_min, writer.x_max, writer.y_max)
+    origin = (start_x + writer.x_offset, start_y + writer.y_offset)
+    slack = bounds_slack(arc_tolerance, tolerance + simplify_tolerance, writer.xy_precision)
+    if bounds == "error":
+        report = check_placement(bed, origin, size)
+        if report is not None:
+            raise BedBoundsError(report)
+    # The debug view needs the geometry before normalization, so it bypasses the cache
+    if debug:
+        cache = None
+    cached = None
+    if cache is not None:
+        with profiler.stage("cache lookup") as stage:
+            # As floats, so that size 60 and 60.0 share an entry
+            key = cache_key(svg_file, {
+                "size": None if size is None else float(size),
+                "tolerance": float(tolerance),
+                "simplify_tolerance": float(simplify_tolerance),
+                "arc_tolerance": float(arc_tolerance),
+            })
+            cached = cache.get(key)
+            if cached is not None:
+                stage.count(points=cached[0].point_count)
+    if cached is not None:
+        svg_paths, info = cached
+        point_count = info["points"]
+        log.info("Loaded %d paths of %s from the geometry cache", len(svg_paths), svg_file)
+    else:
+        prepared = prepare_geometry(svg_file, size, tolerance, simplify_tolerance,
+                                    arc_tolerance, layer_height, debug, writer, profiler)
+        if prepared is None:
+            return None
+        svg_paths, point_count = prepared
+        if cache is not None:
+            with profiler.stage("cache store") as stage:
+                cache.put(key, svg_paths, {"points": point_count})
+                stage.count(points=svg_paths.point_count)
     
-    prev_x = 0
-    prev_y = 0
-    gcode += G0(0, 0)  # Initial position
-    gcode += "\n; Begin SVG Print\n"
-    gcode += "; ==================\n"
-    # Generate G-code for each layer
-    for layer in range(layer_num):
-        z_height = layer * layer_height + layer_height
+    # Walls inside the shapes and the infill don't make the job bigger, so
+    # it can be turned down before they are made
+    grows = walls > 1 and walls_outside
+    if bounds == "error" and not grows:
+        _check_bed(svg_paths, bed, origin, slack, profiler)
+    
+    # Fill the shapes of every path before the ordering splits the paths up
+    infill = None
+    if infill_density:
+        inset = writer.nozzle_size * (1 if walls_outside else walls)
+        with profiler.stage("infill") as stage:
+            infill = [rectilinear_infill(svg_paths, infill_density, writer.nozzle_size, angle, inset)
+                      for angle in (infill_angle, infill_angle + 90)]
+            stage.count(paths=len(svg_paths), points=infill[0].point_count + infill[1].point_count)
+        log.info("Infill: %d lines per layer", infill[0].point_count // 2)
+    
+    # The outline is the first wall; the others are offsets of it
+    if walls > 1:
+        with profiler.stage("walls") as stage:
+            extra = perimeters(svg_paths, walls, writer.nozzle_size, walls_outside, wall_join)
+            stage.count(paths=len(svg_paths), points=extra.point_count)
+        log.info("Walls: %d loops added", len(extra))
+        svg_paths = PathSet.concatenate([svg_paths, extra])
+    
+    if bounds == "error" and grows:
+        _check_bed(svg_paths, bed, origin, slack, profiler)
+    elif bounds == "clip":
+        with profiler.stage("bounds") as stage:
+            report = check_bed(svg_paths, bed, origin, slack)
+            if report is not None:
+                svg_paths = clip_to_bed(svg_paths, bed, origin, tolerance)
+                if infill:
+                    infill = [clip_to_bed(fill, bed, origin, tolerance) for fill in infill]
+            stage.count(points=svg_paths.point_count)
+        if report is not None:
+            log.warning("Clipped to the bed: %s", format_report(report))
+    
+    # Print the paths in the order that needs the least travel
+    if optimize_travel:
+        # The nozzle starts at the bed origin, before the start offset
+        origin = (-start_x, -start_y)
+        travel = travel_distance(svg_paths, origin)
+        with profiler.stage("ordering") as stage:
+            svg_paths = order_paths(svg_paths, origin, DEFAULT_TIME_BUDGET)
+            stage.count(paths=len(svg_paths))
+        log.info("Travel per layer: %.1f mm -> %.1f mm", travel, travel_distance(svg_paths, origin))
+    return (svg_paths, infill, point_count,
+            None if cache is None else ("hit" if cached is not None else "miss"))
+
+
+def _check_bed(svg_paths, bed, origin, slack, profiler):
+    """
+    Raise a BedBoundsError if the paths don't fit on the bed, see check_bed().
+    """
+    with profiler.stage("bounds") as stage:
+        report = check_bed(svg_paths, bed, origin, slack)
+        stage.count(points=svg_paths.point_count)
+    if report is not None:
+        raise BedBoundsError(report)
+
+
+def convert_svg(svg_file, output_file="output.gcode", layer_num=20, size=60,
+                start_x=40, start_y=40, layer_height=0.2, tolerance=DEFAULT_TOLERANCE,
+                simplify_tolerance=DEFAULT_SIMPLIFY_TOLERANCE, arc_tolerance=DEFAULT_ARC_TOLERANCE,
+                optimize_travel=True, debug=False, cache=None, writer=None,
+                infill_density=0.0, infill_angle=DEFAULT_INFILL_ANGLE, walls=1,
+                walls_outside=False, wall_join="miter", bounds="error", copies=1,
+                spacing=DEFAULT_SPACING, compress_level=DEFAULT_COMPRESS_LEVEL,
+                profiler=NULL_PROFILER):
+    """
+    Convert one SVG file to a G-code file.
+    size is the size of the output in mm (None keeps the size set by the SVG),
+    a tolerance of 0 disables simplification or arc fitting, and debug shows
+    the parsed paths and asks before writing anything.
+    walls above 1 prints the closed shapes that many times, and an
+    infill_density above 0 (1 for solid) fills them, see plan_paths().
+    A job that doesn't fit on the bed raises a BedBoundsError before any
+    G-code is written; bounds 'clip' cuts it to the bed instead and 'off'
+    writes it as it is.
+    With copies above 1, or a list of files as svg_file, copies of every
+    file are placed side by side on the bed, spacing mm apart, instead of at
+    start_x/start_y, and printed as separate objects (see place_copies());
+    every file is only prepared once. The placement keeps every object on
+    the bed and raises a ValueError if they don't all fit, so bounds doesn't
+    apply to a plate.
+    The format of the output follows its name (see writer.package): a
+    .gcode.gz file is gzip compressed and a .gcode.3mf file is a package with
+    a thumbnail and the slice info, both at compress_level and as the G-code
+    is generated.
+    With a GeometryCache the prepared geometry is loaded from it when the
+    file was converted with the same size and tolerances before.
+    writer is the GcodeWriter with the printer and filament settings of the
+    job, the default one (config/config.json) if None.
+    With a Profiler the time and counts of every stage are recorded in it;
+    the time outside the named stages is reported as 'other'.
+    Returns a dict with the number of paths, flattened points, moves per
+    layer, bytes of G-code written and stored in the file, seconds taken, the estimated print time in seconds
+    and filament length in mm (see estimate_job()), the cache outcome ('hit', 'miss'
+    or None) and the profile (Profiler.to_dict(), or None without one),
+    or None if stopped in debug mode.
+    """
+    started = time.perf_counter()
+    svg_files = list(svg_file) if isinstance(svg_file, (list, tuple)) else [svg_file]
+    plate = len(svg_files) > 1 or copies > 1
+    with profiler.stage(OTHER):
+        designs = []
+        for svg_file in svg_files:
+            # The objects of a plate are planned at the origin and fit on the bed by placement
+            planned = plan_paths(svg_file, size, 0 if plate else start_x, 0 if plate else start_y,
+                                 layer_height, tolerance, simplify_tolerance, arc_tolerance,
+                                 optimize_travel, debug, cache, writer, infill_density,
+                                 infill_angle, walls, walls_outside, wall_join,
+                                 "off" if plate else bounds, profiler)
+            if planned is None:
+                return None
+            designs.append(planned)
+        objects = None
+        if plate:
+            with profiler.stage("tiling") as stage:
+                objects = place_copies([planned[:2] for planned in designs], copies, spacing, writer)
+                stage.count(paths=len(objects))
+            log.info("Plate: %d objects of %d files", len(objects), len(svg_files))
+            svg_paths, infill = None, None
+            start_x = start_y = 0
+            paths = sum(len(object_paths) for object_paths, _, _, _ in objects)
+            moves = sum(object_paths.point_count for object_paths, _, _, _ in objects)
+        else:
+            svg_paths, infill = designs[0][:2]
+            paths = len(svg_paths)
+            moves = svg_paths.point_count
+        point_count = sum(planned[2] for planned in designs)
+        outcomes = [planned[3] for planned in designs]
+        cache_outcome = outcomes[0] if len(set(outcomes)) == 1 else "miss"
         
-        # Add layer change block
-        gcode += layer_change_block_full(
-            layer_idx=layer,
-            z_height=z_height,
-            total_layers=layer_num,
-            layer_height=layer_height,
-            wipe=False
-        )
+        with profiler.stage("estimate") as stage:
+            if plate:
+                estimate = estimate_job(None, layer_num, layer_height, writer, objects=objects)
+            else:
+                estimate = estimate_job(svg_paths.translate(start_x, start_y), layer_num,
+                                        layer_height, writer,
+                                        [fill.translate(start_x, start_y) for fill in infill or ()])
+            stage.count(points=moves)
         
-        # Process each path in the SVG
-        for path in svg_paths:
-            
-            for point in path:
-                cmd_type, x, y = point
-                # Apply offset
-                x += start_x
-                y += start_y
-                
-                if cmd_type == 'move':
-                    # Move without extrusion (travel move)
-                    gcode += G0(x, y)
-                    prev_x = x
-                    prev_y = y
-                    
-                elif cmd_type == 'line':
-                    # Draw line with extrusion
-                    gcode += G1(x, y, prev_x=prev_x, prev_y=prev_y)
-                    prev_x = x
-                    prev_y = y
+        kind = output_format(output_file) if isinstance(output_file, str) else "gcode"
+        thumbnail = info = None
+        if kind == "3mf":
+            with profiler.stage("thumbnail") as stage:
+                if plate:
+                    placed = place_objects(objects)
+                else:
+                    placed = PathSet.concatenate([svg_paths] + list(infill or ())[:1]) \
+                        .translate(start_x, start_y)
+                thumbnail = plate_thumbnail(placed, tolerance or DEFAULT_TOLERANCE)
+                stage.count(points=placed.point_count)
+            names = [_design_name(name) for name in svg_files]
+            if plate:
+                design = {id(planned[0]): name for planned, name in zip(designs, names)}
+                names = [design[id(object_paths)] for object_paths, _, _, _ in objects]
+            info = {"prediction": estimate["print_seconds"], "weight": estimate["filament_g"],
+                    "filament_m": estimate["filament_mm"] / 1000,
+                    "nozzle_size": (writer or default_writer()).nozzle_size, "objects": names}
         
-        gcode += "\n"
+        # Stream the G-code to the output file, compressed on the way for gz and 3mf
+        with profiler.stage("write") as stage:
+            write_started = time.perf_counter()
+            with open_output(output_file, kind, compress_level, thumbnail, info) as sink, \
+                    GcodeStream(sink) as stream:
+                stream.write_all(iter_gcode(svg_paths, layer_num, layer_height, start_x, start_y,
+                                            writer=writer, infill=infill, estimate=estimate,
+                                            objects=objects, profiler=profiler))
+            write_seconds = time.perf_counter() - write_started
+            stored_bytes = _file_size(output_file) if isinstance(output_file, str) else stream.bytes_written
+            stage.count(bytes=stream.bytes_written, stored_bytes=stored_bytes)
     
-    # Read end gcode
+    log.info("G-code successfully written to %s", output_file)
+    if kind != "gcode":
+        log.info("Compressed %.2f MB to %.2f MB (%.3f of the G-code) at %.1f MB/s",
+                 stream.bytes_written / 1e6, stored_bytes / 1e6,
+                 stored_bytes / max(stream.bytes_written, 1),
+                 stream.bytes_written / 1e6 / max(write_seconds, 1e-9))
+    log.info("Total layers: %d", layer_num)
+    log.info("Estimated print time: %s (moves %s), filament: %.2f m, %.2f g",
+             format_duration(estimate["print_seconds"]), format_duration(estimate["model_seconds"]),
+             estimate["filament_mm"] / 1000, estimate["filament_g"])
+    return {
+        "paths": paths,
+        "points": point_count,
+        "moves": moves,
+        "bytes": stream.bytes_written,
+        "stored_bytes": stored_bytes,
+        "seconds": time.perf_counter() - started,
+        "print_seconds": estimate["print_seconds"],
+        "filament_mm": estimate["filament_mm"],
+        "cache": cache_outcome,
+        "profile": profiler.to_dict() if profiler.enabled else None,
+    }
+
+
+@contextlib.contextmanager
+def _capture_log(level):
+    """
+    Collect the log messages of the block in a StringIO instead of passing
+    them to the handlers of the root logger.
+    """
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    level_before, propagate_before = log.level, log.propagate
+    log.addHandler(handler)
+    log.setLevel(level)
+    log.propagate = False
     try:
-        with open("config/a1m_end.gcode", "r") as file:
-            end_gcode = file.read()
-            gcode += end_gcode
-    except FileNotFoundError:
-        print("Warning: End gcode file not found, using default...")
-        gcode += "; End GCode\n"
-        gcode += "G28 X Y ; Home X and Y\n"
-        gcode += "M104 S0 ; Turn off extruder\n"
-        gcode += "M140 S0 ; Turn off bed\n"
-        gcode += "M84 ; Disable motors\n"
-    
-    # Write the G-code to a file
-    with open("output.gcode", "w") as file:
-        file.write(gcode)
-    
-    print(f"G-code successfully written to output.gcode")
-    print(f"Total layers: {layer_num}")
+        yield output
+    finally:
+        log.removeHandler(handler)
+        log.setLevel(level_before)
+        log.propagate = propagate_before
+
+
+def _convert_job(svg_file, output_file, params, profile=False, log_level=logging.INFO):
+    """
+    Run convert_svg in a worker process. Its log is captured rather than
+    interleaved with the other workers', and any error is returned instead
+    of raised so one bad file doesn't stop the batch.
+    Returns (stats, error, log).
+    """
+    profiler = Profiler() if profile else NULL_PROFILER
+    with _capture_log(log_level) as output:
+        try:
+            return convert_svg(svg_file, output_file, profiler=profiler, **params), None, output.getvalue()
+        except Exception as error:
+            return None, f"{type(error).__name__}: {error}", output.getvalue()
+
+
+def _design_name(svg_file):
+    return os.path.basename(svg_file) if isinstance(svg_file, str) else "object"
+
+
+def _size_arg(text):
+    return None if text.lower() == "none" else float(text)
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line; every parameter of convert_svg has a flag.
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert SVG files to G-code for 3D printing.")
+    parser.add_argument("inputs", nargs="*",
+                        help=f"SVG files or directories of SVG files (default: {DEFAULT_SVG_FILE} "
+                             f"written to {DEFAULT_OUTPUT_FILE})")
+    parser.add_argument("-o", "--output-dir",
+                        help="directory for the G-code files (default: next to each input)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of files converted in parallel (default: one per core)")
+    parser.add_argument("--layers", dest="layer_num", type=int, default=20,
+                        help="number of layers to print (default: %(default)s)")
+    parser.add_argument("--size", type=_size_arg, default=60,
+                        help="size of the output in mm, 'none' keeps the size set by the SVG "
+                             "(default: %(default)s)")
+    parser.add_argument("--start-x", type=float, default=40,
+                        help="X offset of the print in mm (default: %(default)s)")
+    parser.add_argument("--start-y", type=float, default=40,
+                        help="Y offset of the print in mm (default: %(default)s)")
+    parser.add_argument("--layer-height", type=float, default=0.2,
+                        help="height of each layer in mm (default: %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="maximum curve flattening error in mm (default: %(default)s)")
+    parser.add_argument("--simplify-tolerance", type=float, default=DEFAULT_SIMPLIFY_TOLERANCE,
+                        help="maximum simplification error in mm, 0 disables it (default: %(default)s)")
+    parser.add_argument("--arc-tolerance", type=float, default=DEFAULT_ARC_TOLERANCE,
+                        help="maximum arc fitting error in mm, 0 disables G2/G3 (default: %(default)s)")
+    parser.add_argument("--infill-density", type=float, default=0.0,
+                        help="fill closed shapes with lines covering this fraction of their "
+                             "area, 1 for solid, 0 for outlines only (default: %(default)s)")
+    parser.add_argument("--infill-angle", type=float, default=DEFAULT_INFILL_ANGLE,
+                        help="direction of the infill lines in degrees, turned by 90 on "
+                             "alternate layers (default: %(default)s)")
+    parser.add_argument("--walls", type=int, default=1,
+                        help="number of walls printed around closed shapes, one nozzle "
+                             "width apart, counting the outline (default: %(default)s)")
+    parser.add_argument("--walls-outside", action="store_true",
+                        help="add the walls around the shapes instead of inside them")
+    parser.add_argument("--wall-join", choices=JOINS, default="miter",
+                        help="corners of the added walls (default: %(default)s)")
+    parser.add_argument("--bounds", choices=BOUNDS_MODES, default="error",
+                        help="what to do with a job that doesn't fit on the bed of the config: "
+                             "stop with a report, clip it to the bed or ignore it; a plate "
+                             "(--copies, --plate) is always placed on the bed and stops if it "
+                             "doesn't fit (default: %(default)s)")
+    parser.add_argument("--copies", type=int, default=1,
+                        help="number of copies of each file placed side by side on the bed, "
+                             "instead of at --start-x/--start-y (default: %(default)s)")
+    parser.add_argument("--plate", action="store_true",
+                        help=f"place all the input files on one bed, written to "
+                             f"{PLATE_OUTPUT_FILE}")
+    parser.add_argument("--spacing", type=float, default=DEFAULT_SPACING,
+                        help="gap between the objects of a plate in mm (default: %(default)s)")
+    parser.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default="gcode",
+                        help="output format: plain G-code, gzip compressed (.gcode.gz) or a "
+                             "Bambu .gcode.3mf package with a thumbnail (default: %(default)s)")
+    parser.add_argument("--compress-level", type=int, default=DEFAULT_COMPRESS_LEVEL,
+                        help="deflate level of the gz and 3mf formats, 1 (fastest) to 9 (smallest) "
+                             "(default: %(default)s)")
+    parser.add_argument("--no-optimize-travel", dest="optimize_travel", action="store_false",
+                        help="keep the path order of the SVG")
+    parser.add_argument("--config",
+                        help="printer and filament config file (default: config/config.json)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="directory of the parsed geometry cache (default: %(default)s)")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_CACHE_SIZE / 1024**2,
+                        help="size limit of the geometry cache in MB (default: %(default)s)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="always parse the SVG files again")
+    parser.add_argument("--debug", action="store_true",
+                        help="show the parsed paths and ask before writing (runs one file at a time)")
+    parser.add_argument("--profile", action="store_true",
+                        help="report the time, counts and throughput of every pipeline stage")
+    parser.add_argument("--profile-format", choices=("text", "json"), default="text",
+                        help="format of the --profile report (default: %(default)s)")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-v", "--verbose", dest="log_level", action="store_const",
+                           const=logging.DEBUG, default=logging.INFO,
+                           help="also log the points of every path")
+    verbosity.add_argument("-q", "--quiet", dest="log_level", action="store_const",
+                           const=logging.WARNING, help="only log warnings and errors")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if not 0 <= args.infill_density <= 1:
+        parser.error("--infill-density must be between 0 and 1")
+    if args.walls < 1:
+        parser.error("--walls must be at least 1")
+    if args.copies < 1:
+        parser.error("--copies must be at least 1")
+    if not 1 <= args.compress_level <= 9:
+        parser.error("--compress-level must be between 1 and 9")
+    return args
+
+
+def _output_name(name, kind):
+    return os.path.splitext(name)[0] + OUTPUT_FORMATS[kind]
+
+
+def collect_jobs(inputs, output_dir=None, plate=False, kind="gcode"):
+    """
+    Expand the input files and directories into (svg_file, output_file) pairs.
+    Without inputs the default SVG file is converted to the default output file.
+    With plate all the files make one job, a tuple of files written to the
+    plate output file. The output files get the extension of the output
+    format kind (see OUTPUT_FORMATS).
+    """
+    if not inputs:
+        output_file = _output_name(DEFAULT_OUTPUT_FILE, kind)
+        return [(DEFAULT_SVG_FILE, os.path.join(output_dir or "", output_file))]
+    svg_files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            svg_files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                    if name.lower().endswith(".svg")))
+        else:
+            svg_files.append(path)
+    if plate:
+        output_file = _output_name(PLATE_OUTPUT_FILE, kind)
+        return [(tuple(svg_files), os.path.join(output_dir or "", output_file))] if svg_files else []
+    jobs = []
+    for svg_file in svg_files:
+        name = _output_name(os.path.basename(svg_file), kind)
+        directory = output_dir if output_dir is not None else os.path.dirname(svg_file)
+        jobs.append((svg_file, os.path.join(directory, name)))
+    return jobs
+
+
+def run_jobs(jobs, params, workers, profile=False):
+    """
+    Convert every (svg_file, output_file) pair, spreading the files over
+    a pool of worker processes when there is more than one worker.
+    With profile every file gets a Profiler, returned in its stats.
+    Returns a list of (svg_file, stats, error) in input order.
+    """
+    results = {}
+    if workers <= 1 or len(jobs) <= 1:
+        for svg_file, output_file in jobs:
+            profiler = Profiler() if profile else NULL_PROFILER
+            try:
+                results[svg_file] = (convert_svg(svg_file, output_file, profiler=profiler, **params),
+                                     None)
+            except Exception as error:
+                results[svg_file] = (None, f"{type(error).__name__}: {error}")
+                log.error("%s: %s", svg_file, results[svg_file][1])
+    else:
+        # Largest files first, so a big file doesn't start last and hold up the batch
+        pending = sorted(jobs, key=lambda job: -_file_size(job[0]))
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = {pool.submit(_convert_job, svg_file, output_file, params, profile,
+                                   log.getEffectiveLevel()): svg_file
+                       for svg_file, output_file in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                svg_file = futures[future]
+                try:
+                    stats, error, output = future.result()
+                except Exception as error:  # the worker died, e.g. out of memory
+                    stats, error, output = None, f"{type(error).__name__}: {error}", ""
+                results[svg_file] = (stats, error)
+                if error:
+                    log.error("[%d/%d] %s: failed: %s", done, len(jobs), svg_file, error)
+                    if output:
+                        log.error("%s", output.rstrip("\n"))
+                else:
+                    log.info("[%d/%d] %s: %.2f s", done, len(jobs), svg_file, stats["seconds"])
+    return [(svg_file, *results[svg_file]) for svg_file, _ in jobs]
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def print_summary(results, elapsed):
+    """
+    Print a table of the time and point counts of every converted file.
+    """
+    width = max([len("File")] + [len(svg_file) for svg_file, _, _ in results])
+    print(f"\n{'File':<{width}}  {'Status':<6}  {'Time s':>8}  {'Paths':>7}  {'Points':>9}  "
+          f"{'Moves':>9}  {'KB':>9}  {'Print':>10}  Cache")
+    failed = 0
+    busy = 0.0
+    for svg_file, stats, error in results:
+        if stats is None:
+            failed += 1
+            print(f"{svg_file:<{width}}  {'failed' if error else 'stopped'}  {error or ''}")
+            continue
+        busy += stats["seconds"]
+        print(f"{svg_file:<{width}}  {'ok':<6}  {stats['seconds']:>8.2f}  {stats['paths']:>7}  "
+              f"{stats['points']:>9}  {stats['moves']:>9}  {stats['stored_bytes'] / 1000:>9.1f}  "
+              f"{format_duration(stats['print_seconds']):>10}  {stats['cache'] or '-'}")
+    print(f"{len(results) - failed} of {len(results)} files converted in {elapsed:.2f} s "
+          f"({busy:.2f} s of conversion, {len(results) / max(elapsed, 1e-9):.2f} files/s)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(format="%(message)s")
+    log.setLevel(args.log_level)
+    params = {
+        "layer_num": args.layer_num,
+        "size": args.size,
+        "start_x": args.start_x,
+        "start_y": args.start_y,
+        "layer_height": args.layer_height,
+        "tolerance": args.tolerance,
+        "simplify_tolerance": args.simplify_tolerance,
+        "arc_tolerance": args.arc_tolerance,
+        "optimize_travel": args.optimize_travel,
+        "infill_density": args.infill_density,
+        "infill_angle": args.infill_angle,
+        "walls": args.walls,
+        "walls_outside": args.walls_outside,
+        "wall_join": args.wall_join,
+        "bounds": args.bounds,
+        "copies": args.copies,
+        "spacing": args.spacing,
+        "compress_level": args.compress_level,
+        "debug": args.debug,
+        "cache": GeometryCache(args.cache_dir, int(args.cache_size * 1024**2)) if args.cache else None,
+        "writer": GcodeWriter(args.config) if args.config else None,
+    }
+    jobs = collect_jobs(args.inputs, args.output_dir, args.plate, args.output_format)
+    if not jobs:
+        log.error("No SVG files found")
+        return 1
+    plate = args.copies > 1 or any(isinstance(svg_file, tuple) and len(svg_file) > 1
+                                   for svg_file, _ in jobs)
+    if plate and args.bounds != "error":
+        log.warning("--bounds %s doesn't apply to a plate: its objects are placed on the bed, "
+                    "and a plate that doesn't fit stops with an error", args.bounds)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    # Debug mode asks questions, so it can't run in the background
+    workers = 1 if args.debug else args.jobs
+    started = time.perf_counter()
+    results = run_jobs(jobs, params, workers, args.profile)
+    if len(results) > 1:
+        print_summary(results, time.perf_counter() - started)
+    if params["cache"] is not None:
+        outcomes = [stats["cache"] for _, stats, _ in results if stats is not None]
+        log.info("Geometry cache: %d hits, %d misses", outcomes.count("hit"), outcomes.count("miss"))
+    if args.profile:
+        # The stages of all files together
+        profiler = Profiler()
+        for _, stats, _ in results:
+            if stats is not None:
+                profiler.merge(stats["profile"])
+        print(profiler.to_json() if args.profile_format == "json" else profiler.format_table())
+    return 1 if any(error for _, _, error in results) else 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,8 @@
+"""
+Test setup: the modules are imported from the repository root, as the
+scripts in benchmarks/ do.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,93 @@
+"""
+Tests of the G2/G3 arc fitting (geometry.arcfit) and the arc writers
+"""
+import math
+
+import numpy as np
+import pytest
+
+from geometry.arcfit import MIN_ARC_POINTS, fit_arc, fit_arcs
+from geometry.pathset import PathSet, MOVE, LINE, ARC_CW, ARC_CCW
+from writer.gcodewriter import G2, G3, GcodeWriter
+
+TOLERANCE = 0.02
+
+
+def _path(coords):
+    coords = np.asarray(coords, dtype=np.float64)
+    codes = np.r_[MOVE, np.full(len(coords) - 1, LINE)].astype(np.uint8)
+    return PathSet.from_arrays([coords], [codes])
+
+
+def _arc_points(radius, start, sweep, count, center=(0.0, 0.0)):
+    angles = start + sweep * np.linspace(0, 1, count)
+    return np.column_stack([center[0] + radius * np.cos(angles),
+                            center[1] + radius * np.sin(angles)])
+
+
+@pytest.mark.parametrize("sweep, code", [(math.pi, ARC_CCW), (-math.pi, ARC_CW)])
+def test_flattened_half_circle_becomes_one_arc(sweep, code):
+    points = _arc_points(10, 0, sweep, 60)
+    fitted = fit_arcs(_path(points), TOLERANCE)
+    assert fitted.codes.tolist() == [MOVE, code]
+    assert fitted.centers[1] == pytest.approx([0, 0], abs=1e-9)
+    assert fitted.coords[-1] == pytest.approx(points[-1])
+
+
+def test_full_circle_is_an_arc_of_less_than_a_turn_and_a_few_moves():
+    # An arc ending where it starts would be a full circle or nothing
+    points = _arc_points(5, 0, 2 * math.pi, 121)
+    fitted = fit_arcs(_path(points), TOLERANCE)
+    assert fitted.codes[1] == ARC_CCW
+    assert len(fitted.coords) <= MIN_ARC_POINTS + 1
+    assert not np.allclose(fitted.coords[1], fitted.coords[0])
+    assert fitted.coords[-1] == pytest.approx(points[-1])
+
+
+def test_arc_stays_within_tolerance_of_the_points_it_replaces():
+    rng = np.random.default_rng(0)
+    points = _arc_points(8, 0.3, 2.0, 80)
+    points += rng.uniform(-0.005, 0.005, points.shape)
+    fitted = fit_arcs(_path(points), TOLERANCE)
+    assert (fitted.codes == ARC_CCW).any()
+    for center in fitted.centers[~np.isnan(fitted.centers[:, 0])]:
+        radius = np.hypot(*(fitted.coords[1] - center))
+        assert np.abs(np.hypot(*(points - center).T) - radius).max() <= TOLERANCE
+
+
+@pytest.mark.parametrize("sides", [4, 6, 8])
+def test_polygons_keep_their_corners(sides):
+    corners = _arc_points(10, 0, 2 * math.pi, sides + 1)
+    fitted = fit_arcs(_path(corners), TOLERANCE)
+    assert np.all(fitted.codes[1:] == LINE)
+    assert len(fitted.coords) == sides + 1
+
+
+def test_straight_lines_and_zigzags_are_not_arcs():
+    line = np.column_stack([np.arange(10.0), np.zeros(10)])
+    zigzag = np.column_stack([np.arange(10.0), 0.01 * (np.arange(10) % 2)])
+    for points in (line, zigzag):
+        fitted = fit_arcs(_path(points), TOLERANCE)
+        assert np.all(fitted.codes[1:] == LINE)
+    assert fit_arc(line) is None
+
+
+def test_arcs_do_not_cross_path_starts():
+    first = _arc_points(10, 0, math.pi / 2, 20)
+    second = _arc_points(10, math.pi / 2, math.pi / 2, 20)
+    paths = PathSet.concatenate([_path(first), _path(second)])
+    fitted = fit_arcs(paths, TOLERANCE)
+    assert len(fitted) == 2
+    assert fitted.codes.tolist() == [MOVE, ARC_CCW, MOVE, ARC_CCW]
+
+
+def test_arc_writers_take_the_start_point():
+    writer = GcodeWriter(X_OFFSET=0, Y_OFFSET=0)
+    # A quarter circle of radius 10 around (0, 0), from (10, 0) to (0, 10)
+    length = 10 * math.pi / 2
+    g3 = G3(0, 10, 10, 0, -10, 0)
+    assert g3.startswith("G3 X0 Y10 I-10 J0 E")
+    assert float(g3.split(" E")[1].split()[0]) == pytest.approx(length * writer.e_per_mm, abs=1e-5)
+    # The same end points clockwise go three quarters of the way round
+    g2 = G2(0, 10, 10, 0, -10, 0)
+    assert float(g2.split(" E")[1].split()[0]) == pytest.approx(3 * length * writer.e_per_mm, abs=1e-5)
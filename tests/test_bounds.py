@@ -0,0 +1,160 @@
+"""
+Tests of the bed bounds check and the Liang-Barsky clipping
+(geometry.bounds)
+"""
+import io
+import logging
+import pickle
+
+import numpy as np
+import pytest
+
+from geometry.bounds import (BedBoundsError, bounds_slack, check_bed, check_placement,
+                             clip_to_bed, job_extents)
+from geometry.pathset import PathSet, MOVE, LINE, ARC_CW, ARC_CCW
+from svg_to_gcode import convert_svg, main, plan_paths
+
+BED = (0.0, 0.0, 100.0, 100.0)
+
+
+def _path(coords, codes=None, centers=None):
+    coords = np.asarray(coords, dtype=np.float64)
+    if codes is None:
+        codes = np.r_[MOVE, np.full(len(coords) - 1, LINE)]
+    paths = PathSet.from_arrays([coords], [np.asarray(codes, dtype=np.uint8)])
+    if centers is not None:
+        paths.centers = np.asarray(centers, dtype=np.float64)
+    return paths
+
+
+def test_job_on_the_bed_passes():
+    assert check_bed(_path([[0, 0], [100, 0], [100, 100]]), BED) is None
+    assert check_bed(_path([[0, 0], [10, 10]]), BED, origin=(90, 90)) is None
+
+
+def test_report_of_a_job_off_the_bed():
+    report = check_bed(_path([[10, 10], [20, 10], [20, 20]]), BED, origin=(85, -15))
+    assert report["overflow"] == pytest.approx({"X_MAX": 5.0, "Y_MIN": 5.0})
+    assert report["extents"] == pytest.approx((95, -5, 105, 5))
+    assert report["moves"] == 3 and report["moves_outside"] == 3
+    error = BedBoundsError(report)
+    assert "5.00 mm past X_MAX" in str(error)
+    assert pickle.loads(pickle.dumps(error)).report == report
+
+
+def test_arcs_that_bulge_past_an_edge_are_caught():
+    # Counterclockwise half circles of radius 10 bulge right of their end points,
+    # to X 100 and, 5 mm further right, to X 105
+    inside = _path([[90, 50], [90, 70]], [MOVE, ARC_CCW], [[np.nan, np.nan], [90, 60]])
+    bulging = _path([[95, 50], [95, 70]], [MOVE, ARC_CCW], [[np.nan, np.nan], [95, 60]])
+    assert job_extents(inside)[2] == pytest.approx(100)
+    assert check_bed(inside, BED) is None
+    assert check_bed(bulging, BED)["overflow"] == pytest.approx({"X_MAX": 5.0})
+
+
+def test_placement_is_checked_before_parsing():
+    assert check_placement(BED, (40, 40), 60) is None
+    assert check_placement(BED, (40, 40), 70)["overflow"] == pytest.approx({"X_MAX": 10.0})
+    assert "X_MIN" in check_placement(BED, (-1, 40), 10)["overflow"]
+    assert check_placement(BED, (40, 40), None) is None
+
+
+def test_clipping_cuts_lines_where_they_cross_the_edges():
+    # A line across the whole bed and beyond on both sides
+    clipped = clip_to_bed(_path([[-50, 50], [150, 50]]), BED)
+    assert clipped.coords.tolist() == [[0, 50], [100, 50]]
+    assert clipped.codes.tolist() == [MOVE, LINE]
+
+
+def test_clipping_a_diagonal_corner():
+    clipped = clip_to_bed(_path([[90, 80], [110, 100]]), BED)
+    assert clipped.coords == pytest.approx(np.array([[90, 80], [100, 90]]))
+
+
+def test_a_path_that_leaves_the_bed_travels_to_where_it_comes_back():
+    clipped = clip_to_bed(_path([[90, 10], [110, 10], [110, 20], [90, 20]]), BED)
+    assert clipped.coords.tolist() == [[90, 10], [100, 10], [100, 20], [90, 20]]
+    assert clipped.codes.tolist() == [MOVE, LINE, MOVE, LINE]
+    assert check_bed(clipped, BED) is None
+
+
+def test_paths_off_the_bed_are_dropped_and_the_rest_keep_their_order():
+    paths = PathSet.concatenate([_path([[10, 10], [20, 10]]), _path([[200, 10], [210, 10]]),
+                                 _path([[30, 10], [40, 10]])])
+    clipped = clip_to_bed(paths, BED)
+    assert len(clipped) == 2
+    assert clipped.coords.tolist() == [[10, 10], [20, 10], [30, 10], [40, 10]]
+
+
+def test_clipping_in_machine_coordinates():
+    clipped = clip_to_bed(_path([[0, 0], [30, 0]]), BED, origin=(80, 50))
+    assert clipped.coords.tolist() == [[0, 0], [20, 0]]
+
+
+def test_arcs_on_the_bed_stay_arcs_and_crossing_arcs_become_chords():
+    paths = PathSet.concatenate([
+        _path([[50, 40], [50, 60]], [MOVE, ARC_CW], [[np.nan, np.nan], [50, 50]]),
+        _path([[95, 40], [95, 60]], [MOVE, ARC_CCW], [[np.nan, np.nan], [95, 50]]),
+    ])
+    clipped = clip_to_bed(paths, BED, tolerance=0.01)
+    assert clipped.codes[1] == ARC_CW
+    assert clipped.centers[1].tolist() == [50, 50]
+    rest = clipped.coords[2:]
+    assert rest[:, 0].max() == pytest.approx(100)
+    assert np.all(clipped.codes[3:] != ARC_CCW)
+    assert check_bed(clipped, BED) is None
+
+
+def test_unknown_bed_is_not_checked():
+    paths = _path([[-50, 50], [150, 50]])
+    assert check_bed(paths, (0, 0, 0, 0)) is None
+    assert clip_to_bed(paths, (0, 0, 0, 0)) is paths
+
+
+def test_tiny_overflows_are_reported_with_enough_digits():
+    report = check_bed(_path([[0, 0], [10, 100.0043]]), BED)
+    assert "0.0043 mm past Y_MAX" in str(BedBoundsError(report))
+
+
+def test_slack_covers_the_arc_bulge_and_the_output_precision():
+    assert bounds_slack(0.02, 0.07, 3) == pytest.approx(0.09)
+    assert bounds_slack(0, 0.07, 3) == pytest.approx(0.001)
+    paths = _path([[0, 100], [100, 100]])
+    assert check_bed(paths, BED, origin=(0, 0.05)) is not None
+    assert check_bed(paths, BED, origin=(0, 0.05), slack=0.09) is None
+
+
+# A circle rotated so that no flattened point lands on its top: the arcs
+# fitted to it reach a little past the 60 mm the points are scaled to
+CURVED_SVG = b"""<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+<circle cx="50" cy="50" r="50" transform="rotate(7 50 50)"/></svg>"""
+
+
+def test_curved_design_flush_with_the_bed_edge_passes_with_the_defaults(tmp_path):
+    logging.disable(logging.WARNING)
+    try:
+        # 60 mm at (40, 40) ends exactly at X_MAX and Y_MAX of the 100 mm bed
+        paths = plan_paths(io.BytesIO(CURVED_SVG), bounds="off")[0]
+        assert job_extents(paths)[3] > 60
+        stats = convert_svg(io.BytesIO(CURVED_SVG), str(tmp_path / "out.gcode"), 2)
+    finally:
+        logging.disable(logging.NOTSET)
+    assert stats["moves"] > 0
+    with pytest.raises(BedBoundsError):
+        convert_svg(io.BytesIO(CURVED_SVG), str(tmp_path / "out.gcode"), 2, start_x=41)
+
+
+@pytest.mark.parametrize("bounds, warned", [("error", False), ("clip", True), ("off", True)])
+def test_bounds_modes_that_dont_apply_to_a_plate_are_reported(tmp_path, caplog, bounds, warned):
+    svg = tmp_path / "a.svg"
+    svg.write_bytes(CURVED_SVG)
+    argv = [str(svg), "-o", str(tmp_path), "-j", "1", "--no-cache", "--layers", "2",
+            "--size", "20", "--copies", "2", "--bounds", bounds]
+    assert main(argv) == 0
+    warnings = [record.message for record in caplog.records if record.levelno == logging.WARNING]
+    assert any("doesn't apply to a plate" in message for message in warnings) == warned
+
+
+def test_a_plate_that_doesnt_fit_stops():
+    with pytest.raises(ValueError, match="objects fit on the bed"):
+        convert_svg(io.BytesIO(CURVED_SVG), io.BytesIO(), 2, copies=4)
@@ -0,0 +1,53 @@
+"""
+Tests of the on-disk geometry cache (geometry.cache)
+"""
+import io
+import os
+
+import numpy as np
+import pytest
+
+from geometry.cache import GeometryCache, cache_key
+from geometry.pathset import PathSet, MOVE, LINE, ARC_CW
+
+
+def _paths():
+    paths = PathSet.from_arrays([np.array([[0, 0], [10, 0], [10, 10]], float)],
+                                [np.array([MOVE, LINE, ARC_CW], dtype=np.uint8)])
+    paths.centers = np.array([[np.nan, np.nan], [np.nan, np.nan], [10, 5]])
+    return paths
+
+
+def test_key_follows_the_content_and_the_settings():
+    key = cache_key(io.BytesIO(b"<svg/>"), {"size": 60.0})
+    assert key == cache_key(io.BytesIO(b"<svg/>"), {"size": 60.0})
+    assert key != cache_key(io.BytesIO(b"<svg />"), {"size": 60.0})
+    assert key != cache_key(io.BytesIO(b"<svg/>"), {"size": 50.0})
+
+
+def test_stored_geometry_is_loaded_back(tmp_path):
+    cache = GeometryCache(str(tmp_path))
+    assert cache.get("key") is None
+    cache.put("key", _paths(), {"points": 3})
+    paths, info = cache.get("key")
+    assert info == {"points": 3}
+    np.testing.assert_array_equal(paths.coords, _paths().coords)
+    np.testing.assert_array_equal(paths.codes, _paths().codes)
+    np.testing.assert_array_equal(paths.centers, _paths().centers)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.parametrize("kept", [0.5, 0.0])
+def test_truncated_entry_is_a_miss_and_deleted(tmp_path, kept):
+    cache = GeometryCache(str(tmp_path))
+    cache.put("key", _paths())
+    path = os.path.join(str(tmp_path), "key.npz")
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path, "wb") as file:
+        file.write(data[:int(len(data) * kept)])
+    assert cache.get("key") is None
+    assert cache.misses == 1
+    assert not os.path.exists(path)
+    cache.put("key", _paths())
+    assert cache.get("key") is not None
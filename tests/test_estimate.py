@@ -0,0 +1,77 @@
+"""
+Tests of the print time estimate (writer.estimate)
+"""
+import math
+
+import numpy as np
+import pytest
+
+from writer.estimate import (corner_speeds2, format_duration, junction_deviation, move_times,
+                             path_times)
+
+ACCEL = 1000.0
+JERK = 10.0
+
+
+def test_long_move_accelerates_cruises_and_brakes():
+    # Reaching 100 mm/s takes 5 mm and 0.1 s at each end
+    length, speed = 100.0, 100.0
+    times = move_times([length], [speed], ACCEL)
+    assert times[0] == pytest.approx(length / speed + speed / ACCEL)
+
+
+def test_short_move_never_reaches_its_feed_rate():
+    # Accelerating over half the move and braking over the other half
+    length = 2.0
+    times = move_times([length], [100.0], ACCEL)
+    assert times[0] == pytest.approx(2 * math.sqrt(length / ACCEL))
+
+
+def test_straight_run_of_short_moves_takes_as_long_as_one_move():
+    coords = np.column_stack([np.linspace(1, 100, 100), np.zeros(100)])
+    lengths = np.ones(100)
+    speeds = np.full(100, 100.0)
+    split = path_times(coords, lengths, speeds, ACCEL, JERK).sum()
+    whole = move_times([100.0], [100.0], ACCEL).sum()
+    assert split == pytest.approx(whole)
+
+
+def test_corners_slow_down_more_the_sharper_they_turn():
+    straight, right, reverse = np.array([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0]])
+    exits = np.array([straight, straight, straight])
+    entries = np.array([straight, right, reverse])
+    speeds2 = corner_speeds2(exits, entries, ACCEL, junction_deviation(ACCEL, JERK))
+    assert speeds2[0] == np.inf
+    assert 0 < speeds2[1] < np.inf
+    assert speeds2[2] == 0
+
+
+def test_square_takes_longer_than_the_straight_line_of_the_same_length():
+    square = np.array([[10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]])
+    line = np.column_stack([[10.0, 20.0, 30.0, 40.0], np.zeros(4)])
+    lengths = np.full(4, 10.0)
+    speeds = np.full(4, 100.0)
+    assert path_times(square, lengths, speeds, ACCEL, JERK).sum() > \
+        path_times(line, lengths, speeds, ACCEL, JERK).sum()
+
+
+def test_arc_moves_run_through_their_tangent_joins():
+    # A half circle as one G3 after a line that runs into it tangentially
+    coords = np.array([[10.0, 0.0], [10.0, 10.0]])
+    centers = np.array([[np.nan, np.nan], [10.0, 5.0]])
+    lengths = np.array([10.0, 5 * math.pi])
+    speeds = np.full(2, 50.0)
+    times = path_times(coords, lengths, speeds, ACCEL, JERK, centers=centers,
+                       clockwise=np.array([False, False]))
+    assert times.sum() == pytest.approx(move_times(lengths, speeds, ACCEL, np.full(1, np.inf)).sum())
+    assert times.sum() < move_times(lengths, speeds, ACCEL, np.zeros(1)).sum()
+
+
+def test_empty_sequence():
+    assert len(move_times([], [], ACCEL)) == 0
+
+
+@pytest.mark.parametrize("seconds, text", [(0, "0s"), (59.6, "1m 0s"), (3723, "1h 2m 3s"),
+                                           (90061, "1d 1h 1m 1s")])
+def test_format_duration(seconds, text):
+    assert format_duration(seconds) == text
@@ -0,0 +1,67 @@
+"""
+Tests of curve flattening to a chord tolerance (geometry.flatten, through
+reader.pathdata.parse_path_data)
+"""
+import math
+
+import numpy as np
+import pytest
+
+from geometry.pathset import MOVE, LINE
+from reader.pathdata import parse_path_data
+
+
+def _distances_to_polyline(points, polyline):
+    starts, ends = polyline[:-1], polyline[1:]
+    edge = ends - starts
+    rel = points[:, None, :] - starts[None, :, :]
+    t = np.clip(np.einsum("pij,ij->pi", rel, edge) / np.einsum("ij,ij->i", edge, edge), 0, 1)
+    nearest = starts[None] + t[..., None] * edge[None]
+    return np.hypot(*(points[:, None, :] - nearest).transpose(2, 0, 1)).min(axis=1)
+
+
+def _cubic(p0, p1, p2, p3, t):
+    t = t[:, None]
+    return (1 - t)**3 * p0 + 3 * (1 - t)**2 * t * p1 + 3 * (1 - t) * t**2 * p2 + t**3 * p3
+
+
+@pytest.mark.parametrize("tolerance", [0.5, 0.05, 0.005])
+def test_cubic_stays_within_tolerance(tolerance):
+    coords, codes = parse_path_data("M0 0 C0 40 40 40 40 0", tolerance)
+    assert codes[0] == MOVE and np.all(codes[1:] == LINE)
+    assert coords[0].tolist() == [0, 0] and coords[-1].tolist() == [40, 0]
+    curve = _cubic(*np.array([[0, 0], [0, 40], [40, 40], [40, 0]], float), np.linspace(0, 1, 2001))
+    assert _distances_to_polyline(curve, coords).max() <= tolerance
+
+
+def test_finer_tolerance_gives_more_points():
+    counts = [len(parse_path_data("M0 0 C0 40 40 40 40 0", tolerance)[0])
+              for tolerance in (0.5, 0.05, 0.005)]
+    assert counts[0] < counts[1] < counts[2]
+
+
+@pytest.mark.parametrize("tolerance", [0.1, 0.01])
+def test_arc_points_lie_on_the_circle_and_chords_within_tolerance(tolerance):
+    coords, _ = parse_path_data("M10 0 A10 10 0 1 1 -10 0 A10 10 0 1 1 10 0", tolerance)
+    radii = np.hypot(coords[:, 0], coords[:, 1])
+    assert radii == pytest.approx(10)
+    middles = (coords[1:] + coords[:-1]) / 2
+    sagitta = 10 - np.hypot(middles[:, 0], middles[:, 1])
+    assert sagitta.max() <= tolerance + 1e-12
+    # The two half circles go all the way round
+    angles = np.unwrap(np.arctan2(coords[:, 1], coords[:, 0]))
+    assert abs(angles[-1] - angles[0]) == pytest.approx(2 * math.pi)
+
+
+def test_tolerance_in_mm_follows_the_print_size():
+    # A 40 unit drawing printed 4 mm wide needs a 10 times finer tolerance
+    # in drawing units, so more points
+    large = parse_path_data("M0 0 C0 40 40 40 40 0", 0.05, target_size=400)[0]
+    small = parse_path_data("M0 0 C0 40 40 40 40 0", 0.05, target_size=4)[0]
+    assert len(small) < len(large)
+
+
+def test_lines_are_not_subdivided():
+    coords, codes = parse_path_data("M0 0 L10 0 L10 10 Z", 0.001)
+    assert coords.tolist() == [[0, 0], [10, 0], [10, 10], [0, 0]]
+    assert codes.tolist() == [MOVE, LINE, LINE, LINE]
@@ -0,0 +1,67 @@
+"""
+Tests of the buffered G-code sink (writer.gcodestream) and the start/end
+G-code templates it copies
+"""
+import io
+
+import numpy as np
+
+from geometry.pathset import PathSet, MOVE, LINE
+from svg_to_gcode import iter_gcode
+from writer.gcodestream import GcodeStream
+
+TEMPLATE_TEXT = "; Bett 65°C, Düse 200°C\n"
+
+
+def test_text_reaches_a_file_in_order(tmp_path):
+    path = str(tmp_path / "out.gcode")
+    with GcodeStream(path, buffer_size=8) as stream:
+        for number in range(100):
+            stream.write(f"G1 X{number}\n")
+        stream.write_bytes(b"M400\n")
+    with open(path, encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert lines == [f"G1 X{number}" for number in range(100)] + ["M400"]
+
+
+def test_non_ascii_text_is_written_as_utf8(tmp_path):
+    path = str(tmp_path / "out.gcode")
+    with GcodeStream(path) as stream:
+        stream.write(TEMPLATE_TEXT)
+    assert open(path, "rb").read() == TEMPLATE_TEXT.encode("utf-8")
+    assert stream.bytes_written == len(TEMPLATE_TEXT.encode("utf-8"))
+
+
+def test_text_sinks_take_decoded_bytes():
+    sink = io.StringIO()
+    with GcodeStream(sink) as stream:
+        stream.write_bytes(TEMPLATE_TEXT.encode("utf-8"))
+        stream.write("G28\n")
+    assert sink.getvalue() == TEMPLATE_TEXT + "G28\n"
+    assert not sink.closed
+
+
+def test_copy_file_keeps_the_bytes(tmp_path):
+    template = tmp_path / "start.gcode"
+    template.write_bytes(TEMPLATE_TEXT.encode("utf-8") * 10000)
+    sink = io.BytesIO()
+    with GcodeStream(sink) as stream:
+        stream.copy_file(str(template))
+    assert sink.getvalue() == template.read_bytes()
+
+
+def test_templates_with_non_ascii_text(tmp_path):
+    start = tmp_path / "start.gcode"
+    end = tmp_path / "end.gcode"
+    start.write_text("G28 " + TEMPLATE_TEXT, encoding="utf-8")
+    end.write_text("M104 S0 ; Ende – aus\n", encoding="utf-8")
+    square = PathSet.from_arrays([np.array([[0, 0], [10, 0], [10, 10], [0, 0]], float)],
+                                 [np.array([MOVE, LINE, LINE, LINE], dtype=np.uint8)])
+    path = str(tmp_path / "out.gcode")
+    with GcodeStream(path) as stream:
+        stream.write_all(iter_gcode(square, 2, 0.2, 40, 40, start_file=str(start),
+                                    end_file=str(end)))
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    assert TEMPLATE_TEXT in text
+    assert text.rstrip().endswith("Ende – aus")
@@ -0,0 +1,86 @@
+"""
+Tests of the batched move writer (GcodeWriter.moves_gcode) and the E
+values of the moves
+"""
+import math
+
+import numpy as np
+import pytest
+
+from writer.gcodewriter import GcodeWriter, format_number, progressGcode
+
+
+@pytest.fixture
+def writer():
+    return GcodeWriter(X_OFFSET=0, Y_OFFSET=0, G0_SPEED=6000, G1_SPEED=1200, XY_PRECISION=3,
+                       E_PRECISION=5, F_PRECISION=0)
+
+
+def test_format_number():
+    assert format_number(40.00000000000001, 3) == "40"
+    assert format_number(-0.0001, 3) == "0"
+    assert format_number(1.23456, 3) == "1.235"
+    assert format_number(1500.4, 0) == "1500"
+
+
+def test_modal_words_are_left_out(writer):
+    coords = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 5.0], [0.0, 5.0]])
+    extrude = np.array([False, True, True, False])
+    _, e = writer.segment_extrusion(coords, extrude)
+    lines = writer.moves_gcode(coords, e, extrude).splitlines()
+    # The first move is complete, later ones only have the axes that move
+    # and F where the feed rate changes
+    assert lines[0] == "G0 X0 Y0 F6000"
+    assert lines[1].startswith("G1 X10 E") and lines[1].endswith(" F1200") and " Y" not in lines[1]
+    assert lines[2].startswith("G1 Y5 E") and " X" not in lines[2] and " F" not in lines[2]
+    assert lines[3] == "G0 X0 F6000"
+
+
+def test_moves_that_change_nothing_are_dropped(writer):
+    coords = np.array([[1.0, 1.0], [1.0, 1.0], [1.0004, 1.0], [2.0, 1.0]])
+    extrude = np.array([False, False, False, False])
+    lines = writer.moves_gcode(coords, np.zeros(4), extrude).splitlines()
+    assert lines == ["G0 X1 Y1 F6000", "G0 X2"]
+
+
+def test_relative_e_follows_the_rounded_running_total(writer):
+    # Every move extrudes less than the last decimal; written one by one
+    # each would round to nothing
+    count = 1000
+    coords = np.column_stack([np.arange(1, count + 1) * 0.01, np.zeros(count)])
+    e = np.full(count, 4.1e-6)
+    gcode = writer.moves_gcode(coords, e, np.ones(count, dtype=bool))
+    written = sum(float(word[1:]) for word in gcode.split() if word.startswith("E"))
+    assert written == pytest.approx(count * 4.1e-6, abs=1e-5)
+
+
+def test_segment_extrusion(writer):
+    coords = np.array([[3.0, 4.0], [3.0, 4.0], [3.0, 10.0]])
+    lengths, e = writer.segment_extrusion(coords, [True, True, False])
+    assert lengths.tolist() == [5.0, 0.0, 6.0]
+    assert e.tolist() == pytest.approx([5 * writer.e_per_mm, 0.0, 0.0])
+    _, total = writer.segment_extrusion(coords, absolute=True, e_start=1.0)
+    assert total[-1] == pytest.approx(1.0 + 11 * writer.e_per_mm)
+
+
+def test_arcs_are_written_with_centre_offsets_and_arc_length_e(writer):
+    # A half circle of radius 5 from (0, 0) to (10, 0), clockwise over the top
+    coords = np.array([[0.0, 0.0], [10.0, 0.0]])
+    centers = np.array([[np.nan, np.nan], [5.0, 0.0]])
+    clockwise = np.array([False, True])
+    _, e = writer.segment_extrusion(coords, [False, True], centers=centers, clockwise=clockwise)
+    assert e[1] == pytest.approx(5 * math.pi * writer.e_per_mm)
+    offsets = np.array([[np.nan, np.nan], [5.0, 0.0]])
+    lines = writer.moves_gcode(coords, e, [False, True], arc_offsets=offsets,
+                               clockwise=clockwise).splitlines()
+    assert lines[1].startswith("G2 X10 Y0 I5 J0 E")
+
+
+def test_machine_offsets_move_x_and_y_only():
+    writer = GcodeWriter(X_OFFSET=5, Y_OFFSET=-2)
+    assert writer.moves_gcode([[1.0, 1.0]], [0.0], [False]).startswith("G0 X6 Y-1 ")
+    assert writer.G2(10, 0, 0, 0, 5, 0).startswith("G2 X15 Y-2 I5 J0 ")
+
+
+def test_progress_gcode_keeps_its_blank_line():
+    assert progressGcode(42, 7) == "M73 P42 R7\n\n"
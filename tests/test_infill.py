@@ -0,0 +1,107 @@
+"""
+Tests of the rectilinear scanline infill (geometry.infill)
+"""
+import numpy as np
+import pytest
+
+from geometry.infill import arc_chords, rectilinear_infill
+from geometry.pathset import PathSet, MOVE, LINE, ARC_CCW
+
+WIDTH = 0.4
+
+
+def _shape(*rings):
+    coords = [np.vstack([ring, ring[:1]]).astype(np.float64) for ring in map(np.asarray, rings)]
+    codes = [np.r_[MOVE, np.full(len(ring) - 1, LINE)].astype(np.uint8) for ring in coords]
+    return PathSet.from_arrays([np.concatenate(coords)], [np.concatenate(codes)])
+
+
+def _square(side, x=0.0, y=0.0):
+    return [[x, y], [x + side, y], [x + side, y + side], [x, y + side]]
+
+
+def _lines(infill):
+    return infill.coords.reshape(-1, 2, 2)
+
+
+def test_solid_square_at_zero_degrees():
+    infill = rectilinear_infill(_shape(_square(10)), 1.0, WIDTH, angle=0)
+    lines = _lines(infill)
+    # Scanlines halfway between multiples of the line width, inset by one
+    # line width from the outline along their direction
+    assert len(lines) == 25
+    assert lines[:, :, 1].mean(axis=1) == pytest.approx((np.arange(25) + 0.5) * WIDTH)
+    assert np.sort(lines[:, :, 0], axis=1) == pytest.approx(np.tile([WIDTH, 10 - WIDTH], (25, 1)))
+    assert infill.codes.tolist() == [MOVE, LINE] * 25
+
+
+def test_lines_run_back_and_forth():
+    lines = _lines(rectilinear_infill(_shape(_square(10)), 1.0, WIDTH, angle=0))
+    forward = lines[:, 1, 0] > lines[:, 0, 0]
+    assert forward[::2].all() and not forward[1::2].any()
+
+
+@pytest.mark.parametrize("density", [0.2, 0.5, 1.0])
+def test_density_sets_the_filled_fraction(density):
+    lines = _lines(rectilinear_infill(_shape(_square(40)), density, WIDTH, angle=0, inset=0))
+    length = np.hypot(*(lines[:, 1] - lines[:, 0]).T).sum()
+    assert length * WIDTH / 40**2 == pytest.approx(density, rel=0.05)
+
+
+def test_lines_follow_the_angle():
+    lines = _lines(rectilinear_infill(_shape(_square(10)), 0.5, WIDTH, angle=30))
+    direction = lines[:, 1] - lines[:, 0]
+    angles = np.degrees(np.arctan2(direction[:, 1], direction[:, 0])) % 180
+    assert angles == pytest.approx(np.full(len(lines), 30.0))
+
+
+def test_holes_drawn_the_other_way_stay_empty():
+    hole = _square(4, 3, 3)[::-1]
+    points = rectilinear_infill(_shape(_square(10), hole), 1.0, WIDTH, angle=45).coords
+    assert len(points)
+    inside_hole = np.all((points > 3 + 1e-9) & (points < 7 - 1e-9), axis=1)
+    assert not inside_hole.any()
+    # A line crosses the hole only as a travel move to the next line
+    lines = _lines(rectilinear_infill(_shape(_square(10), hole), 1.0, WIDTH, angle=0))
+    crossing = (lines[:, :, 1].mean(axis=1) > 3) & (lines[:, :, 1].mean(axis=1) < 7)
+    spans = np.sort(lines[crossing][:, :, 0], axis=1)
+    assert np.all((spans[:, 1] <= 3 - WIDTH + 1e-9) | (spans[:, 0] >= 7 + WIDTH - 1e-9))
+
+
+def test_inner_loops_drawn_the_same_way_are_filled():
+    # Nonzero rule: the inner square winds twice and is filled
+    solid = rectilinear_infill(_shape(_square(10)), 1.0, WIDTH, angle=0, inset=0)
+    nested = rectilinear_infill(_shape(_square(10), _square(4, 3, 3)), 1.0, WIDTH, angle=0, inset=0)
+    assert len(_lines(nested)) == len(_lines(solid))
+
+
+def test_open_paths_are_not_filled():
+    open_path = PathSet.from_arrays([np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0]])],
+                                    [np.array([MOVE, LINE, LINE], dtype=np.uint8)])
+    assert len(rectilinear_infill(open_path, 1.0, WIDTH)) == 0
+
+
+def test_arc_outlines_are_filled_to_their_chords():
+    # A circle of radius 5 as two half-circle arcs
+    circle = PathSet.from_arrays([np.array([[5.0, 0.0], [-5.0, 0.0], [5.0, 0.0]])],
+                                 [np.array([MOVE, ARC_CCW, ARC_CCW], dtype=np.uint8)])
+    circle.centers = np.array([[np.nan, np.nan], [0.0, 0.0], [0.0, 0.0]])
+    points = rectilinear_infill(circle, 1.0, WIDTH, angle=0, inset=0).coords
+    assert np.hypot(*points.T).max() <= 5 + 1e-9
+    assert np.hypot(*points.T).max() >= 5 - 0.1
+
+
+def test_arc_chords_stay_within_tolerance():
+    ends, arc = arc_chords(np.array([[1.0, 0.0]]), np.array([[-1.0, 0.0]]), np.zeros((1, 2)),
+                           np.array([False]), 0.001)
+    assert ends[-1] == pytest.approx([-1, 0])
+    middles = (np.vstack([[1.0, 0.0], ends[:-1]]) + ends) / 2
+    assert (1 - np.hypot(*middles.T)).max() <= 0.001
+    assert np.all(ends[:, 1] >= -1e-12)  # counterclockwise over the top
+    assert np.all(arc == 0)
+
+
+def test_density_out_of_range():
+    for density in (0, 1.5):
+        with pytest.raises(ValueError):
+            rectilinear_infill(_shape(_square(10)), density, WIDTH)
@@ -0,0 +1,65 @@
+"""
+Tests of the compressed and packaged outputs (writer.package)
+"""
+import gzip
+import hashlib
+import io
+import zipfile
+
+import pytest
+
+from writer.package import GCODE_ENTRY, THUMBNAIL_ENTRY, open_output, output_format
+
+GCODE = b"".join(b"G1 X%d Y%d E%.3f\n" % (i % 97, i % 89, i * 0.01) for i in range(20000))
+
+
+def _write(target, **kwargs):
+    with open_output(target, **kwargs) as sink:
+        for start in range(0, len(GCODE), 4096):
+            sink.write(GCODE[start:start + 4096])
+
+
+@pytest.mark.parametrize("name, kind", [("job.gcode", "gcode"), ("job.gcode.gz", "gz"),
+                                        ("JOB.GCODE.3MF", "3mf"), ("job.nc", "gcode")])
+def test_output_format(name, kind):
+    assert output_format(name) == kind
+
+
+def test_gzip_round_trip(tmp_path):
+    path = str(tmp_path / "job.gcode.gz")
+    _write(path)
+    with gzip.open(path, "rb") as file:
+        assert file.read() == GCODE
+
+
+def test_package_entries_and_md5(tmp_path):
+    path = str(tmp_path / "job.gcode.3mf")
+    _write(path, info={"objects": ["Logo"]})
+    with zipfile.ZipFile(path) as package:
+        assert package.testzip() is None
+        assert package.read(GCODE_ENTRY) == GCODE
+        assert package.read(GCODE_ENTRY + ".md5").decode() == hashlib.md5(GCODE).hexdigest().upper()
+        assert package.getinfo(THUMBNAIL_ENTRY).compress_type == zipfile.ZIP_STORED
+        assert package.getinfo(GCODE_ENTRY).compress_type == zipfile.ZIP_DEFLATED
+        assert 'name="Logo"' in package.read("Metadata/slice_info.config").decode()
+        assert {info.date_time for info in package.infolist()} == {(1980, 1, 1, 0, 0, 0)}
+
+
+def test_package_takes_the_compress_level():
+    sizes = []
+    for level in (1, 9):
+        sink = io.BytesIO()
+        _write(sink, kind="3mf", compress_level=level)
+        with zipfile.ZipFile(sink) as package:
+            sizes.append(package.getinfo(GCODE_ENTRY).compress_size)
+    assert sizes[1] < sizes[0]
+
+
+@pytest.mark.parametrize("kind", ["gz", "3mf"])
+def test_same_job_gives_same_bytes(kind):
+    outputs = []
+    for _ in range(2):
+        sink = io.BytesIO()
+        _write(sink, kind=kind)
+        outputs.append(sink.getvalue())
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,58 @@
+"""
+Tests of the SVG path data tokenizer and parser (reader.pathdata)
+"""
+import numpy as np
+import pytest
+
+from reader.pathdata import SEG_CLOSE, SEG_LINE, SEG_MOVE, path_segments, tokenize_path_data
+
+
+def _tokens(path_data):
+    letters, counts, numbers = tokenize_path_data(path_data)
+    return bytes(letters).decode("ascii"), counts.tolist(), numbers.tolist()
+
+
+@pytest.mark.parametrize("path_data, numbers", [
+    ("M0.5.5", [0.5, 0.5]),
+    ("M.5.5.5.5", [0.5, 0.5, 0.5, 0.5]),
+    ("M-1-2", [-1, -2]),
+    ("M1e2-3E-1", [100, -0.3]),
+    ("M1.5e+1,2e0", [15, 2]),
+    ("M 1 , 2", [1, 2]),
+])
+def test_numbers_without_separators(path_data, numbers):
+    assert _tokens(path_data) == ("M", [len(numbers)], numbers)
+
+
+def test_commands_and_parameter_counts():
+    assert _tokens("M0 0L1 1 2 2H5V6Z") == ("MLHVZ", [2, 4, 1, 1, 0], [0, 0, 1, 1, 2, 2, 5, 6])
+
+
+def test_packed_arc_flags():
+    # The flags are single digits and need no separator: 1 0 10 0 and 1 1 .5 .5
+    assert _tokens("M10 10a5 5 0 1010 0")[2][2:] == [5, 5, 0, 1, 0, 10, 0]
+    assert _tokens("A1 1 0 11.5.5")[2] == [1, 1, 0, 1, 1, 0.5, 0.5]
+    assert _tokens("a1 1 0 1 0 2 2 1 1 0 0 1 3 3")[1] == [14]
+
+
+def test_no_commands():
+    assert _tokens("") == ("", [], [])
+    assert _tokens("1 2 3") == ("", [], [])
+
+
+def test_relative_moves_are_resolved():
+    kinds, starts, ends, _, _ = path_segments("m1,2 3,4 h2 v-1 z")
+    assert kinds.tolist() == [SEG_MOVE, SEG_LINE, SEG_LINE, SEG_LINE, SEG_CLOSE]
+    assert starts.tolist() == [[0, 0], [1, 2], [4, 6], [6, 6], [6, 5]]
+    assert ends.tolist() == [[1, 2], [4, 6], [6, 6], [6, 5], [1, 2]]
+
+
+def test_a_path_continues_from_where_close_returns_to():
+    _, starts, ends, _, _ = path_segments("M10 10 L20 10 Z l5 5")
+    assert starts[-1].tolist() == [10, 10]
+    assert ends[-1].tolist() == [15, 15]
+
+
+def test_absolute_after_relative():
+    _, _, ends, _, _ = path_segments("M1 1 l1 1 L10 10 l1 0")
+    assert np.array(ends).tolist() == [[1, 1], [2, 2], [10, 10], [11, 10]]
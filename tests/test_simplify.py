@@ -0,0 +1,53 @@
+"""
+Tests of the Ramer-Douglas-Peucker pass (geometry.simplify)
+"""
+import numpy as np
+
+from geometry.pathset import PathSet, MOVE, LINE, ARC_CCW
+from geometry.simplify import simplify_mask, simplify_paths
+
+
+def _path(coords, codes=None):
+    coords = np.asarray(coords, dtype=np.float64)
+    if codes is None:
+        codes = np.r_[MOVE, np.full(len(coords) - 1, LINE)]
+    return PathSet.from_arrays([coords], [np.asarray(codes, dtype=np.uint8)])
+
+
+def test_points_within_tolerance_of_the_line_are_removed():
+    x = np.linspace(0, 10, 101)
+    wobble = np.column_stack([x, 0.01 * np.sin(x * 7)])
+    simplified = simplify_paths(_path(wobble), 0.02)
+    assert simplified.coords.tolist() == [[0, 0], wobble[-1].tolist()]
+
+
+def test_points_beyond_tolerance_are_kept():
+    simplified = simplify_paths(_path([[0, 0], [5, 0.5], [10, 0]]), 0.1)
+    assert len(simplified.coords) == 3
+
+
+def test_removed_points_stay_within_tolerance():
+    rng = np.random.default_rng(1)
+    coords = np.cumsum(rng.normal(0, 0.05, (500, 2)), axis=0)
+    keep = simplify_mask(coords, np.r_[False, np.ones(498, dtype=bool), False], 0.1)
+    kept = np.flatnonzero(keep)
+    for index in np.flatnonzero(~keep):
+        right = np.searchsorted(kept, index)
+        a, b = coords[kept[right - 1]], coords[kept[right]]
+        edge = b - a
+        t = np.clip(np.dot(coords[index] - a, edge) / np.dot(edge, edge), 0, 1)
+        assert np.hypot(*(coords[index] - a - t * edge)) <= 0.1
+
+
+def test_paths_moves_and_arcs_are_anchors():
+    # Two straight paths, the second ending in an arc that must stay whole
+    first = _path([[0, 0], [1, 0], [2, 0]])
+    second = _path([[0, 5], [1, 5], [2, 5], [3, 6]], [MOVE, LINE, LINE, ARC_CCW])
+    second.centers = np.full((4, 2), np.nan)
+    second.centers[3] = (2, 6)
+    simplified = simplify_paths(PathSet.concatenate([first, second]), 0.1)
+    assert len(simplified) == 2
+    assert simplified.offsets.tolist() == [0, 2, 5]
+    assert simplified.coords.tolist() == [[0, 0], [2, 0], [0, 5], [2, 5], [3, 6]]
+    assert simplified.codes[-1] == ARC_CCW
+    assert simplified.centers[-1].tolist() == [2, 6]
@@ -0,0 +1,42 @@
+"""
+Tests of the incremental SVG reader (reader.svgreader)
+"""
+import io
+
+import pytest
+
+from reader.svgreader import iter_svg_shapes
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="10mm" height="10mm" viewBox="0 0 10 10">{}</svg>'
+
+
+def _drawn(body):
+    document = io.BytesIO(SVG.format(body).encode("utf-8"))
+    return [path_data for path_data, _ in iter_svg_shapes(document)]
+
+
+def test_drawn_shapes_in_document_order():
+    assert len(_drawn('<path d="M0 0H5"/><rect width="2" height="2"/><g><path d="M1 1H2"/></g>')) == 3
+
+
+@pytest.mark.parametrize("hidden", [
+    '<path display="none" d="M0 0H5"/>',
+    '<path style="display:none" d="M0 0H5"/>',
+    '<path style="fill: red; display : none ;" d="M0 0H5"/>',
+    '<path style="display: none !important" d="M0 0H5"/>',
+    '<path display="inline" style="display:none" d="M0 0H5"/>',
+    '<g style="stroke:black;display:none"><path d="M0 0H5"/></g>',
+    '<defs><path d="M0 0H5"/></defs>',
+])
+def test_hidden_elements_are_skipped(hidden):
+    assert _drawn(hidden + '<path d="M1 1H2"/>') == ["M1 1H2"]
+
+
+@pytest.mark.parametrize("shown", [
+    '<path style="display:inline" d="M0 0H5"/>',
+    '<path display="none" style="display:inline" d="M0 0H5"/>',
+    '<path style="display:none; display:block" d="M0 0H5"/>',
+    '<path style="fill:none" d="M0 0H5"/>',
+])
+def test_style_display_is_read(shown):
+    assert _drawn(shown) == ["M0 0H5"]
@@ -0,0 +1,103 @@
+"""
+Tests of the perimeters (geometry.walls)
+"""
+import math
+
+import numpy as np
+import pytest
+
+from geometry.pathset import PathSet, MOVE, LINE
+from geometry.walls import loop_areas, perimeters
+
+WIDTH = 0.4
+
+
+def _shape(*rings):
+    """
+    Returns one path made of closed rings.
+    """
+    coords = [np.asarray(ring, dtype=np.float64) for ring in rings]
+    coords = [np.vstack([ring, ring[:1]]) for ring in coords]
+    codes = [np.r_[MOVE, np.full(len(ring) - 1, LINE)].astype(np.uint8) for ring in coords]
+    return PathSet.from_arrays([np.concatenate(coords)], [np.concatenate(codes)])
+
+
+def _square(side, x=0.0, y=0.0):
+    return [[x, y], [x + side, y], [x + side, y + side], [x, y + side]]
+
+
+def _circle(radius, points=200):
+    angles = np.linspace(0, 2 * math.pi, points, endpoint=False)
+    return np.column_stack([radius * np.cos(angles), radius * np.sin(angles)])
+
+
+def _loops(walls):
+    return [walls.coords[walls.offsets[i]:walls.offsets[i + 1]] for i in range(len(walls))]
+
+
+def _distance_to_rings(points, rings):
+    edges = [(ring, np.roll(ring, -1, axis=0)) for ring in map(np.asarray, rings)]
+    starts = np.concatenate([a for a, _ in edges])
+    stops = np.concatenate([b for _, b in edges])
+    edge = stops - starts
+    rel = points[:, None, :] - starts[None]
+    t = np.clip(np.einsum("pij,ij->pi", rel, edge) / np.einsum("ij,ij->i", edge, edge), 0, 1)
+    nearest = starts[None] + t[..., None] * edge[None]
+    return np.hypot(*(points[:, None, :] - nearest).transpose(2, 0, 1)).min(axis=1)
+
+
+def test_square_walls_step_inward_until_the_square_is_filled():
+    walls = perimeters(_shape(_square(10)), 40, WIDTH)
+    # Walls at 0.4 .. 4.8 mm fit in the 5 mm inradius, the rest collapse
+    assert len(walls) == 12
+    for number, loop in enumerate(_loops(walls), 1):
+        inset = number * WIDTH
+        assert loop.min(axis=0) == pytest.approx([inset, inset])
+        assert loop.max(axis=0) == pytest.approx([10 - inset, 10 - inset])
+
+
+def test_circle_walls_shrink_and_stop_at_the_centre():
+    walls = perimeters(_shape(_circle(2)), 10, WIDTH)
+    radii = [float(np.hypot(*loop.T).mean()) for loop in _loops(walls)]
+    assert radii == pytest.approx([1.6, 1.2, 0.8, 0.4], abs=1e-3)
+
+
+@pytest.mark.parametrize("join", ["miter", "round"])
+def test_walls_past_the_inradius_give_no_loops(join):
+    assert len(perimeters(_shape(_square(0.6)), 5, WIDTH, join=join)) == 0
+    assert len(perimeters(_shape(_circle(0.3)), 5, WIDTH, join=join)) == 0
+
+
+def test_outside_walls_grow_around_the_outline():
+    walls = perimeters(_shape(_square(10)), 3, WIDTH, outside=True)
+    lows = np.array([loop.min(axis=0) for loop in _loops(walls)])
+    highs = np.array([loop.max(axis=0) for loop in _loops(walls)])
+    assert lows == pytest.approx(np.array([[-0.4, -0.4], [-0.8, -0.8]]))
+    assert highs == pytest.approx(np.array([[10.4, 10.4], [10.8, 10.8]]))
+
+
+def test_walls_of_a_hole_go_into_the_material():
+    # A 10 mm square with a 4 mm square hole drawn the other way round
+    hole = _square(4, 3, 3)[::-1]
+    walls = perimeters(_shape(_square(10), hole), 2, WIDTH)
+    areas = sorted(abs(area) for area in loop_areas(walls.coords, walls.offsets))
+    assert areas == pytest.approx([4.8**2, 9.2**2])
+
+
+@pytest.mark.parametrize("join", ["miter", "round"])
+def test_walls_keep_their_distance_from_a_concave_outline(join):
+    # Arms 3 mm wide fit walls at 0.4, 0.8 and 1.2 mm; the corner where they
+    # meet fits circles up to 1.76 mm, so a wall at 1.6 mm can stay there
+    outline = [[0, 0], [10, 0], [10, 3], [3, 3], [3, 10], [0, 10]]
+    walls = perimeters(_shape(outline), 6, WIDTH, join=join)
+    assert len(walls) in (3, 4)
+    assert all(loop.max() < 2.4 for loop in _loops(walls)[3:])
+    for number, loop in enumerate(_loops(walls), 1):
+        distances = _distance_to_rings(loop, [outline])
+        assert distances.min() >= number * WIDTH - 0.05
+
+
+def test_one_wall_is_the_outline_itself():
+    assert len(perimeters(_shape(_square(10)), 1, WIDTH)) == 0
+    with pytest.raises(ValueError):
+        perimeters(_shape(_square(10)), 0, WIDTH)
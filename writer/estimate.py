@@ -0,0 +1,190 @@
+"""
+Print time estimates from the moves of a job
+
+Every move follows a trapezoidal speed profile: the nozzle accelerates from
+its entry speed to the move's feed rate, cruises, and brakes to its exit
+speed, or only accelerates and brakes when the move is too short to reach
+the feed rate. The speed through a corner is limited like Marlin's junction
+deviation, derived from the printer's jerk setting, so straight runs of short
+segments are printed at full speed and sharp corners are not.
+
+Entry and exit speeds come from the forward and backward passes of a motion
+planner (no move may need more than the acceleration to reach its exit
+speed from its entry speed, in either direction). Each pass is a running
+minimum over a prefix sum, so the whole estimate is a handful of NumPy calls
+rather than a Python loop over the moves.
+"""
+import numpy as np
+
+# Cosine of the turn above which moves count as one straight line
+STRAIGHT_COS = 0.999999
+
+
+def junction_deviation(accel, jerk):
+    """
+    Returns the junction deviation equivalent to a jerk setting.
+
+    Args:
+        accel (float): The acceleration in mm/s^2.
+        jerk (float): The largest instant speed change in mm/s.
+
+    Returns:
+        float: The junction deviation in mm.
+    """
+    return 0.4 * jerk**2 / accel
+
+
+def move_directions(coords, prev_x=0, prev_y=0, centers=None, clockwise=None):
+    """
+    Returns the unit direction of every move where it starts and where it
+    ends; the two differ for arcs.
+
+    Args:
+        coords (np.ndarray): (N, 2) end points of the moves.
+        prev_x (float): The x-coordinate the first move starts from.
+        prev_y (float): The y-coordinate the first move starts from.
+        centers (np.ndarray): (N, 2) arc centers, NaN for straight moves.
+        clockwise (np.ndarray): (N,) boolean mask of clockwise arcs.
+
+    Returns:
+        tuple: (entry, exit) arrays of shape (N, 2); zero for moves that go
+            nowhere.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    starts = np.empty_like(coords)
+    starts[:1] = (prev_x, prev_y)
+    starts[1:] = coords[:-1]
+    entry = _unit(coords - starts)
+    exit = entry.copy()
+    if centers is not None:
+        arc = ~np.isnan(centers[:, 0])
+        if arc.any():
+            # Tangents are the radius turned by 90 degrees, against the
+            # clock for G3 and with it for G2
+            sign = np.where(np.asarray(clockwise, dtype=bool)[arc], -1.0, 1.0)[:, None]
+            for tangent, points in ((entry, starts), (exit, coords)):
+                radius = points[arc] - centers[arc]
+                tangent[arc] = _unit(np.column_stack([-radius[:, 1], radius[:, 0]]) * sign)
+    return entry, exit
+
+
+def _unit(vectors):
+    norms = np.hypot(vectors[:, 0], vectors[:, 1])
+    return np.divide(vectors, norms[:, None], out=np.zeros_like(vectors), where=norms[:, None] > 0)
+
+
+def corner_speeds2(exit_directions, entry_directions, accel, deviation):
+    """
+    Returns the squared speed allowed through each corner between two moves.
+
+    Args:
+        exit_directions (np.ndarray): (M, 2) directions the first moves end in.
+        entry_directions (np.ndarray): (M, 2) directions the next moves start in.
+        accel (float): The acceleration in mm/s^2.
+        deviation (float): The junction deviation in mm, see
+            junction_deviation().
+
+    Returns:
+        np.ndarray: (M,) squared speeds in mm^2/s^2, inf for straight lines.
+    """
+    cos_theta = -np.einsum("ij,ij->i", exit_directions, entry_directions)
+    sin_half = np.sqrt(np.clip(0.5 * (1.0 - cos_theta), 0.0, 1.0))
+    with np.errstate(divide="ignore"):
+        speeds2 = accel * deviation * sin_half / (1.0 - sin_half)
+    speeds2[cos_theta < -STRAIGHT_COS] = np.inf
+    speeds2[cos_theta > STRAIGHT_COS] = 0.0  # a full reversal stops
+    return speeds2
+
+
+def move_times(lengths, speeds, accel, corners2=None):
+    """
+    Returns the time of every move of a sequence that starts and ends at
+    rest.
+
+    Args:
+        lengths (np.ndarray): (N,) move lengths in mm.
+        speeds (np.ndarray): (N,) feed rates in mm/s.
+        accel (float): The acceleration in mm/s^2.
+        corners2 (np.ndarray): (N - 1,) squared speeds allowed between
+            consecutive moves, see corner_speeds2(). Defaults to stopping
+            between moves.
+
+    Returns:
+        np.ndarray: (N,) times in seconds.
+    """
+    lengths = np.asarray(lengths, dtype=np.float64)
+    speeds2 = np.asarray(speeds, dtype=np.float64)**2
+    count = len(lengths)
+    if not count:
+        return np.zeros(0)
+    # Squared speed limit at every boundary: at rest at both ends, in
+    # between the corner limit and the feed rates on either side
+    limits = np.zeros(count + 1)
+    if count > 1:
+        inner = np.minimum(speeds2[:-1], speeds2[1:])
+        limits[1:-1] = inner if corners2 is None else np.minimum(inner, corners2)
+    gain = np.zeros(count + 1)  # 2 * accel * distance up to each boundary
+    np.cumsum(2.0 * accel * lengths, out=gain[1:])
+    # Forward: v[i]^2 <= v[i-1]^2 + 2 a L[i-1], so v[i]^2 = min over k <= i
+    # of limits[k] + gain[i] - gain[k]
+    reachable = gain + np.minimum.accumulate(limits - gain)
+    # Backward: the same from the end, so every move can brake in time
+    boundary2 = np.minimum.accumulate((reachable + gain)[::-1])[::-1] - gain
+    boundary2 = np.maximum(np.minimum(boundary2, reachable), 0.0)
+    entry2 = boundary2[:-1]
+    exit2 = boundary2[1:]
+    # The top speed of each move: its feed rate, or where accelerating from
+    # the entry and braking to the exit meet
+    peak2 = np.minimum(speeds2, (2.0 * accel * lengths + entry2 + exit2) / 2.0)
+    peak = np.sqrt(peak2)
+    ramps = (2.0 * peak - np.sqrt(entry2) - np.sqrt(exit2)) / accel
+    cruise = np.maximum(lengths - (2.0 * peak2 - entry2 - exit2) / (2.0 * accel), 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cruise_time = np.where(cruise > 0, cruise / np.sqrt(speeds2), 0.0)
+    return ramps + cruise_time
+
+
+def path_times(coords, lengths, speeds, accel, jerk, prev_x=0, prev_y=0,
+               centers=None, clockwise=None):
+    """
+    Returns the time of every move of a path of XY moves that starts and
+    ends at rest, with the corner speeds from its geometry.
+
+    Args:
+        coords (np.ndarray): (N, 2) end points of the moves.
+        lengths (np.ndarray): (N,) move lengths in mm, arcs along the arc
+            (see GcodeWriter.segment_extrusion).
+        speeds (np.ndarray): (N,) feed rates in mm/s.
+        accel (float): The acceleration in mm/s^2.
+        jerk (float): The jerk in mm/s, see junction_deviation().
+        prev_x (float): The x-coordinate the first move starts from.
+        prev_y (float): The y-coordinate the first move starts from.
+        centers (np.ndarray): (N, 2) arc centers, NaN for straight moves.
+        clockwise (np.ndarray): (N,) boolean mask of clockwise arcs.
+
+    Returns:
+        np.ndarray: (N,) times in seconds.
+    """
+    entry, exit = move_directions(coords, prev_x, prev_y, centers, clockwise)
+    corners2 = corner_speeds2(exit[:-1], entry[1:], accel, junction_deviation(accel, jerk))
+    return move_times(lengths, speeds, accel, corners2)
+
+
+def format_duration(seconds):
+    """
+    Returns a duration the way slicers write it in the header, e.g. '1h 2m 3s'.
+
+    Args:
+        seconds (float): The duration.
+
+    Returns:
+        str: The rounded duration in days, hours, minutes and seconds.
+    """
+    seconds = int(round(seconds))
+    parts = []
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size or parts:
+            parts.append(f"{seconds // size}{unit}")
+            seconds %= size
+    parts.append(f"{seconds}s")
+    return " ".join(parts)
@@ -0,0 +1,126 @@
+"""
+Streams G-code to a file-like sink instead of building the whole program in memory
+
+Small writes are collected into a list and flushed to the sink once they add up
+to buffer_size characters, so the memory held by the writer stays bounded no
+matter how many layers or paths are emitted.
+"""
+import io
+
+DEFAULT_BUFFER_SIZE = 1 << 20  # 1 MiB
+COPY_CHUNK_SIZE = 1 << 16
+
+
+class GcodeStream:
+    """
+    Buffered, write-only G-code sink.
+
+    Args:
+        sink (str | file-like): A file path, or any binary or text file-like
+            object with a write() method.
+        buffer_size (int): Number of characters collected before they are
+            written to the sink.
+    """
+
+    def __init__(self, sink, buffer_size=DEFAULT_BUFFER_SIZE):
+        self._owns_sink = isinstance(sink, str)
+        if self._owns_sink:
+            sink = open(sink, "wb")
+        self._sink = sink
+        self._binary = not isinstance(sink, io.TextIOBase)
+        self._buffer_size = buffer_size
+        self._pending = []
+        self._pending_size = 0
+        self.bytes_written = 0
+
+    def write(self, text):
+        """
+        Queues a piece of G-code text for writing.
+
+        Args:
+            text (str): The G-code text to write.
+        """
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= self._buffer_size:
+            self.flush()
+
+    def write_bytes(self, data):
+        """
+        Writes already encoded G-code straight to the sink.
+
+        Args:
+            data (bytes): The encoded G-code to write.
+        """
+        self.flush()
+        if self._binary:
+            self._sink.write(data)
+        else:
+            self._sink.write(data.decode("utf-8"))
+        self.bytes_written += len(data)
+
+    def write_all(self, chunks):
+        """
+        Writes every piece of G-code produced by an iterable.
+
+        Args:
+            chunks (iterable): Strings (or bytes) of G-code.
+
+        Returns:
+            int: Total number of bytes written so far.
+        """
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                self.write_bytes(chunk)
+            else:
+                self.write(chunk)
+        return self.bytes_written
+
+    def copy_file(self, path):
+        """
+        Copies a G-code file (e.g. start or end G-code) into the stream.
+
+        Args:
+            path (str): Path of the file to copy.
+        """
+        self.flush()
+        with open(path, "rb") as file:
+            while True:
+                data = file.read(COPY_CHUNK_SIZE)
+                if not data:
+                    break
+                self.write_bytes(data)
+
+    def flush(self):
+        """
+        Writes all queued text to the sink.
+        """
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        if self._binary:
+            data = text.encode("utf-8")
+            self._sink.write(data)
+            self.bytes_written += len(data)
+        else:
+            self._sink.write(text)
+            self.bytes_written += len(text)
+
+    def close(self):
+        """
+        Flushes the stream and closes the sink if the stream opened it.
+        """
+        self.flush()
+        if self._owns_sink:
+            self._sink.close()
+        elif hasattr(self._sink, "flush"):
+            self._sink.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
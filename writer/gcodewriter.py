@@ -5,90 +5,600 @@ First Version: 09/06/2024
 
 Author: Richard (Ruichen Liu)
 Last Modified: 03/17/2025
+
+The printer and filament settings of a job are held by a GcodeWriter, so one
+process can write jobs for different printers or filaments side by side.
+The module-level functions and settings (G0, G1, ..., G0_speed, e_per_mm)
+use a default writer that reads config/config.json next to this package the
+first time one of them is used, not at import time.
 """
 import os
 import json
+import functools
+import itertools
 import math
 
+import numpy as np
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'config', 'config.json')
+
+# Settings a config may leave out; G0_SPEED, G1_SPEED, START_GCODE and
+# END_GCODE are required
+DEFAULT_SETTINGS = {
+    'X_OFFSET': 0,
+    'Y_OFFSET': 0,
+    'Z_OFFSET': 0,
+    'X_MAX': 0,
+    'Y_MAX': 0,
+    'X_MIN': 0,
+    'Y_MIN': 0,
+    'Z_SPEED': 10,
+    'NOZZLE_SIZE': 0.4,
+    'LAYER_HEIGHT': 0.2,
+    'FILAMENT_DIAMETER': 1.75,
+    'FILAMENT_FLOW_RATE': 1.0,
+    'FILAMENT_TEMPERATURE': 200,
+    'BED_TEMPERATURE': 50,
+    # Motion and material settings of the print time and filament estimate
+    'ACCELERATION': 10000,  # mm/s^2, also written as M204 at each layer
+    'JERK': 9,  # mm/s
+    'FILAMENT_DENSITY': 1.24,  # g/cm^3
+    'PREPARE_TIME': 0,  # seconds the start and end G-code take
+    # Decimals written for each word; F is a whole number of mm/min
+    'XY_PRECISION': 3,
+    'Z_PRECISION': 3,
+    'E_PRECISION': 5,
+    'F_PRECISION': 0,
+}
+
 pen_up_z = 0
-x_offset = 0
-y_offset = 0
-z_offset = 0
-x_max = 0
-y_max = 0
-x_min = 0
-y_min = 0
-z_speed = 10
-nozzle_size = 0.4
-layer_height = 0.2
-filament_diameter = 1.75
-filament_flow_rate = 1.0
-filament_temprature = 200
-bed_temperature = 50
-
-with open('config/config.json') as f:
-    config = json.load(f)
-    x_offset = config['X_OFFSET']
-    y_offset = config['Y_OFFSET']
-    z_offset = config['Z_OFFSET']
-    x_max = config['X_MAX']
-    y_max = config['Y_MAX']
-    x_min = config['X_MIN']
-    y_min = config['Y_MIN']
-    z_speed = config['Z_SPEED']
-    G0_speed = config['G0_SPEED']
-    G1_speed = config['G1_SPEED']
-    start_gcode = config['START_GCODE']
-    end_gcode = config['END_GCODE']
-    nozzle_size = config['NOZZLE_SIZE']
-    layer_height = config['LAYER_HEIGHT']
-    filament_diameter = config['FILAMENT_DIAMETER']
-    filament_flow_rate = config['FILAMENT_FLOW_RATE']
-    filament_temprature = config['FILAMENT_TEMPERATURE']
-    bed_temperature = config['BED_TEMPERATURE']
-    
 
-def startGcode():
+
+@functools.lru_cache(maxsize=None)
+def _read_config(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_config(path=CONFIG_FILE):
     """
-    Returns the start G-code.
+    Returns the settings of a config file. Each file is read once per process.
+
+    Args:
+        path (str): The JSON config file.
 
     Returns:
-        str: The start G-code.
+        dict: The settings, with defaults for the optional ones.
     """
-    return start_gcode
+    config = dict(DEFAULT_SETTINGS)
+    config.update(_read_config(os.path.abspath(path)))
+    return config
 
-def endGcode():
+
+def format_number(value, digits):
     """
-    Returns the end G-code.
+    Returns a number as G-code text with at most the given number of
+    decimals and no trailing zeros, e.g. 40.00000000000001 -> '40'.
+
+    Args:
+        value (float): The number to format.
+        digits (int): The number of decimals to keep.
 
     Returns:
-        str: The end G-code.
+        str: The formatted number.
     """
-    return end_gcode
+    # Adding 0.0 turns a -0.0 from rounding into 0.0
+    text = "%.*f" % (digits, round(value, digits) + 0.0)
+    return text.rstrip("0").rstrip(".") if digits > 0 else text
+
 
-def setNozzleTemp(temp=filament_temprature):
+def format_numbers(values, digits):
     """
-    Returns the G-code to set the nozzle temperature.
+    Formats a batch of numbers like format_number().
 
     Args:
-        temp (int): The temperature to set the nozzle to.
+        values (np.ndarray): The numbers to format.
+        digits (int): The number of decimals to keep.
 
     Returns:
-        str: The G-code to set the nozzle temperature.
+        list: The formatted numbers.
+    """
+    values = (np.round(np.asarray(values, dtype=np.float64), digits) + 0.0).tolist()
+    template = "%." + str(digits) + "f"
+    if digits <= 0:
+        return [template % value for value in values]
+    return [(template % value).rstrip("0").rstrip(".") for value in values]
+
+
+class GcodeWriter:
+    """
+    Writes G-code for one printer and filament.
+
+    Every setting the moves need is read from the config once, when the
+    writer is created, and kept as an attribute (speeds, offsets, filament
+    cross-section, E per mm, precisions, motion limits), so writing a move does no config
+    or global lookups. A writer holds no state between calls and can be
+    shared by threads.
+
+    Args:
+        config (str | dict): A config file, or a dict of settings in the
+            format of config/config.json. Defaults to CONFIG_FILE.
+        **overrides: Settings that replace those of the config, e.g.
+            G1_SPEED=1500.
+    """
+
+    def __init__(self, config=None, **overrides):
+        if config is None or isinstance(config, str):
+            config = load_config(config or CONFIG_FILE)
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update(config)
+        settings.update(overrides)
+        self.config = settings
+        self.x_offset = settings['X_OFFSET']
+        self.y_offset = settings['Y_OFFSET']
+        self.z_offset = settings['Z_OFFSET']
+        self.x_max = settings['X_MAX']
+        self.y_max = settings['Y_MAX']
+        self.x_min = settings['X_MIN']
+        self.y_min = settings['Y_MIN']
+        self.z_speed = settings['Z_SPEED']
+        self.g0_speed = settings['G0_SPEED']
+        self.g1_speed = settings['G1_SPEED']
+        self.start_gcode = settings['START_GCODE']
+        self.end_gcode = settings['END_GCODE']
+        self.nozzle_size = settings['NOZZLE_SIZE']
+        self.layer_height = settings['LAYER_HEIGHT']
+        self.filament_diameter = settings['FILAMENT_DIAMETER']
+        self.filament_flow_rate = settings['FILAMENT_FLOW_RATE']
+        self.filament_temperature = settings['FILAMENT_TEMPERATURE']
+        self.bed_temperature = settings['BED_TEMPERATURE']
+        self.xy_precision = settings['XY_PRECISION']
+        self.z_precision = settings['Z_PRECISION']
+        self.e_precision = settings['E_PRECISION']
+        self.f_precision = settings['F_PRECISION']
+        self.acceleration = settings['ACCELERATION']
+        self.jerk = settings['JERK']
+        self.filament_density = settings['FILAMENT_DENSITY']
+        self.prepare_time = settings['PREPARE_TIME']
+        self.filament_area = math.pi * (self.filament_diameter / 2)**2
+        self.e_per_mm = self.extrusion_per_mm()
+
+    def extrusion_per_mm(self, layer_height=None):
+        """
+        Returns the filament length (E) needed per mm of extruded line.
+
+        Args:
+            layer_height (float): The height of the printed layer, defaults
+                to the configured one.
+
+        Returns:
+            float: The E value per mm of travel.
+        """
+        if layer_height is None:
+            layer_height = self.layer_height
+        return layer_height * self.nozzle_size / self.filament_area * self.filament_flow_rate
+
+    def startGcode(self):
+        """
+        Returns the start G-code.
+
+        Returns:
+            str: The start G-code.
+        """
+        return self.start_gcode
+
+    def endGcode(self):
+        """
+        Returns the end G-code.
+
+        Returns:
+            str: The end G-code.
+        """
+        return self.end_gcode
+
+    def setNozzleTemp(self, temp=None):
+        """
+        Returns the G-code to set the nozzle temperature.
+
+        Args:
+            temp (int): The temperature to set the nozzle to, defaults to
+                the filament temperature.
+
+        Returns:
+            str: The G-code to set the nozzle temperature.
+        """
+        return "M104 S" + str(self.filament_temperature if temp is None else temp) + "\n"
+
+    def setBedTemp(self, temp=None):
+        """
+        Returns the G-code to set the bed temperature.
+
+        Args:
+            temp (int): The temperature to set the bed to, defaults to the
+                configured one.
+
+        Returns:
+            str: The G-code to set the bed temperature.
+        """
+        return "M140 S" + str(self.bed_temperature if temp is None else temp) + "\n"
+
+    def G0_Z(self, z):
+        """
+        Returns the G-code to move the machine to a given z-coordinate.
+
+        Args:
+            z (float): The z-coordinate of the position.
+
+        Returns:
+            str: The G-code to move the machine to the given z-coordinate.
+        """
+        z += self.z_offset
+        return "G0 Z" + format_number(z, self.z_precision) + "\n"
+
+    def G0(self, x, y, z=0, speed=None, e=0):
+        """
+        Returns the G-code to move the machine to a given position.
+
+        Args:
+            x (float): The x-coordinate of the position.
+            y (float): The y-coordinate of the position.
+            z (float): The z-coordinate of the position.
+            speed (int): The speed of the movement, defaults to the G0 speed.
+            e (float): The E value for the movement, default is retracted by 0mm.
+
+        Returns:
+            str: The G-code to move the machine to the given position.
+        """
+        x += self.x_offset
+        y += self.y_offset
+        xy_precision = self.xy_precision
+        words = "G0 X" + format_number(x, xy_precision) + " Y" + format_number(y, xy_precision)
+        if e != 0:
+            words += " E" + format_number(e, self.e_precision)
+        speed = self.g0_speed if speed is None else speed
+        return words + " F" + format_number(speed, self.f_precision) + "\n"
+
+    def G1(self, x, y, prev_x=None, prev_y=None, travel=False, z=0, prev_z=0, speed=None):
+        """
+        Returns the G-code to draw a line to a given position.
+
+        Args:
+            x (float): The x-coordinate of the position.
+            y (float): The y-coordinate of the position.
+            prev_x (float): The previous x-coordinate.
+            prev_y (float): The previous y-coordinate.
+            travel (bool): Whether the movement is a travel move (no extrusion).
+            z (float): The z-coordinate of the position.
+            prev_z (float): The previous z-coordinate.
+            speed (int): The speed of the movement, defaults to the G1 speed.
+
+        Returns:
+            str: The G-code to draw a line to the given position.
+        """
+        if prev_x is None or prev_y is None:
+            travel = True
+        xy_precision = self.xy_precision
+        feed = " F" + format_number(self.g1_speed if speed is None else speed, self.f_precision) + "\n"
+
+        words = "G1 X" + format_number(x, xy_precision) + " Y" + format_number(y, xy_precision)
+        if travel:
+            if z != 0:
+                z += self.z_offset
+                words += " Z" + format_number(z, self.z_precision)
+            return words + feed
+
+        distance = ((x - prev_x)**2 + (y - prev_y)**2)**0.5
+        if z != 0:
+            distance = ((x - prev_x)**2 + (y - prev_y)**2 + (z - prev_z)**2)**0.5
+        # Calculate the E value based on the distance and filament flow rate
+        e = distance * self.e_per_mm
+
+        x += self.x_offset
+        y += self.y_offset
+
+        words = "G1 X" + format_number(x, xy_precision) + " Y" + format_number(y, xy_precision)
+        if z != 0:
+            z += self.z_offset
+            words += " Z" + format_number(z, self.z_precision)
+        return words + " E" + format_number(e, self.e_precision) + feed
+
+    def segment_extrusion(self, coords, extrude=None, prev_x=0, prev_y=0, layer_height=None,
+                          absolute=False, e_start=0.0, centers=None, clockwise=None):
+        """
+        Returns the length and E value of every segment of a polyline in one pass.
+
+        Args:
+            coords (np.ndarray): (N, 2) array of x, y end points of the segments.
+            extrude (np.ndarray): (N,) boolean mask of extruding segments, travel
+                segments get no E. Defaults to extruding every segment.
+            prev_x (float): The x-coordinate the first segment starts from.
+            prev_y (float): The y-coordinate the first segment starts from.
+            layer_height (float): The layer height, defaults to the configured one.
+            absolute (bool): Return cumulative (absolute) E values instead of
+                per-segment (relative) ones.
+            e_start (float): The E position the cumulative values start from.
+            centers (np.ndarray): (N, 2) arc centers, NaN for straight segments.
+            clockwise (np.ndarray): (N,) boolean mask of clockwise arcs.
+
+        Returns:
+            tuple: (lengths, e) arrays with one value per segment.
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        rate = self.e_per_mm if layer_height is None else self.extrusion_per_mm(layer_height)
+        starts = np.empty_like(coords)
+        starts[:1] = (prev_x, prev_y)
+        starts[1:] = coords[:-1]
+        delta = coords - starts
+        lengths = np.hypot(delta[:, 0], delta[:, 1])
+        if centers is not None:
+            arc = ~np.isnan(centers[:, 0])
+            lengths[arc] = arc_lengths(starts[arc], coords[arc], centers[arc],
+                                       np.asarray(clockwise, dtype=bool)[arc])
+        e = lengths * rate
+        if extrude is not None:
+            e[~np.asarray(extrude, dtype=bool)] = 0.0
+        if absolute:
+            e = np.cumsum(e) + e_start
+        return lengths, e
+
+    def moves_gcode(self, coords, e, extrude, travel_speed=None, print_speed=None,
+                    arc_offsets=None, clockwise=None):
+        """
+        Returns the G-code for a batch of travel (G0), extruding (G1) and arc
+        (G2/G3) moves.
+
+        Numbers are written with the configured precision and words that repeat
+        the modal state are left out: X or Y when that axis doesn't move, E when
+        it rounds to zero and F when the feed rate is already set. The first move
+        always has X, Y and F, so the result doesn't depend on what came before
+        it. Straight moves that change nothing are dropped.
+
+        Args:
+            coords (np.ndarray): (N, 2) array of x, y end points of the moves.
+            e (np.ndarray): (N,) E values, e.g. from segment_extrusion().
+            extrude (np.ndarray): (N,) boolean mask, True for G1 and False for G0.
+            travel_speed (int): The speed of G0 moves, defaults to the configured one.
+            print_speed (int): The speed of G1 moves, defaults to the configured one.
+            arc_offsets (np.ndarray): (N, 2) I, J offsets of the arc centers from
+                the start of each move, NaN for straight moves.
+            clockwise (np.ndarray): (N,) boolean mask, True for G2 and False for G3.
+
+        Returns:
+            str: The G-code for all moves.
+        """
+        xy_precision = self.xy_precision
+        e_precision = self.e_precision
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2) + (self.x_offset, self.y_offset)
+        count = len(coords)
+        if not count:
+            return ""
+        extrude = np.asarray(extrude, dtype=bool)
+        arc = np.zeros(count, dtype=bool) if arc_offsets is None else ~np.isnan(arc_offsets[:, 0])
+        extrude = extrude | arc
+
+        xy = np.round(coords, xy_precision) + 0.0
+        # E is relative; rounding the running total keeps the rounding errors
+        # from adding up over the moves
+        total = np.round(np.cumsum(np.where(extrude, np.asarray(e, dtype=np.float64), 0.0)), e_precision)
+        e = np.round(np.diff(total, prepend=0.0), e_precision) + 0.0
+
+        moved = np.ones((count, 2), dtype=bool)
+        moved[1:] = xy[1:] != xy[:-1]
+        keep = moved.any(axis=1) | (extrude & (e != 0)) | arc
+        keep[0] = True
+        kept = np.flatnonzero(keep)
+        xy = xy[kept]
+        moved = moved[kept] | arc[kept, None]
+        e = e[kept]
+        extrude = extrude[kept]
+        arc = arc[kept]
+        speed = np.where(extrude, self.g1_speed if print_speed is None else print_speed,
+                         self.g0_speed if travel_speed is None else travel_speed)
+        feed = np.ones(len(kept), dtype=bool)
+        feed[1:] = speed[1:] != speed[:-1]
+
+        commands = np.where(extrude, "G1", "G0").astype(object)
+        columns = [
+            _words(" X", xy[:, 0], xy_precision, moved[:, 0]),
+            _words(" Y", xy[:, 1], xy_precision, moved[:, 1]),
+        ]
+        if arc.any():
+            commands[arc] = np.where(np.asarray(clockwise, dtype=bool)[kept][arc], "G2", "G3")
+            offsets = arc_offsets[kept]
+            columns += [_words(" I", offsets[:, 0], xy_precision, arc),
+                        _words(" J", offsets[:, 1], xy_precision, arc)]
+        columns += [_words(" E", e, e_precision, e != 0),
+                    _words(" F", speed, self.f_precision, feed)]
+        return "".join(map("".join, zip(commands.tolist(), *columns, itertools.repeat("\n"))))
+
+    def _arc(self, command, x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed):
+        """
+        Returns the G-code for a G2/G3 arc with the E value of its arc length.
+        I and J are relative to the start point, so the machine offsets only
+        apply to X and Y.
+        """
+        length = arc_lengths((prev_x, prev_y), (x, y),
+                             np.array([[prev_x + x_offset_I, prev_y + y_offset_J]]),
+                             np.array([command == "G2"]))[0]
+        e = float(length) * self.e_per_mm
+        x += self.x_offset
+        y += self.y_offset
+        xy_precision = self.xy_precision
+        speed = self.g1_speed if speed is None else speed
+        return (command + " X" + format_number(x, xy_precision) + " Y" + format_number(y, xy_precision)
+                + " I" + format_number(x_offset_I, xy_precision) + " J" + format_number(y_offset_J, xy_precision)
+                + " E" + format_number(e, self.e_precision) + " F" + format_number(speed, self.f_precision) + "\n")
+
+    def G2(self, x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed=None):
+        """
+        Returns the G-code to draw a clockwise arc to a given position.
+
+        Args:
+            x (float): The x-coordinate of the end position.
+            y (float): The y-coordinate of the end position.
+            prev_x (float): The previous x-coordinate.
+            prev_y (float): The previous y-coordinate.
+            x_offset_I (float): The x offset of the arc center from the start.
+            y_offset_J (float): The y offset of the arc center from the start.
+            speed (int): The speed of the movement, defaults to the G1 speed.
+        Returns:
+            str: The G-code to draw a clockwise arc to the given position.
+        """
+        return self._arc("G2", x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed)
+
+    def G3(self, x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed=None):
+        """
+        Returns the G-code to draw a counterclockwise arc to a given position.
+
+        Args:
+            x (float): The x-coordinate of the end position.
+            y (float): The y-coordinate of the end position.
+            prev_x (float): The previous x-coordinate.
+            prev_y (float): The previous y-coordinate.
+            x_offset_I (float): The x offset of the arc center from the start.
+            y_offset_J (float): The y offset of the arc center from the start.
+            speed (int): The speed of the movement, defaults to the G1 speed.
+        Returns:
+            str: The G-code to draw a counterclockwise arc to the given position.
+        """
+        return self._arc("G3", x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed)
+
+    def G5(self, x, y, x_offset_1, y_offset_1, x_offset_2, y_offset_2, speed=None, e=0):
+        """
+        Returns the G-code to draw a cubic Bezier curve to a given position.
+
+        Args:
+            x (float): The x-coordinate of the end position.
+            y (float): The y-coordinate of the end position.
+            x_offset_1 (float): The x offset of the first control point.
+            y_offset_1 (float): The y offset of the first control point.
+            x_offset_2 (float): The x offset of the second control point.
+            y_offset_2 (float): The y offset of the second control point.
+            speed (int): The speed of the movement, defaults to the G1 speed.
+        Returns:
+            str: The G-code to draw a cubic Bezier curve to the given position.
+        """
+        x += self.x_offset
+        y += self.y_offset
+        x_offset_1 += self.x_offset
+        y_offset_1 += self.y_offset
+        x_offset_2 += self.x_offset
+        y_offset_2 += self.y_offset
+        xy_precision = self.xy_precision
+        speed = self.g1_speed if speed is None else speed
+        return ("F" + format_number(speed, self.f_precision) + "\n" + "G5"
+                + " X" + format_number(x, xy_precision) + " Y" + format_number(y, xy_precision)
+                + " I" + format_number(x_offset_1, xy_precision) + " J" + format_number(y_offset_1, xy_precision)
+                + " P" + format_number(x_offset_2, xy_precision) + " Q" + format_number(y_offset_2, xy_precision)
+                + " E" + format_number(e, self.e_precision) + "\n")
+
+
+def _words(letter, values, digits, present):
+    """
+    Returns the letter and formatted value of every move where present is
+    set and an empty string elsewhere, see format_numbers().
     """
-    return "M104 S" + str(temp) + "\n"
+    values = (np.round(np.asarray(values, dtype=np.float64), digits) + 0.0).tolist()
+    template = letter + "%." + str(digits) + "f"
+    if digits <= 0:
+        return [template % value if word else "" for value, word in zip(values, present.tolist())]
+    return [(template % value).rstrip("0").rstrip(".") if word else ""
+            for value, word in zip(values, present.tolist())]
 
-def setBedTemp(temp=bed_temperature):
+
+def arc_lengths(starts, ends, centers, clockwise):
     """
-    Returns the G-code to set the bed temperature.
+    Returns the length of a batch of circular arcs.
 
     Args:
-        temp (int): The temperature to set the bed to.
+        starts (np.ndarray): (N, 2) start points of the arcs.
+        ends (np.ndarray): (N, 2) end points of the arcs.
+        centers (np.ndarray): (N, 2) centers of the arcs.
+        clockwise (np.ndarray): (N,) boolean mask, True for clockwise (G2) arcs.
 
     Returns:
-        str: The G-code to set the bed temperature.
+        np.ndarray: (N,) arc lengths, a full circle when start and end match.
+    """
+    start = np.asarray(starts, dtype=np.float64).reshape(-1, 2) - centers
+    end = np.asarray(ends, dtype=np.float64).reshape(-1, 2) - centers
+    angle = np.arctan2(start[:, 0] * end[:, 1] - start[:, 1] * end[:, 0],
+                       start[:, 0] * end[:, 0] + start[:, 1] * end[:, 1])
+    sweep = np.mod(np.where(clockwise, -angle, angle), 2 * math.pi)
+    sweep[sweep == 0] = 2 * math.pi
+    return sweep * np.hypot(start[:, 0], start[:, 1])
+
+
+_default_writer = None
+
+
+def default_writer():
+    """
+    Returns the writer behind the module-level functions, reading
+    CONFIG_FILE on first use.
+
+    Returns:
+        GcodeWriter: The default writer.
+    """
+    global _default_writer
+    if _default_writer is None:
+        _default_writer = GcodeWriter()
+    return _default_writer
+
+
+# Module settings of earlier versions, now read from the default writer
+_WRITER_ATTRIBUTES = {
+    'x_offset': 'x_offset', 'y_offset': 'y_offset', 'z_offset': 'z_offset',
+    'x_max': 'x_max', 'y_max': 'y_max', 'x_min': 'x_min', 'y_min': 'y_min',
+    'z_speed': 'z_speed', 'G0_speed': 'g0_speed', 'G1_speed': 'g1_speed',
+    'start_gcode': 'start_gcode', 'end_gcode': 'end_gcode',
+    'nozzle_size': 'nozzle_size', 'layer_height': 'layer_height',
+    'filament_diameter': 'filament_diameter', 'filament_flow_rate': 'filament_flow_rate',
+    'filament_temprature': 'filament_temperature', 'bed_temperature': 'bed_temperature',
+    'e_per_mm': 'e_per_mm', 'config': 'config',
+    'xy_precision': 'xy_precision', 'z_precision': 'z_precision',
+    'e_precision': 'e_precision', 'f_precision': 'f_precision',
+    'acceleration': 'acceleration', 'jerk': 'jerk',
+    'filament_density': 'filament_density', 'prepare_time': 'prepare_time',
+}
+
+
+def __getattr__(name):
+    if name in _WRITER_ATTRIBUTES:
+        return getattr(default_writer(), _WRITER_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def extrusion_per_mm(layer_height=None):
+    """
+    Returns GcodeWriter.extrusion_per_mm() of the default writer.
     """
-    return "M140 S" + str(temp) + "\n"
+    return default_writer().extrusion_per_mm(layer_height)
+
+
+def startGcode():
+    """
+    Returns the start G-code of the default writer.
+    """
+    return default_writer().startGcode()
+
+def endGcode():
+    """
+    Returns the end G-code of the default writer.
+    """
+    return default_writer().endGcode()
+
+def setNozzleTemp(temp=None):
+    """
+    Returns GcodeWriter.setNozzleTemp() of the default writer.
+    """
+    return default_writer().setNozzleTemp(temp)
+
+def setBedTemp(temp=None):
+    """
+    Returns GcodeWriter.setBedTemp() of the default writer.
+    """
+    return default_writer().setBedTemp(temp)
 
 def fanOff():
     """
@@ -114,7 +624,7 @@ def progressGcode(percentage, time):
 
     Args:
         percentage (int): The percentage of the progress.
-        time (int): The remaining time.
+        time (int): The remaining time in minutes.
 
     Returns:
         str: The G-code to update the progress.
@@ -123,175 +633,57 @@ def progressGcode(percentage, time):
 
 def G0_Z(z):
     """
-    Returns the G-code to move the machine to a given z-coordinate.
-
-    Args:
-        z (float): The z-coordinate of the position.
+    Returns GcodeWriter.G0_Z() of the default writer.
+    """
+    return default_writer().G0_Z(z)
 
-    Returns:
-        str: The G-code to move the machine to the given z-coordinate.
+def G0(x, y, z=0, speed=None, e=0):
     """
-    z += z_offset
-    return "G0 Z" + str(z) + "\n"
+    Returns GcodeWriter.G0() of the default writer.
+    """
+    return default_writer().G0(x, y, z, speed, e)
 
-def G0(x, y, z=0, speed=G0_speed, e=0):
+def G1(x, y, prev_x=None, prev_y=None, travel=False, z=0, prev_z=0, speed=None):
+    """
+    Returns GcodeWriter.G1() of the default writer.
     """
-    Returns the G-code to move the machine to a given position.
+    return default_writer().G1(x, y, prev_x, prev_y, travel, z, prev_z, speed)
 
-    Args:
-        x (float): The x-coordinate of the position.
-        y (float): The y-coordinate of the position.
-        z (float): The z-coordinate of the position.
-        speed (int): The speed of the movement.
-        e (float): The E value for the movement, default is retracted by 0mm.
 
-    Returns:
-        str: The G-code to move the machine to the given position.
+def segment_extrusion(coords, extrude=None, prev_x=0, prev_y=0, layer_height=None,
+                      absolute=False, e_start=0.0, centers=None, clockwise=None):
+    """
+    Returns GcodeWriter.segment_extrusion() of the default writer.
     """
-    x += x_offset
-    y += y_offset
-    # if z != 0:
-    #     z += z_offset
-    #     return "G0 X" + str(x) + " Y" + str(y) + " Z" + str(z) + " E" + str(e) + " F" + str(speed) + "\n"
-    # else:
-    #     return "\n" + "G1 X" + str(x) + " Y" + str(y) + " E" + str(e) + " F" + str(speed)
-    if e != 0:
-        return "G0 X" + str(x) + " Y" + str(y) + " E" + str(e) + " F" + str(speed) + "\n"
-    return "G0 X" + str(x) + " Y" + str(y) + " F" + str(speed) + "\n"
+    return default_writer().segment_extrusion(coords, extrude, prev_x, prev_y, layer_height,
+                                              absolute, e_start, centers, clockwise)
 
-def G1(x, y, prev_x=None, prev_y=None, travel=False, z=0, prev_z=0, speed=G1_speed):
+def moves_gcode(coords, e, extrude, travel_speed=None, print_speed=None,
+                arc_offsets=None, clockwise=None):
     """
-    Returns the G-code to draw a line to a given position.
+    Returns GcodeWriter.moves_gcode() of the default writer.
+    """
+    return default_writer().moves_gcode(coords, e, extrude, travel_speed, print_speed,
+                                        arc_offsets, clockwise)
 
-    Args:
-        x (float): The x-coordinate of the position.
-        y (float): The y-coordinate of the position.
-        prev_x (float): The previous x-coordinate.
-        prev_y (float): The previous y-coordinate.
-        travel (bool): Whether the movement is a travel move (no extrusion).
-        z (float): The z-coordinate of the position.
-        prev_z (float): The previous z-coordinate.
-        speed (int): The speed of the movement.
 
-    Returns:
-        str: The G-code to draw a line to the given position.
+def G2(x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed=None):
     """
-    if prev_x is None or prev_y is None:
-        travel = True
-    
-    if travel:
-        if z != 0:
-            z += z_offset
-            return "G1" + " X" + str(x) + " Y" + str(y) + " Z" + str(z) + " F" + str(speed) + "\n"
-        else:
-            return "G1" + " X" + str(x) + " Y" + str(y) + " F" + str(speed) + "\n"
-    
-    distance = ((x - prev_x)**2 + (y - prev_y)**2)**0.5
-    if z != 0:
-        distance = ((x - prev_x)**2 + (y - prev_y)**2 + (z - prev_z)**2)**0.5
-    # Calculate the E value based on the distance and filament flow rate
-    volume = distance * layer_height * nozzle_size
-    e = volume / (3.14159 * (filament_diameter / 2)**2) * filament_flow_rate
-    
-    x += x_offset
-    y += y_offset
-    
-    if z != 0:
-        z += z_offset
-        return "G1" + " X" + str(x) + " Y" + str(y) + " Z" + str(z) + " E" + str(e) + " F" + str(speed) + "\n"
-    else:
-        return "G1" + " X" + str(x) + " Y" + str(y) + " E" + str(e) + " F" + str(speed) + "\n"
-
-
-# TODO: Able to calculate distance for these
-def G2(x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed=G1_speed):
-    """
-    Returns the G-code to draw a clockwise arc to a given position.
-    
-    Args:
-        x (float): The x-coordinate of the end position.
-        y (float): The y-coordinate of the end position.
-        prev_x (float): The previous x-coordinate.
-        prev_y (float): The previous y-coordinate.
-        x_offset_I (float): The x offset of the arc.
-        y_offset_J (float): The y offset of the arc.
-        radius (float): The radius of the arc.
-        speed (int): The speed of the movement.
-    Returns:
-        str: The G-code to draw a clockwise arc to the given position.
-    """
-    # Calculate arc center
-    center_x = prev_x + x_offset_I
-    center_y = prev_y + y_offset_J
-    
-    # Calculate radius based on the offset values
-    radius = math.sqrt(x_offset_I**2 + y_offset_J**2)
-    
-    # Calculate angles between center and points
-    start_angle = math.atan2(prev_y - center_y, prev_x - center_x)
-    end_angle = math.atan2(y - center_y, x - center_x)
-    
-    # Adjust for clockwise motion (G2)
-    if end_angle > start_angle:
-        end_angle -= 2 * math.pi
-    
-    # Calculate the angle difference (negative for clockwise)
-    angle_diff = end_angle - start_angle
-    
-    # Calculate arc length
-    arc_length = abs(angle_diff) * radius
-    
-    # Calculate extrusion amount based on arc length
-    extrusion = arc_length * e_per_mm
-    
-    x += x_offset
-    y += y_offset
-    x_offset_I += x_offset
-    y_offset_J += y_offset
-    return "F" + str(speed) + "\n" + "G2" + " X" + str(x) + " Y" + str(y) + " I" + str(x_offset_I) + " J" + str(y_offset_J) + " E" + str(e) + "\n"
-
-def G3(x, y, x_offset_I, y_offset_J, speed=G1_speed, e=0):
-    """
-    Returns the G-code to draw a counterclockwise arc to a given position.
-    
-    Args:
-        x (float): The x-coordinate of the end position.
-        y (float): The y-coordinate of the end position.
-        x_offset_I (float): The x offset of the arc.
-        y_offset_J (float): The y offset of the arc.
-        radius (float): The radius of the arc.
-        speed (int): The speed of the movement.
-    Returns:
-        str: The G-code to draw a clockwise arc to the given position.
+    Returns GcodeWriter.G2() of the default writer.
     """
-    x += x_offset
-    y += y_offset
-    x_offset_I += x_offset
-    y_offset_J += y_offset
-    return "F" + str(speed) + "\n" + "G3" + " X" + str(x) + " Y" + str(y) + " I" + str(x_offset_I) + " J" + str(y_offset_J) + " E" + str(e) + "\n"
+    return default_writer().G2(x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed)
 
-def G5(x, y, x_offset_1, y_offset_1, x_offset_2, y_offset_2, speed=G1_speed, e=0):
+def G3(x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed=None):
     """
-    Returns the G-code to draw a cubic Bezier curve to a given position.
-    
-    Args:
-        x (float): The x-coordinate of the end position.
-        y (float): The y-coordinate of the end position.
-        x_offset_1 (float): The x offset of the first control point.
-        y_offset_1 (float): The y offset of the first control point.
-        x_offset_2 (float): The x offset of the second control point.
-        y_offset_2 (float): The y offset of the second control point.
-        speed (int): The speed of the movement.
-    Returns:
-        str: The G-code to draw a cubic Bezier curve to the given position.
+    Returns GcodeWriter.G3() of the default writer.
+    """
+    return default_writer().G3(x, y, prev_x, prev_y, x_offset_I, y_offset_J, speed)
+
+def G5(x, y, x_offset_1, y_offset_1, x_offset_2, y_offset_2, speed=None, e=0):
+    """
+    Returns GcodeWriter.G5() of the default writer.
     """
-    x += x_offset
-    y += y_offset
-    x_offset_1 += x_offset
-    y_offset_1 += y_offset
-    x_offset_2 += x_offset
-    y_offset_2 += y_offset
-    return "F" + str(speed) + "\n" + "G5" + " X" + str(x) + " Y" + str(y) + " I" + str(x_offset_1) + " J" + str(y_offset_1) + " P" + str(x_offset_2) + " Q" + str(y_offset_2) + " E" + str(e) + "\n"
+    return default_writer().G5(x, y, x_offset_1, y_offset_1, x_offset_2, y_offset_2, speed, e)
 
 
 def wait(wait_time):
@@ -313,4 +705,4 @@ def pauseGcode():
     Returns:
         str: The G-code to pause the machine.
     """
-    return "M400 U1\n"
\ No newline at end of file
+    return "M400 U1\n"